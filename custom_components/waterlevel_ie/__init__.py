@@ -1,26 +1,49 @@
 """WaterLevel.ie integration for Home Assistant."""
 from __future__ import annotations
 
-from datetime import timedelta
+from collections.abc import Iterable
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
+    CONF_ARCHIVE,
+    CONF_ARCHIVE_RETENTION,
+    CONF_LEAD_TIME_STATIONS,
+    CONF_METRICS,
+    CONF_PAUSE_DORMANT,
+    CONF_PER_STATION_FETCH,
+    CONF_READING_FILTER,
+    CONF_RECORDER_FOOTPRINT,
     CONF_RIVERS,
     CONF_STATIONS,
     CONF_UPDATE_INTERVAL,
+    DATA_HUB,
+    DEFAULT_ARCHIVE,
+    DEFAULT_ARCHIVE_RETENTION,
+    DEFAULT_LEAD_TIME_STATIONS,
+    DEFAULT_METRICS,
+    DEFAULT_PAUSE_DORMANT,
+    DEFAULT_PER_STATION_FETCH,
+    DEFAULT_READING_FILTER,
+    DEFAULT_RECORDER_FOOTPRINT,
     DEFAULT_RIVERS,
     DEFAULT_STATIONS,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    MAX_ARCHIVE_RETENTION,
     MIN_UPDATE_INTERVAL,
 )
 from .coordinator import WaterLevelDataCoordinator
 from . import rivers as rivers_mod
+from .services import async_register_services
+from .websocket import async_register_websocket_commands
 
 import logging
 
@@ -28,9 +51,35 @@ _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up WaterLevel.ie from a config entry."""
+# Options the running coordinator can apply without a reload (see
+# async_reload_entry); changing any other option reloads the entry.
+HOT_OPTIONS = {
+    CONF_UPDATE_INTERVAL,
+    CONF_STATIONS,
+    CONF_RIVERS,
+    CONF_LEAD_TIME_STATIONS,
+    CONF_READING_FILTER,
+    CONF_METRICS,
+    CONF_PAUSE_DORMANT,
+    CONF_PER_STATION_FETCH,
+    CONF_ARCHIVE,
+    CONF_ARCHIVE_RETENTION,
+}
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the WaterLevel.ie component."""
+    async_register_websocket_commands(hass)
+    async_register_services(hass)
+    return True
+
+
+async def _async_coordinator_settings(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the coordinator settings derived from the entry options."""
     # Enforce the OPW minimum regardless of how the value was stored (the config
     # flow already enforces it, but guard against imported/edited values so we
     # never poll faster than OPW allows). There is no upper bound - OPW only
@@ -68,7 +117,58 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         station_filter |= river_refs
 
-    coordinator = WaterLevelDataCoordinator(hass, update_interval, station_filter)
+    # Lead-time estimates need the gauges upstream of each selected station,
+    # so track every station on those stations' rivers as well.
+    lead_time_stations = set(
+        entry.options.get(CONF_LEAD_TIME_STATIONS, DEFAULT_LEAD_TIME_STATIONS) or []
+    )
+    if lead_time_stations and station_filter:
+        await rivers_mod.async_load_river_map(hass)
+        lead_rivers = {
+            river
+            for river in map(rivers_mod.river_for_ref, lead_time_stations)
+            if river
+        }
+        station_filter |= lead_time_stations
+        station_filter |= rivers_mod.refs_for_rivers(lead_rivers)
+
+    try:
+        archive_retention = int(
+            entry.options.get(CONF_ARCHIVE_RETENTION, DEFAULT_ARCHIVE_RETENTION)
+        )
+    except (TypeError, ValueError):
+        archive_retention = DEFAULT_ARCHIVE_RETENTION
+    archive_retention = min(max(archive_retention, 1), MAX_ARCHIVE_RETENTION)
+
+    return {
+        "update_interval_minutes": update_interval,
+        "station_filter": station_filter,
+        "reading_filter": entry.options.get(
+            CONF_READING_FILTER, DEFAULT_READING_FILTER
+        ),
+        "lead_time_stations": lead_time_stations,
+        "metrics": entry.options.get(CONF_METRICS, DEFAULT_METRICS),
+        "pause_dormant": entry.options.get(
+            CONF_PAUSE_DORMANT, DEFAULT_PAUSE_DORMANT
+        ),
+        "per_station_fetch": entry.options.get(
+            CONF_PER_STATION_FETCH, DEFAULT_PER_STATION_FETCH
+        ),
+        "archive": entry.options.get(CONF_ARCHIVE, DEFAULT_ARCHIVE),
+        "archive_retention": archive_retention,
+    }
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up WaterLevel.ie from a config entry."""
+    coordinator = WaterLevelDataCoordinator(
+        hass,
+        **await _async_coordinator_settings(hass, entry),
+        recorder_footprint=entry.options.get(
+            CONF_RECORDER_FOOTPRINT, DEFAULT_RECORDER_FOOTPRINT
+        ),
+    )
+    coordinator.applied_options = dict(entry.options)
 
     # Load any cached data from previous runs before first refresh
     await coordinator.async_load_cache()
@@ -77,13 +177,34 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
-    # Register a parent "river system" device for each river the tracked
-    # stations belong to, so the gauge devices nest under their river on the
-    # Devices page (via_device on each station device, set in sensor.py).
-    await hass.async_add_executor_job(rivers_mod.station_river_map)  # warm cache
+    _async_sync_river_devices(hass, entry, coordinator.data)
+    # Registered before the platforms' listeners, so a new station's river
+    # device exists by the time its entities are added.
+    entry.async_on_unload(_async_track_river_devices(hass, entry, coordinator))
+
+    # Set up platforms
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    _async_prune_devices(hass, entry, coordinator)
+
+    # Register update listener for options changes
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+@callback
+def _async_sync_river_devices(
+    hass: HomeAssistant, entry: ConfigEntry, refs: Iterable[str]
+) -> None:
+    """Register a parent "river system" device for the rivers of these stations.
+
+    The gauge devices nest under their river on the Devices page (via_device
+    on each station device, set in sensor.py).
+    """
     dev_reg = dr.async_get(hass)
     seen_rivers: set[str] = set()
-    for ref in coordinator.data:
+    for ref in refs:
         river = rivers_mod.river_for_ref(ref)
         if river and river not in seen_rivers:
             seen_rivers.add(river)
@@ -97,29 +218,69 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 configuration_url="https://waterlevel.ie/",
             )
 
-    # Set up platforms
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Prune stale gauge devices left over from previously tracked stations:
-    # any WaterLevel.ie station device that no longer has entities is removed
-    # so the device list stays in sync with the current selection.
-    ent_reg = er.async_get(hass)
-    for device in list(dr.async_entries_for_config_entry(dev_reg, entry.entry_id)):
-        is_station = any(
-            domain == DOMAIN
-            and not ident.startswith("river:")
-            and ident != "waterlevel_ie_service"
-            for domain, ident in device.identifiers
-        )
-        if is_station and not er.async_entries_for_device(
-            ent_reg, device.id, include_disabled_entities=True
-        ):
-            dev_reg.async_remove_device(device.id)
+@callback
+def _async_track_river_devices(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: WaterLevelDataCoordinator
+) -> CALLBACK_TYPE:
+    """Create river devices for stations as they appear, from each cycle's delta.
 
-    # Register update listener for options changes
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    Only the added readings are looked at, so a cycle that brings no new
+    station costs nothing; a missed cycle falls back to all tracked stations.
+    Devices are pruned when the selection changes (async_reload_entry), not
+    when a station drops out of the feed for a while.
+    """
+    seen_cycle = coordinator.delta_cycle
 
-    return True
+    @callback
+    def _handle_delta() -> None:
+        nonlocal seen_cycle
+        cycle = coordinator.delta_cycle
+        if cycle == seen_cycle:
+            return
+        if cycle == seen_cycle + 1:
+            refs: Iterable[str] = {ref for ref, _ in coordinator.added_readings}
+        else:
+            refs = coordinator.data
+        seen_cycle = cycle
+        if refs:
+            _async_sync_river_devices(hass, entry, refs)
+
+    return coordinator.async_add_listener(_handle_delta)
+
+
+@callback
+def _async_prune_devices(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: WaterLevelDataCoordinator
+) -> None:
+    """Detach this entry from devices of stations and rivers it no longer tracks.
+
+    A device can be shared by several entries, so this entry is detached from
+    any WaterLevel.ie station device it no longer has entities on, and from
+    river devices with no tracked station (the registry removes a device once
+    no entry is left), to keep the device list in sync with the selection.
+    """
+    dev_reg = dr.async_get(hass)
+    ent_reg = er.async_get(hass)
+    tracked_rivers = {rivers_mod.river_for_ref(ref) for ref in coordinator.data}
+    for device in list(dr.async_entries_for_config_entry(dev_reg, entry.entry_id)):
+        stale = False
+        for domain, ident in device.identifiers:
+            if domain != DOMAIN or ident == "waterlevel_ie_service":
+                continue
+            if ident.startswith("river:"):
+                stale = ident[len("river:") :] not in tracked_rivers
+            else:
+                stale = not any(
+                    entity.config_entry_id == entry.entry_id
+                    for entity in er.async_entries_for_device(
+                        ent_reg, device.id, include_disabled_entities=True
+                    )
+                )
+        if stale:
+            dev_reg.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -128,10 +289,46 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # Stop the shared fetcher and free its snapshot once the last entry
+        # is gone.
+        if not hass.data[DOMAIN] and (hub := hass.data.get(DATA_HUB)) is not None:
+            await hub.async_shutdown()
+            hass.data.pop(DATA_HUB)
 
     return unload_ok
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload the config entry when options change."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed options in place, or reload the entry if they need it.
+
+    Selection, interval, filtering, metrics and dormant-station options are
+    applied to the running coordinator from the feed it already holds: only
+    the affected entities and devices are added or removed and no request
+    is made to OPW. Anything else reloads the entry.
+    """
+    coordinator: WaterLevelDataCoordinator | None = hass.data.get(DOMAIN, {}).get(
+        entry.entry_id
+    )
+    if coordinator is None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    applied = coordinator.applied_options
+    changed = {
+        key
+        for key in entry.options.keys() | applied.keys()
+        if entry.options.get(key) != applied.get(key)
+    }
+    if not changed:
+        return
+    if not changed <= HOT_OPTIONS:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    _LOGGER.debug("Applying changed options in place: %s", sorted(changed))
+    coordinator.applied_options = dict(entry.options)
+    await coordinator.async_reconfigure(
+        **await _async_coordinator_settings(hass, entry)
+    )
+    # River devices and entities were added from the reconfigured cycle's
+    # delta; what is left is detaching devices of deselected stations.
+    _async_prune_devices(hass, entry, coordinator)
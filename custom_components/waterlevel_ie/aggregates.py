@@ -0,0 +1,237 @@
+"""Per-river aggregate statistics for WaterLevel.ie.
+
+Keeps max/min/mean water level, the number of gauges in alarm and the most
+recently updated gauge for every river system. The aggregates are maintained
+incrementally from the per-cycle delta of changed and removed readings, so the
+cost of an update grows with the number of changed readings rather than with
+the total number of stations.
+
+Max, min and latest are kept in heaps with lazy deletion: superseded entries
+stay in the heap and are discarded when they surface at the top. The heaps are
+compacted once they grow well beyond the number of live gauges, which keeps
+both memory and the amortised cost per change bounded.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# Sensor type whose readings are aggregated (water level, metres).
+LEVEL_SENSOR = "0001"
+
+# OPW marks a normal reading with err_code 99; any other code flags the gauge.
+NORMAL_ERR_CODE = 99
+
+# Compact a heap once it holds this many times more entries than live gauges.
+_COMPACT_RATIO = 2
+_COMPACT_MIN = 8
+
+
+class RiverStats:
+    """Incrementally maintained statistics for one river system."""
+
+    __slots__ = (
+        "levels",
+        "alarms",
+        "updated",
+        "_total",
+        "_max_heap",
+        "_min_heap",
+        "_updated_heap",
+    )
+
+    def __init__(self) -> None:
+        """Initialise empty statistics."""
+        self.levels: dict[str, float] = {}
+        self.alarms: set[str] = set()
+        self.updated: dict[str, float] = {}
+        self._total = 0.0
+        self._max_heap: list[tuple[float, str]] = []
+        self._min_heap: list[tuple[float, str]] = []
+        self._updated_heap: list[tuple[float, str]] = []
+
+    def __bool__(self) -> bool:
+        """Return True while any gauge contributes to this river."""
+        return bool(self.levels or self.alarms or self.updated)
+
+    def set_level(self, ref: str, value: float | None) -> None:
+        """Record (or clear, when None) the water level of a gauge."""
+        old = self.levels.pop(ref, None)
+        if old is not None:
+            self._total -= old
+        if value is None:
+            return
+        self.levels[ref] = value
+        self._total += value
+        heapq.heappush(self._max_heap, (-value, ref))
+        heapq.heappush(self._min_heap, (value, ref))
+        self._maybe_compact()
+
+    def set_alarm(self, ref: str, in_alarm: bool) -> None:
+        """Mark or clear a gauge as being in alarm."""
+        if in_alarm:
+            self.alarms.add(ref)
+        else:
+            self.alarms.discard(ref)
+
+    def set_updated(self, ref: str, timestamp: float | None) -> None:
+        """Record (or clear, when None) the latest reading time of a gauge."""
+        if timestamp is None:
+            self.updated.pop(ref, None)
+            return
+        self.updated[ref] = timestamp
+        heapq.heappush(self._updated_heap, (-timestamp, ref))
+        self._maybe_compact()
+
+    def remove(self, ref: str) -> None:
+        """Drop a gauge from every statistic."""
+        self.set_level(ref, None)
+        self.set_alarm(ref, False)
+        self.set_updated(ref, None)
+
+    @property
+    def count(self) -> int:
+        """Return the number of gauges with a water level."""
+        return len(self.levels)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean water level, or None without readings."""
+        if not self.levels:
+            return None
+        return self._total / len(self.levels)
+
+    @property
+    def max(self) -> tuple[str, float] | None:
+        """Return (ref, level) of the highest gauge, or None."""
+        entry = self._top(self._max_heap, self.levels, negate=True)
+        return (entry[1], -entry[0]) if entry else None
+
+    @property
+    def min(self) -> tuple[str, float] | None:
+        """Return (ref, level) of the lowest gauge, or None."""
+        entry = self._top(self._min_heap, self.levels, negate=False)
+        return (entry[1], entry[0]) if entry else None
+
+    @property
+    def latest(self) -> tuple[str, float] | None:
+        """Return (ref, timestamp) of the most recently updated gauge, or None."""
+        entry = self._top(self._updated_heap, self.updated, negate=True)
+        return (entry[1], -entry[0]) if entry else None
+
+    @staticmethod
+    def _top(
+        heap: list[tuple[float, str]], live: dict[str, float], negate: bool
+    ) -> tuple[float, str] | None:
+        """Return the top live heap entry, discarding superseded ones."""
+        while heap:
+            key, ref = heap[0]
+            current = live.get(ref)
+            if current is not None and (-current if negate else current) == key:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the heaps from live values once they hold too much garbage."""
+        live = max(len(self.levels), len(self.updated))
+        limit = _COMPACT_RATIO * live + _COMPACT_MIN
+        if len(self._max_heap) > limit or len(self._min_heap) > limit:
+            self._max_heap = [(-v, r) for r, v in self.levels.items()]
+            self._min_heap = [(v, r) for r, v in self.levels.items()]
+            heapq.heapify(self._max_heap)
+            heapq.heapify(self._min_heap)
+            # Re-summing also resets any floating point drift in the total.
+            self._total = sum(self.levels.values())
+        if len(self._updated_heap) > limit:
+            self._updated_heap = [(-t, r) for r, t in self.updated.items()]
+            heapq.heapify(self._updated_heap)
+
+
+class RiverAggregator:
+    """Maintain RiverStats for every river from per-cycle reading deltas."""
+
+    def __init__(self) -> None:
+        """Initialise with no rivers."""
+        self.rivers: dict[str, RiverStats] = {}
+        # station_ref -> river it was last aggregated under
+        self._station_river: dict[str, str] = {}
+
+    def get(self, river: str) -> RiverStats | None:
+        """Return the statistics for a river, if any gauge contributes."""
+        return self.rivers.get(river)
+
+    def apply(
+        self,
+        data: dict[str, Any],
+        changed: set[tuple[str, str]],
+        removed: set[tuple[str, str]],
+        river_for_ref: Any,
+    ) -> set[str]:
+        """Fold a cycle's delta into the aggregates.
+
+        data is the full parsed snapshot, changed/removed are the
+        (station_ref, sensor_ref) keys that differ from the previous snapshot and
+        river_for_ref maps a station ref to its river (or None). Only the
+        stations touched by the delta are visited. Returns the rivers whose
+        statistics changed.
+        """
+        touched = {ref for ref, _sensor in changed}
+        touched.update(ref for ref, _sensor in removed)
+
+        dirty: set[str] = set()
+        for ref in touched:
+            river = self._station_river.get(ref) or river_for_ref(ref)
+            if not river:
+                continue
+            stats = self.rivers.get(river)
+            station = data.get(ref)
+            if station is None:
+                if stats is not None:
+                    stats.remove(ref)
+                    if not stats:
+                        del self.rivers[river]
+                self._station_river.pop(ref, None)
+                dirty.add(river)
+                continue
+            if stats is None:
+                stats = self.rivers[river] = RiverStats()
+            self._station_river[ref] = river
+            self._update_station(stats, ref, station)
+            dirty.add(river)
+        return dirty
+
+    def drop(self, refs: set[str]) -> set[str]:
+        """Remove stations from their rivers until their next change.
+
+        Returns the rivers whose statistics changed.
+        """
+        dirty: set[str] = set()
+        for ref in refs:
+            river = self._station_river.pop(ref, None)
+            stats = self.rivers.get(river) if river else None
+            if stats is None:
+                continue
+            stats.remove(ref)
+            if not stats:
+                del self.rivers[river]
+            dirty.add(river)
+        return dirty
+
+    @staticmethod
+    def _update_station(stats: RiverStats, ref: str, station: dict[str, Any]) -> None:
+        """Refresh one station's contribution to its river."""
+        level = station.get("sensors", {}).get(LEVEL_SENSOR)
+        if level is None:
+            stats.set_level(ref, None)
+            stats.set_alarm(ref, False)
+        else:
+            stats.set_level(ref, level.get("value"))
+            err_code = level.get("err_code")
+            stats.set_alarm(ref, err_code is not None and err_code != NORMAL_ERR_CODE)
+
+        last_updated = station.get("last_updated")
+        parsed = dt_util.parse_datetime(last_updated) if last_updated else None
+        stats.set_updated(ref, parsed.timestamp() if parsed else None)
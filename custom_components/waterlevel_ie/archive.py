@@ -0,0 +1,541 @@
+"""On-disk reading archive and bulk export for WaterLevel.ie.
+
+The in-memory history (history.py) only covers the last few days, and the
+recorder stores one state row per entity, so pulling months of readings out
+for analysis means slow SQL over per-entity rows. Entries with the reading
+archive enabled instead keep every new reading they see in compact,
+month-partitioned, gzip-compressed CSV files under
+.storage/waterlevel_ie_archive:
+
+    epoch_seconds,station_ref,sensor_type,value
+
+New readings are buffered in memory and written every ARCHIVE_FLUSH_INTERVAL
+(or ARCHIVE_FLUSH_ROWS readings, on unload and when Home Assistant stops), so
+the disk sees a few larger writes a day instead of one per cycle. A flush
+appends one gzip member per station to the month's file and a
+station_ref,offset,length line per member to the month's .idx file; an
+export for a few stations reads and decompresses only their members, while
+one for every station streams the whole month. Whatever the index does not
+cover (an older file, or a flush cut short before its index lines, even with
+later flushes after it) is read sequentially, and a damaged member is skipped
+by resyncing at the next member header. Exports run in the executor and
+stream row by row, so memory stays bounded however much history is exported.
+Values are archived as published by OPW, before any spike filtering.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Iterator
+import csv
+from datetime import datetime, timezone
+import gzip
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Any, BinaryIO
+import zlib
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_ARCHIVE, DEFAULT_ARCHIVE_RETENTION, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+ARCHIVE_DIR = f"{DOMAIN}_archive"
+
+# Buffered readings are written once the oldest has waited this long (s), or
+# once this many are waiting (about 100 bytes each in memory).
+ARCHIVE_FLUSH_INTERVAL = 6 * 3600
+ARCHIVE_FLUSH_ROWS = 50_000
+
+# Near level 9's ratio on these small members at a fraction of its time.
+ARCHIVE_COMPRESSLEVEL = 6
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+EXPORT_FORMATS = [EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET]
+
+EXPORT_COLUMNS = (
+    "time",
+    "station_ref",
+    "station_name",
+    "river",
+    "region",
+    "sensor_type",
+    "value",
+)
+
+# Bytes read at a time when decompressing, and the header every gzip member
+# starts with (magic and deflate method), used to resync past damage.
+_READ_CHUNK = 1 << 16
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+
+# Rows buffered per Parquet row group; bounds export memory.
+PARQUET_ROW_GROUP = 65536
+
+Row = tuple[int, str, str, float]
+
+
+def _month_key(epoch: float) -> str:
+    """Return the YYYY-MM partition of a POSIX timestamp (UTC)."""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m")
+
+
+def _month_index(key: str) -> int:
+    """Return a YYYY-MM partition as a month count, for range checks."""
+    year, month = key.split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def _parse_rows(lines: Iterable[str]) -> Iterator[Row]:
+    """Yield the rows of archive CSV lines, skipping malformed ones."""
+    for line in lines:
+        fields = line.rstrip("\r\n").split(",")
+        if len(fields) != 4:
+            continue
+        try:
+            yield int(fields[0]), fields[1], fields[2], float(fields[3])
+        except ValueError:
+            continue
+
+
+def _next_member(file: BinaryIO, start: int, end: int) -> int | None:
+    """Return the offset of the next gzip member header in [start, end)."""
+    file.seek(start)
+    position = start
+    carry = b""
+    while position < end:
+        chunk = file.read(min(_READ_CHUNK, end - position))
+        if not chunk:
+            break
+        data = carry + chunk
+        if (found := data.find(_GZIP_MAGIC)) != -1:
+            return position - len(carry) + found
+        carry = data[-(len(_GZIP_MAGIC) - 1) :]
+        position += len(chunk)
+    return None
+
+
+def _member_lines(file: BinaryIO, start: int, end: int, month: str) -> Iterator[str]:
+    """Yield the text lines of the gzip members stored in file[start:end].
+
+    A damaged member (a torn write, a flipped bit) is skipped by resyncing at
+    the next member header, so only its own rows are lost; an incomplete
+    member at the end of the range ends it.
+    """
+    position = start
+    while position < end:
+        file.seek(position)
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        consumed = 0
+        buffer = b""
+        try:
+            while not decoder.eof and position + consumed < end:
+                chunk = file.read(min(_READ_CHUNK, end - position - consumed))
+                if not chunk:
+                    break
+                consumed += len(chunk)
+                *lines, buffer = (buffer + decoder.decompress(chunk)).split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8", "replace")
+        except zlib.error as err:
+            resync = _next_member(file, position + 1, end)
+            _LOGGER.warning(
+                "Skipped a damaged member of archive %s at byte %s: %s",
+                month,
+                position,
+                err,
+            )
+            if resync is None:
+                return
+            position = resync
+            continue
+        if not decoder.eof:
+            _LOGGER.warning(
+                "Skipped an incomplete member of archive %s at byte %s",
+                month,
+                position,
+            )
+            return
+        if buffer:
+            yield buffer.decode("utf-8", "replace")
+        position += consumed - len(decoder.unused_data)
+
+
+@callback
+def async_get_archive(hass: HomeAssistant) -> ReadingArchive:
+    """Return the archive shared by all entries, creating it if needed."""
+    archive: ReadingArchive | None = hass.data.get(DATA_ARCHIVE)
+    if archive is None:
+        archive = hass.data[DATA_ARCHIVE] = ReadingArchive(
+            Path(hass.config.path(STORAGE_DIR, ARCHIVE_DIR))
+        )
+
+        async def _async_final_write(_: Event) -> None:
+            await archive.async_flush(hass)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, _async_final_write)
+    return archive
+
+
+class ReadingArchive:
+    """Month-partitioned, append-only archive of the readings seen."""
+
+    def __init__(self, directory: Path) -> None:
+        """Initialize the archive in a directory (created on first write)."""
+        self.directory = directory
+        # Newest archived timestamp per (station_ref, sensor_ref): several
+        # entries may publish the same reading in one cycle.
+        self._last: dict[tuple[str, str], float] = {}
+        # Readings not yet written, and when the oldest of them arrived
+        # (monotonic).
+        self._pending: list[Row] = []
+        self._pending_since: float | None = None
+        # Entries recording into the archive -> months each wants kept.
+        self._retention: dict[Any, int] = {}
+        self._lock = asyncio.Lock()
+        self._pruned_month: str | None = None
+
+    def _partition(self, key: str) -> Path:
+        """Return the data file of a YYYY-MM partition."""
+        return self.directory / f"{key}.csv.gz"
+
+    def _index(self, key: str) -> Path:
+        """Return the station index of a YYYY-MM partition."""
+        return self.directory / f"{key}.idx"
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether any entry records into the archive."""
+        return bool(self._retention)
+
+    @property
+    def retention_months(self) -> int:
+        """Return the whole months kept on disk, the current one included."""
+        return max(self._retention.values(), default=DEFAULT_ARCHIVE_RETENTION)
+
+    @callback
+    def set_retention(self, owner: Any, months: int | None) -> None:
+        """Record an entry's readings for the given months, or stop if None."""
+        if months is None:
+            self._retention.pop(owner, None)
+        else:
+            self._retention[owner] = months
+
+    def newest(self, key: tuple[str, str]) -> float | None:
+        """Return the newest timestamp archived for a series since startup."""
+        return self._last.get(key)
+
+    def pending_rows(self) -> list[Row]:
+        """Return a copy of the readings not yet written, for readers."""
+        return list(self._pending)
+
+    def partitions(self) -> list[str]:
+        """Return the YYYY-MM partitions on disk, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name[: -len(".csv.gz")]
+            for name in names
+            if name.endswith(".csv.gz") and len(name) == len("YYYY-MM.csv.gz")
+        )
+
+    async def async_record(
+        self, hass: HomeAssistant, data: dict[str, Any], keys: set[tuple[str, str]]
+    ) -> None:
+        """Buffer the given readings of a snapshot if they are new.
+
+        The buffer is written once it is old or large enough; write errors
+        are logged rather than failing the update cycle.
+        """
+        for key in keys:
+            station_id, sensor_type = key
+            reading = data[station_id]["sensors"][sensor_type]
+            value = reading.get("raw_value", reading.get("value"))
+            timestamp = reading.get("datetime")
+            if value is None or not timestamp:
+                continue
+            parsed = dt_util.parse_datetime(timestamp)
+            if parsed is None:
+                continue
+            epoch = parsed.timestamp()
+            if epoch <= self._last.get(key, float("-inf")):
+                continue
+            self._last[key] = epoch
+            self._pending.append((int(epoch), station_id, sensor_type, float(value)))
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        if (
+            len(self._pending) >= ARCHIVE_FLUSH_ROWS
+            or now - self._pending_since >= ARCHIVE_FLUSH_INTERVAL
+        ):
+            await self.async_flush(hass)
+
+    async def async_flush(self, hass: HomeAssistant) -> None:
+        """Write the buffered readings in the executor."""
+        if not self._pending:
+            return
+        rows, self._pending, self._pending_since = self._pending, [], None
+        async with self._lock:
+            try:
+                await hass.async_add_executor_job(
+                    self._write, rows, self.retention_months
+                )
+            except OSError as err:
+                _LOGGER.warning("Could not append to reading archive: %s", err)
+
+    def _write(self, rows: list[Row], retention_months: int) -> None:
+        """Append one gzip member per month and station, index them, and prune."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        months: dict[str, dict[str, list[Row]]] = {}
+        # A cycle's readings mostly share a timestamp.
+        month_keys: dict[int, str] = {}
+        for row in rows:
+            if (month := month_keys.get(row[0])) is None:
+                month = month_keys[row[0]] = _month_key(row[0])
+            months.setdefault(month, {}).setdefault(row[1], []).append(row)
+        for month, stations in months.items():
+            index_lines: list[str] = []
+            with self._partition(month).open("ab") as file:
+                offset = file.seek(0, os.SEEK_END)
+                for station_id in sorted(stations):
+                    text = "".join(
+                        f"{epoch},{station_id},{sensor_type},{value}\n"
+                        for epoch, _, sensor_type, value in sorted(
+                            stations[station_id]
+                        )
+                    )
+                    member = gzip.compress(
+                        text.encode(), compresslevel=ARCHIVE_COMPRESSLEVEL, mtime=0
+                    )
+                    file.write(member)
+                    index_lines.append(f"{station_id},{offset},{len(member)}\n")
+                    offset += len(member)
+            # Written after the data: an index line never points at a member
+            # that is not complete on disk.
+            with self._index(month).open("a", encoding="utf-8") as file:
+                file.writelines(index_lines)
+
+        current = _month_key(dt_util.utcnow().timestamp())
+        if current == self._pruned_month:
+            return
+        self._pruned_month = current
+        oldest = _month_index(current) - retention_months + 1
+        for month in self.partitions():
+            if _month_index(month) < oldest:
+                self._partition(month).unlink(missing_ok=True)
+                self._index(month).unlink(missing_ok=True)
+
+    def _regions(
+        self, month: str, station_refs: set[str], size: int
+    ) -> list[tuple[int, int]]:
+        """Return the (start, end) byte ranges to read for these stations.
+
+        These are the stations' indexed members plus every range the index
+        does not cover: members of a flush cut short before its index lines
+        (possibly followed by later, indexed flushes), a prefix written
+        before the index existed, and the tail. Ranges are in file order, so
+        rows come out in the order they were written.
+        """
+        members: list[tuple[int, int, bool]] = []
+        try:
+            with self._index(month).open(encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    fields = line.rstrip("\n").split(",")
+                    if len(fields) != 3:
+                        continue
+                    try:
+                        offset, length = int(fields[1]), int(fields[2])
+                    except ValueError:
+                        continue
+                    if 0 <= offset and length > 0 and offset + length <= size:
+                        members.append(
+                            (offset, offset + length, fields[0] in station_refs)
+                        )
+        except FileNotFoundError:
+            pass
+        regions: list[tuple[int, int]] = []
+        covered = 0
+        for start, end, wanted in sorted(members):
+            if start > covered:
+                regions.append((covered, start))
+            if wanted:
+                regions.append((start, end))
+            covered = max(covered, end)
+        if covered < size:
+            regions.append((covered, size))
+        return regions
+
+    def _month_rows(self, month: str, station_refs: set[str] | None) -> Iterator[Row]:
+        """Yield a month's rows, of the given stations only if not None."""
+        with self._partition(month).open("rb") as file:
+            size = file.seek(0, os.SEEK_END)
+            if station_refs is None:
+                regions = [(0, size)]
+            else:
+                regions = self._regions(month, station_refs, size)
+            for start, end in regions:
+                for row in _parse_rows(_member_lines(file, start, end, month)):
+                    if station_refs is None or row[1] in station_refs:
+                        yield row
+
+    def iter_rows(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        station_refs: set[str] | None,
+        pending: list[Row] | None = None,
+    ) -> Iterator[Row]:
+        """Yield archived (epoch, station_ref, sensor_type, value) rows.
+
+        Only the partitions overlapping [start, end], and with station_refs
+        only those stations' members and whatever the index does not cover,
+        are read; pending (from pending_rows) adds the readings not written
+        yet. Rows repeated across restarts are skipped (per series,
+        timestamps only move on), malformed rows are skipped on their own and
+        a damaged member is skipped up to the next one.
+        """
+        start_epoch = start.timestamp() if start else float("-inf")
+        end_epoch = end.timestamp() if end else float("inf")
+        first = _month_index(_month_key(start_epoch)) if start else None
+        last = _month_index(_month_key(end_epoch)) if end else None
+        seen: dict[tuple[str, str], int] = {}
+
+        def _select(rows: Iterable[Row]) -> Iterator[Row]:
+            for row in rows:
+                epoch, station_id, sensor_type, _ = row
+                if station_refs is not None and station_id not in station_refs:
+                    continue
+                if not start_epoch <= epoch <= end_epoch:
+                    continue
+                key = (station_id, sensor_type)
+                if epoch <= seen.get(key, -1):
+                    continue
+                seen[key] = epoch
+                yield row
+
+        for month in self.partitions():
+            index = _month_index(month)
+            if (first is not None and index < first) or (
+                last is not None and index > last
+            ):
+                continue
+            try:
+                yield from _select(self._month_rows(month, station_refs))
+            except OSError as err:
+                _LOGGER.warning("Could not read archive %s: %s", month, err)
+        if pending:
+            yield from _select(pending)
+
+    def export(
+        self,
+        path: Path,
+        export_format: str,
+        start: datetime | None,
+        end: datetime | None,
+        station_refs: set[str] | None,
+        stations: dict[str, tuple[str, str | None, Any]],
+        pending: list[Row] | None = None,
+    ) -> int:
+        """Stream matching rows into a CSV or Parquet file; returns the count.
+
+        stations maps refs to their (name, river, region) columns, built on
+        the event loop (unknown refs get their ref as name); pending are the
+        readings not written yet (see iter_rows). Runs in the executor. The
+        file is written next to its final path and renamed once complete.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.tmp")
+
+        def records() -> Iterator[tuple[Any, ...]]:
+            for epoch, station_id, sensor_type, value in self.iter_rows(
+                start, end, station_refs, pending
+            ):
+                info = stations.get(station_id) or (station_id, None, None)
+                yield (
+                    datetime.fromtimestamp(epoch, timezone.utc),
+                    station_id,
+                    *info,
+                    sensor_type,
+                    value,
+                )
+
+        try:
+            if export_format == EXPORT_FORMAT_PARQUET:
+                count = _write_parquet(temp, records())
+            else:
+                count = _write_csv(temp, records())
+            os.replace(temp, path)
+        finally:
+            temp.unlink(missing_ok=True)
+        return count
+
+
+def _write_csv(path: Path, records: Iterator[tuple[Any, ...]]) -> int:
+    """Write records as CSV with ISO 8601 UTC times."""
+    count = 0
+    with path.open("w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_COLUMNS)
+        for time, *rest in records:
+            writer.writerow((time.isoformat(), *rest))
+            count += 1
+    return count
+
+
+def _write_parquet(path: Path, records: Iterator[tuple[Any, ...]]) -> int:
+    """Write records as Parquet, one row group per PARQUET_ROW_GROUP rows.
+
+    pyarrow is optional and only imported here.
+    """
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+        from pyarrow import parquet as pq  # noqa: PLC0415
+    except ImportError as err:
+        raise HomeAssistantError(
+            "Parquet export needs the pyarrow package; export as CSV instead"
+        ) from err
+
+    schema = pa.schema(
+        [
+            ("time", pa.timestamp("s", tz="UTC")),
+            ("station_ref", pa.string()),
+            ("station_name", pa.string()),
+            ("river", pa.string()),
+            ("region", pa.string()),
+            ("sensor_type", pa.string()),
+            ("value", pa.float64()),
+        ]
+    )
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        columns: list[list[Any]] = [[] for _ in EXPORT_COLUMNS]
+        for record in records:
+            for column, item in zip(columns, record):
+                column.append(item)
+            if len(columns[0]) >= PARQUET_ROW_GROUP:
+                count += _flush_parquet(pa, writer, schema, columns)
+        count += _flush_parquet(pa, writer, schema, columns)
+    return count
+
+
+def _flush_parquet(pa: Any, writer: Any, schema: Any, columns: list[list[Any]]) -> int:
+    """Write the buffered columns as a row group and clear them."""
+    rows = len(columns[0])
+    if rows:
+        region = EXPORT_COLUMNS.index("region")
+        columns[region] = [None if r is None else str(r) for r in columns[region]]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        for column in columns:
+            column.clear()
+    return rows
@@ -39,7 +39,7 @@ class WaterLevelAPIStatusSensor(
     def __init__(self, coordinator: WaterLevelDataCoordinator) -> None:
         """Initialize the API status sensor."""
         super().__init__(coordinator)
-        self._attr_unique_id = f"{DOMAIN}_api_status"
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}{DOMAIN}_api_status"
         self._attr_name = "API Status"
 
     @property
@@ -67,6 +67,16 @@ class WaterLevelAPIStatusSensor(
         if self.coordinator.consecutive_failures > 0:
             attrs["consecutive_failures"] = self.coordinator.consecutive_failures
 
+        # Bytes moved per update cycle, to check transfer/storage savings.
+        if self.coordinator.content_encoding:
+            attrs["bytes_on_wire"] = self.coordinator.bytes_on_wire
+            attrs["bytes_decoded"] = self.coordinator.bytes_decoded
+            attrs["content_encoding"] = self.coordinator.content_encoding
+        if self.coordinator.fetch_source:
+            attrs["fetch_source"] = self.coordinator.fetch_source
+        attrs["cache_bytes_written"] = self.coordinator.cache_bytes_written
+        attrs["cache_bytes_on_disk"] = self.coordinator.cache_bytes_on_disk
+
         return attrs
 
     @property
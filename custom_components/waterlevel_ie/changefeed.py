@@ -0,0 +1,197 @@
+"""Per-cycle change feed for WaterLevel.ie.
+
+Once per update cycle the coordinator publishes the readings that changed
+(and those that left the feed). A single waterlevel_ie_readings_updated
+event summarises them - station refs, rivers and counts - so automations can
+react to "any new reading on river X" without a state trigger per entity,
+while the recorder stores a few hundred bytes per cycle rather than every
+reading.
+
+The readings themselves go to subscribers that register filters on station
+refs, rivers, regions and sensor types (WebSocket clients, other
+integrations). Filters are kept in inverted indexes - value -> subscriptions,
+plus the subscriptions that leave a dimension unfiltered - so matching a
+reading costs a few set lookups per dimension rather than a scan of every
+filter.
+
+Entries tracking the same station publish the same readings; each reading is
+passed on once, by the first entry to publish it, keyed by station, sensor,
+timestamp and published value and quality. A reading whose value changes
+without a new timestamp (e.g. after a reading-filter mode change) is passed
+on again.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_CHANGE_FEED, EVENT_READINGS_UPDATED
+
+# Reading fields a subscription can filter on.
+FILTER_FIELDS = ("station_ref", "river", "region", "sensor_type")
+
+ChangeCallback = Callable[[list[dict[str, Any]], list[dict[str, Any]]], None]
+
+# Stand-in stamp of a reading reported as removed.
+_REMOVED = object()
+
+
+@callback
+def async_get_change_feed(hass: HomeAssistant) -> ChangeFeed:
+    """Return the change feed shared by all entries, creating it if needed.
+
+    The feed lives outside the coordinator so subscriptions survive an entry
+    reload (e.g. after an options change).
+    """
+    feed: ChangeFeed | None = hass.data.get(DATA_CHANGE_FEED)
+    if feed is None:
+        feed = hass.data[DATA_CHANGE_FEED] = ChangeFeed(hass)
+    return feed
+
+
+class ChangeFeed:
+    """Fan out each cycle's changed readings to the bus and to subscribers."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize with no subscriptions."""
+        self.hass = hass
+        self._callbacks: dict[int, ChangeCallback] = {}
+        self._next_id = 0
+        # field -> filter value -> ids of subscriptions accepting that value
+        self._index: dict[str, dict[str, set[int]]] = {f: {} for f in FILTER_FIELDS}
+        # field -> ids of subscriptions that do not filter on the field
+        self._unfiltered: dict[str, set[int]] = {f: set() for f in FILTER_FIELDS}
+        # (station_ref, sensor_type) -> (timestamp, value, quality) last passed
+        # on (or _REMOVED)
+        self._reported: dict[tuple[str, str], Any] = {}
+
+    def __len__(self) -> int:
+        """Return the number of subscriptions."""
+        return len(self._callbacks)
+
+    @callback
+    def async_subscribe(
+        self,
+        change_callback: ChangeCallback,
+        *,
+        station_refs: Iterable[str] | None = None,
+        rivers: Iterable[str] | None = None,
+        regions: Iterable[Any] | None = None,
+        sensor_types: Iterable[str] | None = None,
+    ) -> Callable[[], None]:
+        """Subscribe to changed readings matching every given filter.
+
+        A filter left as None (or empty) matches any value. The callback gets
+        (changed, removed) lists of reading dicts once per cycle, only when
+        at least one of them is non-empty. Returns an unsubscribe callable.
+        """
+        sub_id = self._next_id
+        self._next_id += 1
+        self._callbacks[sub_id] = change_callback
+        filters = dict(
+            zip(FILTER_FIELDS, (station_refs, rivers, regions, sensor_types))
+        )
+        keys: dict[str, set[str]] = {}
+        for field, values in filters.items():
+            wanted = {str(v) for v in values} if values else set()
+            keys[field] = wanted
+            if not wanted:
+                self._unfiltered[field].add(sub_id)
+            for value in wanted:
+                self._index[field].setdefault(value, set()).add(sub_id)
+
+        @callback
+        def unsubscribe() -> None:
+            if self._callbacks.pop(sub_id, None) is None:
+                return
+            for field, wanted in keys.items():
+                self._unfiltered[field].discard(sub_id)
+                index = self._index[field]
+                for value in wanted:
+                    ids = index.get(value)
+                    if ids is not None:
+                        ids.discard(sub_id)
+                        if not ids:
+                            del index[value]
+
+        return unsubscribe
+
+    def match(self, reading: dict[str, Any]) -> set[int]:
+        """Return the ids of subscriptions whose filters accept a reading."""
+        matches: set[int] | None = None
+        for field in FILTER_FIELDS:
+            value = reading.get(field)
+            found = self._unfiltered[field]
+            indexed = self._index[field].get(str(value)) if value is not None else None
+            if indexed:
+                found = found | indexed
+            matches = found if matches is None else matches & found
+            if not matches:
+                return set()
+        return set(matches) if matches else set()
+
+    def _unreported(
+        self, readings: list[dict[str, Any]], removed: bool
+    ) -> list[dict[str, Any]]:
+        """Return the readings not already passed on, and mark them passed on."""
+        fresh: list[dict[str, Any]] = []
+        for reading in readings:
+            key = (reading["station_ref"], reading["sensor_type"])
+            stamp = (
+                _REMOVED
+                if removed
+                else (
+                    reading.get("datetime"),
+                    reading.get("value"),
+                    reading.get("quality"),
+                )
+            )
+            if key in self._reported and self._reported[key] == stamp:
+                continue
+            self._reported[key] = stamp
+            fresh.append(reading)
+        return fresh
+
+    @callback
+    def async_publish(
+        self,
+        changed: list[dict[str, Any]],
+        removed: list[dict[str, Any]],
+        entry_id: str | None = None,
+    ) -> None:
+        """Fire the summary bus event and deliver each subscriber's slice.
+
+        Each config entry publishes the changes in its own station selection;
+        entry_id identifies the entry that first published them in the bus
+        event. Readings another entry already published are left out.
+        """
+        changed = self._unreported(changed, False)
+        removed = self._unreported(removed, True)
+        if not changed and not removed:
+            return
+        self.hass.bus.async_fire(
+            EVENT_READINGS_UPDATED,
+            {
+                "entry_id": entry_id,
+                "station_refs": sorted({r["station_ref"] for r in changed}),
+                "removed_station_refs": sorted({r["station_ref"] for r in removed}),
+                "rivers": sorted(
+                    {r["river"] for r in (*changed, *removed) if r.get("river")}
+                ),
+                "changed": len(changed),
+                "removed": len(removed),
+            },
+        )
+        if not self._callbacks:
+            return
+        slices: dict[int, tuple[list[dict[str, Any]], list[dict[str, Any]]]] = {}
+        for position, readings in enumerate((changed, removed)):
+            for reading in readings:
+                for sub_id in self.match(reading):
+                    slices.setdefault(sub_id, ([], []))[position].append(reading)
+        for sub_id, (sub_changed, sub_removed) in slices.items():
+            # A callback may unsubscribe others while we deliver.
+            if (change_callback := self._callbacks.get(sub_id)) is not None:
+                change_callback(sub_changed, sub_removed)
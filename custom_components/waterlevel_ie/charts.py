@@ -0,0 +1,256 @@
+"""Downsampled reading series for dashboard charts.
+
+History graphs of many gauges otherwise pull every recorder state of every
+entity into the browser. The waterlevel_ie/chart_series WebSocket command
+instead returns one chart-ready series per (station, sensor), reduced on the
+server to the requested number of points with Largest-Triangle-Three-Buckets
+(LTTB), which keeps peaks, troughs and the overall shape of a level curve.
+
+Series come from an entry's in-memory history when it covers the whole range
+(the last few days of tracked stations) and otherwise from the on-disk
+archive, which is read once per request for every series it has to supply.
+Results are kept in a ChartCache keyed by (station, sensor, range, points)
+and dropped when the series receives a new reading, after CHART_CACHE_TTL,
+or least recently used first once CHART_CACHE_POINTS are held.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .archive import ReadingArchive, async_get_archive
+from .const import DATA_CHART_CACHE, DOMAIN
+
+# Points held by the cache across all series (16 bytes of floats each plus
+# list overhead, so a few MB at most).
+CHART_CACHE_POINTS = 200_000
+
+# Seconds a cached series is served before being rebuilt, so a relative
+# range ("last 24 hours") keeps moving even for a station that went quiet.
+CHART_CACHE_TTL = 15 * 60
+
+SOURCE_HISTORY = "history"
+SOURCE_ARCHIVE = "archive"
+
+Point = tuple[float, float]
+
+
+def lttb(points: list[Point], threshold: int) -> list[Point]:
+    """Downsample time-ordered points to at most threshold of them (LTTB).
+
+    The first and last points are kept; from each bucket in between the
+    point forming the largest triangle with the previously chosen point and
+    the average of the next bucket is kept.
+    """
+    size = len(points)
+    if threshold >= size or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (size - 2) / (threshold - 2)
+    chosen = 0
+    for bucket in range(threshold - 2):
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, size)
+        count = next_end - next_start
+        avg_x = sum(point[0] for point in points[next_start:next_end]) / count
+        avg_y = sum(point[1] for point in points[next_start:next_end]) / count
+
+        chosen_x, chosen_y = points[chosen]
+        best_area = -1.0
+        best = start = int(bucket * every) + 1
+        for index in range(start, next_start):
+            x, y = points[index]
+            area = abs(
+                (chosen_x - avg_x) * (y - chosen_y)
+                - (chosen_x - x) * (avg_y - chosen_y)
+            )
+            if area > best_area:
+                best_area = area
+                best = index
+        sampled.append(points[best])
+        chosen = best
+    sampled.append(points[-1])
+    return sampled
+
+
+@callback
+def async_get_chart_cache(hass: HomeAssistant) -> ChartCache:
+    """Return the chart cache shared by all connections, creating it if needed."""
+    cache: ChartCache | None = hass.data.get(DATA_CHART_CACHE)
+    if cache is None:
+        cache = hass.data[DATA_CHART_CACHE] = ChartCache()
+    return cache
+
+
+class ChartCache:
+    """LRU cache of downsampled series, bounded by the points it holds."""
+
+    def __init__(self, max_points: int = CHART_CACHE_POINTS) -> None:
+        """Initialize an empty cache."""
+        self._max_points = max_points
+        # key -> (generation, created (monotonic), source, points)
+        self._entries: OrderedDict[
+            Hashable, tuple[float | None, float, str, list[Point]]
+        ] = OrderedDict()
+        self._points = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached series."""
+        return len(self._entries)
+
+    def get(
+        self, key: Hashable, generation: float | None
+    ) -> tuple[str, list[Point]] | None:
+        """Return (source, points) if cached for this generation and fresh."""
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry[0] != generation
+            or time.monotonic() - entry[1] > CHART_CACHE_TTL
+        ):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2], entry[3]
+
+    def put(
+        self, key: Hashable, generation: float | None, source: str, points: list[Point]
+    ) -> None:
+        """Cache a series, evicting the least recently used ones beyond the bound."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._points -= len(old[3])
+        if len(points) > self._max_points:
+            return
+        self._entries[key] = (generation, time.monotonic(), source, points)
+        self._points += len(points)
+        while self._points > self._max_points:
+            _, evicted = self._entries.popitem(last=False)
+            self._points -= len(evicted[3])
+
+
+def _history_points(
+    hass: HomeAssistant, key: tuple[str, str], start: float, end: float
+) -> list[Point] | None:
+    """Return a series from an entry's history if it covers the whole range."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        first = coordinator.history.first(key)
+        if first is not None and first[0] <= start:
+            return [
+                point
+                for point in coordinator.history.since(key, start)
+                if point[0] <= end
+            ]
+    return None
+
+
+def _newest(
+    hass: HomeAssistant, archive: ReadingArchive, key: tuple[str, str]
+) -> float | None:
+    """Return the newest reading time of a series, in any history or archive.
+
+    This is the generation of the series' cached charts, whichever source
+    they were built from: it moves with every new reading, archive or not.
+    """
+    newest = archive.newest(key)
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        last = coordinator.history.last(key)
+        if last is not None and (newest is None or last[0] > newest):
+            newest = last[0]
+    return newest
+
+
+def _archive_points(
+    archive: ReadingArchive,
+    keys: list[tuple[str, str]],
+    start: datetime,
+    end: datetime,
+    threshold: int,
+    pending: list[tuple[int, str, str, float]],
+) -> dict[tuple[str, str], list[Point]]:
+    """Read and downsample several series in one pass over the archive.
+
+    Runs in the executor; pending are the archive's unwritten readings.
+    """
+    wanted = set(keys)
+    series: dict[tuple[str, str], list[Point]] = {key: [] for key in keys}
+    for epoch, station_id, sensor_type, value in archive.iter_rows(
+        start, end, {station_id for station_id, _ in keys}, pending
+    ):
+        key = (station_id, sensor_type)
+        if key in wanted:
+            series[key].append((epoch, value))
+    return {key: lttb(points, threshold) for key, points in series.items()}
+
+
+async def async_chart_series(
+    hass: HomeAssistant,
+    keys: list[tuple[str, str]],
+    start: datetime,
+    end: datetime,
+    points: int,
+    range_key: Hashable,
+) -> list[dict[str, Any]]:
+    """Return the downsampled series of (station, sensor) keys over a range.
+
+    range_key identifies the requested range in the cache: the relative
+    window for "last N hours" requests, the absolute bounds otherwise.
+    """
+    archive = async_get_archive(hass)
+    cache = async_get_chart_cache(hass)
+    start_epoch = start.timestamp()
+    end_epoch = end.timestamp()
+
+    results: dict[tuple[str, str], tuple[str, list[Point]]] = {}
+    generations: dict[tuple[str, str], float | None] = {}
+    from_archive: list[tuple[str, str]] = []
+    for key in keys:
+        # A new reading for the series invalidates its cached charts.
+        generation = generations[key] = _newest(hass, archive, key)
+        if (cached := cache.get((*key, range_key, points), generation)) is not None:
+            results[key] = cached
+            continue
+        samples = _history_points(hass, key, start_epoch, end_epoch)
+        if samples is None:
+            from_archive.append(key)
+            continue
+        results[key] = (SOURCE_HISTORY, lttb(samples, points))
+        cache.put((*key, range_key, points), generation, *results[key])
+
+    if from_archive:
+        archived = await hass.async_add_executor_job(
+            _archive_points,
+            archive,
+            from_archive,
+            start,
+            end,
+            points,
+            archive.pending_rows(),
+        )
+        for key, series in archived.items():
+            results[key] = (SOURCE_ARCHIVE, series)
+            cache.put(
+                (*key, range_key, points), generations[key], SOURCE_ARCHIVE, series
+            )
+
+    return [
+        {
+            "station_ref": station_id,
+            "sensor_type": sensor_type,
+            "source": results[(station_id, sensor_type)][0],
+            "points": [
+                [int(epoch), value]
+                for epoch, value in results[(station_id, sensor_type)][1]
+            ],
+        }
+        for station_id, sensor_type in keys
+    ]
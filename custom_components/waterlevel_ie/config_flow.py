@@ -2,7 +2,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
+import uuid
 
 import voluptuous as vol
 
@@ -13,27 +14,56 @@ from homeassistant.helpers import selector
 
 from .const import (
     CONF_ACK_OPW_TERMS,
+    CONF_ARCHIVE,
+    CONF_ARCHIVE_RETENTION,
+    CONF_LEAD_TIME_STATIONS,
+    CONF_METRICS,
+    CONF_PAUSE_DORMANT,
+    CONF_PER_STATION_FETCH,
+    CONF_READING_FILTER,
+    CONF_RECORDER_FOOTPRINT,
     CONF_RIVERS,
+    CONF_STATION_SEARCH,
     CONF_STATIONS,
+    CONF_UNIQUE_ID_PREFIX,
     CONF_UPDATE_INTERVAL,
+    DEFAULT_ARCHIVE,
+    DEFAULT_ARCHIVE_RETENTION,
+    DEFAULT_LEAD_TIME_STATIONS,
+    DEFAULT_METRICS,
+    DEFAULT_PAUSE_DORMANT,
+    DEFAULT_PER_STATION_FETCH,
+    DEFAULT_READING_FILTER,
+    DEFAULT_RECORDER_FOOTPRINT,
     DEFAULT_RIVERS,
     DEFAULT_STATIONS,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    MAX_ARCHIVE_RETENTION,
     MIN_UPDATE_INTERVAL,
+    READING_FILTER_MODES,
 )
-from .coordinator import _normalise_name
-from . import rivers as rivers_mod
+from .stations import normalise_name
+
+if TYPE_CHECKING:
+    # Home Assistant imports this module on every entry setup; the picker
+    # itself is only built (by the hub) when the options dialog opens.
+    from .picker import StationPicker
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _coerce_selection(raw: Any, available: dict[str, str]) -> list[str]:
+def _coerce_selection(
+    raw: Any,
+    available: dict[str, str],
+    name_to_refs: dict[str, list[str]] | None = None,
+) -> list[str]:
     """Return the current selection as a list of station refs.
 
     Accepts either the new format (a list of refs) or the legacy format (a
     newline-separated string of station names), mapping legacy names to refs
-    using the available-station index where possible.
+    using the available-station index where possible. A prebuilt name -> refs
+    map (see StationPicker) can be passed to avoid rebuilding it.
     """
     if isinstance(raw, list):
         # Keep only refs we still know about; if we have no index, keep as-is.
@@ -41,12 +71,13 @@ def _coerce_selection(raw: Any, available: dict[str, str]) -> list[str]:
     if isinstance(raw, str) and raw.strip():
         # A station name can be shared by more than one station, so map each
         # name to every matching ref rather than a single one.
-        name_to_refs: dict[str, list[str]] = {}
-        for ref, name in available.items():
-            name_to_refs.setdefault(_normalise_name(name), []).append(ref)
+        if name_to_refs is None:
+            name_to_refs = {}
+            for ref, name in available.items():
+                name_to_refs.setdefault(normalise_name(name), []).append(ref)
         refs: list[str] = []
         for line in raw.splitlines():
-            normalised = _normalise_name(line)
+            normalised = normalise_name(line)
             if not normalised:
                 continue
             matches = name_to_refs.get(normalised, [])
@@ -106,10 +137,20 @@ class WaterLevelConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 # require the installer to acknowledge this before proceeding.
                 errors["base"] = "opw_terms_not_acknowledged"
             else:
+                # Entries share one feed fetch, but each tracks its own
+                # stations. The first entry keeps the original entity unique
+                # IDs; later ones get a prefix so the same station can be
+                # tracked by more than one entry.
+                existing = len(self._async_current_entries(include_ignore=False))
+                data: dict[str, Any] = {}
+                title = "WaterLevel.ie"
+                if existing:
+                    data[CONF_UNIQUE_ID_PREFIX] = f"{uuid.uuid4().hex[:8]}_"
+                    title = f"WaterLevel.ie ({existing + 1})"
                 # Store the update interval in options (not data)
                 return self.async_create_entry(
-                    title="WaterLevel.ie",
-                    data={},
+                    title=title,
+                    data=data,
                     options={
                         CONF_UPDATE_INTERVAL: user_input[CONF_UPDATE_INTERVAL]
                     },
@@ -150,31 +191,47 @@ class WaterLevelConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         config_entry: config_entries.ConfigEntry,
     ) -> WaterLevelOptionsFlowHandler:
         """Get the options flow for this handler."""
-        return WaterLevelOptionsFlowHandler()
+        return WaterLevelOptionsFlowHandler(config_entry)
 
 
 class WaterLevelOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle options flow for WaterLevel.ie integration."""
 
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        # Home Assistant only sets OptionsFlow.config_entry itself from
+        # 2024.11, so keep our own reference for older releases.
+        self._entry = config_entry
+        # Values submitted alongside a station search, re-shown as defaults on
+        # the filtered form, and the search that produced that form.
+        self._draft: dict[str, Any] | None = None
+        self._search = ""
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Manage the options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            search = str(user_input.pop(CONF_STATION_SEARCH, "") or "").strip()
+            if search == self._search:
+                return self.async_create_entry(title="", data=user_input)
+            # A new (or cleared) search: re-show the form filtered to it,
+            # keeping everything else the user has entered so far.
+            self._draft = user_input
+            self._search = search
+
+        current = self._draft if self._draft is not None else self._entry.options
 
         # Get current values or use defaults
-        current_interval = self.config_entry.options.get(
-            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
-        )
-        current_raw = self.config_entry.options.get(CONF_STATIONS, DEFAULT_STATIONS)
+        current_interval = current.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        current_raw = current.get(CONF_STATIONS, DEFAULT_STATIONS)
 
-        # Fetch the list of available stations (ref -> name) from the running
-        # coordinator so we can present a searchable picker.
-        available: dict[str, str] = {}
-        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        # The running coordinator keeps a prebuilt picker (sorted options, river
+        # list and search index) that only changes with the station list.
+        picker: StationPicker | None = None
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
         if coordinator is not None:
-            available = await coordinator.async_available_stations()
+            picker = await coordinator.async_station_picker()
 
         schema: dict[Any, Any] = {
             vol.Required(
@@ -188,23 +245,63 @@ class WaterLevelOptionsFlowHandler(config_entries.OptionsFlow):
                     mode=selector.NumberSelectorMode.BOX,
                 ),
             ),
+            vol.Optional(
+                CONF_READING_FILTER,
+                default=current.get(CONF_READING_FILTER, DEFAULT_READING_FILTER),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=READING_FILTER_MODES,
+                    mode=selector.SelectSelectorMode.LIST,
+                    translation_key=CONF_READING_FILTER,
+                )
+            ),
+            vol.Optional(
+                CONF_RECORDER_FOOTPRINT,
+                default=current.get(
+                    CONF_RECORDER_FOOTPRINT, DEFAULT_RECORDER_FOOTPRINT
+                ),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_PAUSE_DORMANT,
+                default=current.get(CONF_PAUSE_DORMANT, DEFAULT_PAUSE_DORMANT),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_PER_STATION_FETCH,
+                default=current.get(
+                    CONF_PER_STATION_FETCH, DEFAULT_PER_STATION_FETCH
+                ),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_METRICS,
+                default=current.get(CONF_METRICS, DEFAULT_METRICS),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_ARCHIVE,
+                default=current.get(CONF_ARCHIVE, DEFAULT_ARCHIVE),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_ARCHIVE_RETENTION,
+                default=current.get(
+                    CONF_ARCHIVE_RETENTION, DEFAULT_ARCHIVE_RETENTION
+                ),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=1,
+                    max=MAX_ARCHIVE_RETENTION,
+                    step=1,
+                    unit_of_measurement="months",
+                    mode=selector.NumberSelectorMode.BOX,
+                ),
+            ),
         }
 
-        if available:
-            # Map of station ref -> river, for grouping/labelling.
-            river_map = await self.hass.async_add_executor_job(
-                rivers_mod.station_river_map
-            )
-
+        if picker is not None:
             # River-system selector: pick whole rivers to track all their gauges.
-            rivers_present = sorted(
-                {river_map[r] for r in available if r in river_map}, key=str.lower
-            )
-            if rivers_present:
+            if picker.rivers:
                 current_rivers = [
                     r
-                    for r in self.config_entry.options.get(CONF_RIVERS, DEFAULT_RIVERS)
-                    if r in rivers_present
+                    for r in current.get(CONF_RIVERS, DEFAULT_RIVERS)
+                    if r in picker.rivers
                 ]
                 schema[
                     vol.Optional(CONF_RIVERS, default=current_rivers)
@@ -212,7 +309,7 @@ class WaterLevelOptionsFlowHandler(config_entries.OptionsFlow):
                     selector.SelectSelectorConfig(
                         options=[
                             selector.SelectOptionDict(value=r, label=r)
-                            for r in rivers_present
+                            for r in picker.rivers
                         ],
                         multiple=True,
                         mode=selector.SelectSelectorMode.DROPDOWN,
@@ -220,24 +317,42 @@ class WaterLevelOptionsFlowHandler(config_entries.OptionsFlow):
                     )
                 )
 
-            # Station selector: one entry per station (all sensors tracked
-            # together), labelled "River — Station" and sorted by river so a
-            # system's gauges cluster together; unmatched stations sort last.
-            def _sort_key(item: tuple[str, str]) -> tuple[str, str]:
-                ref, name = item
-                river = river_map.get(ref)
-                return (river.lower() if river else "~", name.lower())
+            # Narrow the station lists by name, river, region or ref.
+            schema[
+                vol.Optional(CONF_STATION_SEARCH, default=self._search)
+            ] = selector.TextSelector()
 
-            options = []
-            for ref, name in sorted(available.items(), key=_sort_key):
-                river = river_map.get(ref)
-                label = f"{river} — {name}" if river else name
-                options.append(selector.SelectOptionDict(value=ref, label=label))
+            # Station selector: one entry per station (all sensors tracked
+            # together), labelled "River — Station" and sorted by river.
+            current_stations = _coerce_selection(
+                current_raw, picker.available, picker.name_to_refs
+            )
+            current_lead = [
+                r
+                for r in current.get(
+                    CONF_LEAD_TIME_STATIONS, DEFAULT_LEAD_TIME_STATIONS
+                )
+                if r in picker.available
+            ]
+            options = (
+                picker.filtered_options(self._search, current_stations + current_lead)
+                if self._search
+                else picker.options
+            )
             schema[
-                vol.Optional(
-                    CONF_STATIONS,
-                    default=_coerce_selection(current_raw, available),
+                vol.Optional(CONF_STATIONS, default=current_stations)
+            ] = selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=options,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                    custom_value=False,
                 )
+            )
+
+            # Stations to estimate upstream flood lead time for.
+            schema[
+                vol.Optional(CONF_LEAD_TIME_STATIONS, default=current_lead)
             ] = selector.SelectSelector(
                 selector.SelectSelectorConfig(
                     options=options,
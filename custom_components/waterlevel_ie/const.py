@@ -13,9 +13,27 @@ MIN_UPDATE_INTERVAL = 15  # minutes (OPW rate limit)
 CONF_STATIONS = "stations"
 DEFAULT_STATIONS = ""  # Empty = track all stations
 
+# Options-flow only: free-text search that narrows the station pickers by
+# name, river, region or ref. Never stored in the entry options.
+CONF_STATION_SEARCH = "station_search"
+
 CONF_RIVERS = "rivers"
 DEFAULT_RIVERS: list[str] = []  # Empty = no river-based selection
 
+# Stations to estimate upstream flood lead time for. Every gauge on the river
+# of a selected station is tracked too, so the upstream gauges have data.
+CONF_LEAD_TIME_STATIONS = "lead_time_stations"
+DEFAULT_LEAD_TIME_STATIONS: list[str] = []
+
+# Spike/outlier filtering of readings: "off", "flag" (keep the value, add a
+# quality attribute) or "suppress" (publish the last good value instead).
+CONF_READING_FILTER = "reading_filter"
+READING_FILTER_OFF = "off"
+READING_FILTER_FLAG = "flag"
+READING_FILTER_SUPPRESS = "suppress"
+READING_FILTER_MODES = [READING_FILTER_OFF, READING_FILTER_FLAG, READING_FILTER_SUPPRESS]
+DEFAULT_READING_FILTER = READING_FILTER_OFF
+
 # Setup acknowledgement: installer confirms they have read the OPW usage terms
 # and will notify OPW (waterlevel@opw.ie) of their intended usage as a courtesy.
 CONF_ACK_OPW_TERMS = "opw_terms_acknowledged"
@@ -23,8 +41,65 @@ CONF_ACK_OPW_TERMS = "opw_terms_acknowledged"
 # OPW contact for the courtesy usage notification (see https://waterlevel.ie/page/api/)
 OPW_CONTACT_EMAIL = "waterlevel@opw.ie"
 
+# Stop processing stations that have not reported for days (see
+# freshness.py): no delta comparison, aggregates or state writes until they
+# report again.
+CONF_PAUSE_DORMANT = "pause_dormant_stations"
+DEFAULT_PAUSE_DORMANT = False
+
+# Recorder footprint mode: near-constant sensor types (Ordnance Datum) become
+# attributes of the station's other sensors instead of entities, and static
+# attributes (location, region) are not recorded.
+CONF_RECORDER_FOOTPRINT = "recorder_footprint"
+DEFAULT_RECORDER_FOOTPRINT = False
+
+# Fetch only the tracked stations' per-sensor files (STATION_API_URL) when
+# the cost model finds that cheaper than the full feed (see sources.py).
+CONF_PER_STATION_FETCH = "per_station_fetch"
+DEFAULT_PER_STATION_FETCH = False
+
+# Change feed: one event per update cycle carrying only the changed readings.
+# The shared feed (and its subscriptions) is kept in hass.data under
+# DATA_CHANGE_FEED so it outlives entry reloads.
+EVENT_READINGS_UPDATED = f"{DOMAIN}_readings_updated"
+DATA_CHANGE_FEED = f"{DOMAIN}_change_feed"
+
+# Feed fetcher/parser shared by every config entry (see hub.py), kept in
+# hass.data under this key alongside the per-entry coordinators.
+DATA_HUB = f"{DOMAIN}_hub"
+
+# Optional OpenMetrics exporter at /api/waterlevel_ie/metrics, shared by
+# every entry that enables it (see metrics.py).
+CONF_METRICS = "prometheus_metrics"
+DEFAULT_METRICS = False
+DATA_METRICS = f"{DOMAIN}_metrics"
+
+# Month-partitioned on-disk archive of the readings seen by entries that
+# enable it, shared by all entries and read by the export service and chart
+# series (see archive.py). Whole months kept, the current one included.
+CONF_ARCHIVE = "reading_archive"
+DEFAULT_ARCHIVE = False
+CONF_ARCHIVE_RETENTION = "archive_retention_months"
+DEFAULT_ARCHIVE_RETENTION = 13
+MAX_ARCHIVE_RETENTION = 120
+DATA_ARCHIVE = f"{DOMAIN}_archive"
+# Service writing archived readings to a CSV or Parquet file (see services.py).
+SERVICE_EXPORT = "export"
+
+# Downsampled chart series served over the WebSocket API, cached across
+# connections (see charts.py).
+DATA_CHART_CACHE = f"{DOMAIN}_chart_cache"
+
+# Prefix for the unique IDs of an entry's entities. Empty for the first
+# entry (keeping existing IDs and history); additional entries get their own
+# so the same station can be tracked by several entries.
+CONF_UNIQUE_ID_PREFIX = "unique_id_prefix"
+
 # API
 API_URL = "https://waterlevel.ie/geojson/latest/"
+# One sensor's recent readings (time,value CSV), used instead of the full
+# feed when few stations are tracked.
+STATION_API_URL = "https://waterlevel.ie/data/day/{station}_{sensor}.csv"
 API_TIMEOUT = 30  # seconds (increased from 10 for resilience)
 
 # Retry configuration
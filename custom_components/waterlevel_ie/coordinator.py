@@ -4,49 +4,86 @@ from __future__ import annotations
 import asyncio
 from datetime import datetime, timedelta
 import logging
-from typing import Any
-
-import aiohttp
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.util import dt as dt_util
 
 from .const import (
-    API_TIMEOUT,
-    API_URL,
-    DATA_RETENTION_HOURS,
+    CONF_UNIQUE_ID_PREFIX,
+    DATA_METRICS,
+    DEFAULT_ARCHIVE,
+    DEFAULT_ARCHIVE_RETENTION,
+    DEFAULT_METRICS,
+    DEFAULT_PAUSE_DORMANT,
+    DEFAULT_PER_STATION_FETCH,
+    DEFAULT_READING_FILTER,
+    DEFAULT_RECORDER_FOOTPRINT,
     DEFAULT_UPDATE_INTERVAL,
-    DOMAIN,
-    MAX_RETRY_ATTEMPTS,
-    RETRY_BACKOFF_FACTOR,
-    STATION_REF_MAX,
-    STATION_REF_MIN,
+    READING_FILTER_OFF,
 )
-
-import re
-
-def _normalise_name(name: str) -> str:
-    """Lower-case and collapse whitespace for fuzzy station name matching."""
-    return re.sub(r"\s+", " ", name.strip().lower())
+from .aggregates import RiverAggregator
+from .archive import ReadingArchive, async_get_archive
+from .changefeed import async_get_change_feed
+from .freshness import FreshnessIndex
+from .history import ReadingHistory
+from .hub import FeedHub, async_get_hub
+from .propagation import DATUM_SENSOR, PropagationIndex, estimate_lags
+from .stations import StationRegistry, normalise_name as _normalise_name
+from . import rivers as rivers_mod
+
+# Optional stages and the options-flow picker are imported when first used,
+# so a default setup does not load them (see scripts/profile_startup.py).
+if TYPE_CHECKING:
+    from .metrics import EntryMetrics
+    from .picker import StationPicker
+    from .quality import ReadingFilter
 
 _LOGGER = logging.getLogger(__name__)
 
-# Storage version for cached data
-STORAGE_VERSION = 1
-STORAGE_KEY = f"{DOMAIN}.cache"
+
+def _change_record(
+    stations: StationRegistry,
+    data: dict[str, Any],
+    key: tuple[str, str],
+    with_reading: bool = True,
+) -> dict[str, Any]:
+    """Return the change-feed record for a (station_ref, sensor_ref) key."""
+    station_id, sensor_type = key
+    meta = stations.get(station_id)
+    record: dict[str, Any] = {
+        "station_ref": station_id,
+        "station_name": meta.name if meta else station_id,
+        "river": rivers_mod.river_for_ref(station_id),
+        "region": meta.region if meta else None,
+        "sensor_type": sensor_type,
+    }
+    if with_reading:
+        record.update(data[station_id]["sensors"][sensor_type])
+    return record
 
 
 class WaterLevelDataCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    """Class to manage fetching WaterLevel.ie data."""
+    """Class to manage one entry's view of the WaterLevel.ie data.
+
+    Fetching and parsing are shared by all entries through the FeedHub; each
+    coordinator projects its own station selection from the hub's snapshot
+    and keeps the per-entry derived state (deltas, aggregates, history).
+    """
 
     def __init__(
         self,
         hass: HomeAssistant,
         update_interval_minutes: int = DEFAULT_UPDATE_INTERVAL,
         station_filter: set[str] | None = None,
+        reading_filter: str = DEFAULT_READING_FILTER,
+        lead_time_stations: set[str] | None = None,
+        metrics: bool = DEFAULT_METRICS,
+        pause_dormant: bool = DEFAULT_PAUSE_DORMANT,
+        recorder_footprint: bool = DEFAULT_RECORDER_FOOTPRINT,
+        per_station_fetch: bool = DEFAULT_PER_STATION_FETCH,
+        archive: bool = DEFAULT_ARCHIVE,
+        archive_retention: int = DEFAULT_ARCHIVE_RETENTION,
     ) -> None:
         """Initialize the coordinator."""
         super().__init__(
@@ -55,301 +92,506 @@ class WaterLevelDataCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             name="WaterLevel.ie Data",
             update_interval=timedelta(minutes=update_interval_minutes),
         )
-        self._last_successful_update: datetime | None = None
-        self._last_good_data: dict[str, Any] | None = None
-        self._last_saved_data: dict[str, Any] | None = None
-        self._consecutive_failures = 0
-        self._api_available = True
-        # Stations to track. Entries may be station refs (preferred) or names;
-        # an empty filter means track all stations. We keep both the raw entries
-        # (for exact ref matching) and normalised forms (for fuzzy name matching).
-        self._station_filter: set[str] = set(station_filter) if station_filter else set()
-        self._station_filter_normalised: set[str] = {
+        # Feed fetcher, parser and cache shared by every entry.
+        self.hub: FeedHub = async_get_hub(hass)
+
+        # Entry options this coordinator was built from or last reconfigured
+        # with; lets the update listener tell which options changed.
+        self.applied_options: dict[str, Any] = {}
+
+        # Stations to track (see _set_station_filter), resolved to station
+        # refs against the hub's registry, and the registry version /
+        # snapshot the resolution was last applied to.
+        self._station_filter: set[str] = set()
+        self._station_filter_normalised: set[str] = set()
+        self._tracked_refs: set[str] = set()
+        self._tracked_version = -1
+        self._projected_from: dict[str, Any] | None = None
+        # Whether the hub may fetch just the tracked stations for this entry
+        # (registered as its demand once the selection is resolved).
+        self.per_station_fetch = per_station_fetch
+        self._set_station_filter(station_filter)
+        # Bumped whenever the options change the tracked selection, so the
+        # platforms know to look for entities to remove.
+        self.selection_version = 0
+
+        # Per-cycle delta against the previous snapshot, as (station_ref,
+        # sensor_ref) keys. Consumers use it to do work proportional to what
+        # changed rather than to the number of tracked stations. Added keys
+        # are also in changed_readings. delta_cycle counts the deltas, so a
+        # listener can tell a new cycle from a repeated notification, and
+        # fall back to a full comparison if it ever missed one.
+        self.changed_readings: set[tuple[str, str]] = set()
+        self.added_readings: set[tuple[str, str]] = set()
+        self.removed_readings: set[tuple[str, str]] = set()
+        self.delta_cycle = 0
+
+        # Per-river aggregates (max/min/mean level, alarms, latest gauge),
+        # maintained incrementally from the delta above.
+        self.river_aggregates = RiverAggregator()
+
+        # Newest reading time per station, to flag gauges that stopped
+        # reporting. With pause_dormant, long-dead stations skip the delta
+        # comparison, the aggregates and entity state writes until they
+        # report again.
+        self.freshness = FreshnessIndex()
+        self.pause_dormant = pause_dormant
+
+        # Fold near-constant sensor types into attributes and keep static
+        # attributes out of the recorder (applied by the sensor platform).
+        self.recorder_footprint = recorder_footprint
+
+        # Recent per-sensor history (fed from the delta) and the upstream ->
+        # downstream index used for lead-time estimates at selected stations.
+        self.history = ReadingHistory()
+        self.propagation = PropagationIndex(lead_time_stations)
+
+        # Long-term on-disk archive of new readings, read by the export
+        # service and chart series (shared across entries); this entry only
+        # records into it when the option is on.
+        self.archive: ReadingArchive = async_get_archive(hass)
+        self.archive_readings = False
+        self._set_archive(archive, archive_retention)
+
+        # Batched per-cycle event of the changed readings, plus filtered
+        # subscriptions (shared across entries and reloads).
+        self.change_feed = async_get_change_feed(hass)
+
+        # Optional spike/outlier filtering stage applied to this entry's
+        # projection of the shared snapshot.
+        self._reading_filter: ReadingFilter | None = None
+        self._set_reading_filter(reading_filter)
+
+        # Optional OpenMetrics exposition of this entry's readings, rendered
+        # once per cycle from the delta.
+        self._metrics: EntryMetrics | None = None
+        self._set_metrics(metrics)
+
+    def _set_station_filter(self, station_filter: set[str] | None) -> None:
+        """Set the stations to track.
+
+        Entries may be station refs (preferred) or names; an empty filter
+        means track all stations. We keep both the raw entries (for exact ref
+        matching) and normalised forms (for fuzzy name matching).
+        """
+        self._station_filter = set(station_filter) if station_filter else set()
+        self._station_filter_normalised = {
             _normalise_name(s) for s in self._station_filter
         }
         if self._station_filter:
             _LOGGER.debug("WaterLevel.ie: tracking %d station(s): %s", len(self._station_filter), self._station_filter)
+        self._tracked_version = -1
+        self._projected_from = None
+        # Needs the whole feed until the selection is resolved again.
+        self.hub.set_demand(self, None)
+
+    def _set_reading_filter(self, mode: str) -> None:
+        """Create, replace or drop the reading filter for a filter mode."""
+        current = self._reading_filter
+        if mode == (current.mode if current else READING_FILTER_OFF):
+            return
+        if mode == READING_FILTER_OFF:
+            self._reading_filter = None
+            return
+        from .quality import ReadingFilter  # noqa: PLC0415
+
+        self._reading_filter = ReadingFilter(mode)
+
+    def _set_archive(self, enabled: bool, retention_months: int) -> None:
+        """Record (or stop recording) this entry's readings in the archive."""
+        self.archive.set_retention(self, retention_months if enabled else None)
+        self.archive_readings = enabled
+
+    def _set_metrics(self, enabled: bool) -> None:
+        """Start or stop rendering this entry's metrics."""
+        if enabled and self._metrics is None:
+            from .metrics import EntryMetrics  # noqa: PLC0415
+
+            self._metrics = EntryMetrics(self._entry_id, rivers_mod.river_for_ref)
+        elif not enabled and self._metrics is not None:
+            self._metrics = None
+            if (exporter := self.hass.data.get(DATA_METRICS)) is not None:
+                exporter.async_remove(self._entry_id, self.hub)
 
-        # Index of all OPW-permitted stations seen in the feed (ref -> name),
-        # regardless of the active filter. Used to populate the options picker.
-        self.available_stations: dict[str, str] = {}
-
-        # Storage for persisting cached data across restarts
-        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+    @property
+    def _entry_id(self) -> str:
+        """Return the config entry ID ("" outside a config entry)."""
+        return self.config_entry.entry_id if self.config_entry else ""
 
-    async def async_load_cache(self) -> None:
-        """Load cached data from storage."""
-        try:
-            cached = await self._store.async_load()
-            if cached and isinstance(cached, dict):
-                # Check if we have valid cached data
-                if "data" in cached and "timestamp" in cached:
-                    timestamp_str = cached["timestamp"]
-                    cached_time = dt_util.parse_datetime(timestamp_str)
-
-                    if cached_time:
-                        age = dt_util.utcnow() - cached_time
-                        if age < timedelta(hours=DATA_RETENTION_HOURS):
-                            self._last_good_data = cached["data"]
-                            self._last_successful_update = cached_time
-                            _LOGGER.info(
-                                "Loaded cached data from %s ago (stored at %s)",
-                                age,
-                                timestamp_str,
-                            )
-                        else:
-                            _LOGGER.debug(
-                                "Cached data too old (%s), discarding",
-                                age,
-                            )
-        except Exception as err:
-            _LOGGER.warning("Failed to load cached data: %s", err)
-
-    async def async_save_cache(self) -> None:
-        """Save current data to storage."""
-        if self._last_good_data and self._last_successful_update:
-            # Skip the write if the data is unchanged since the last save to
-            # avoid needless disk I/O every update cycle.
-            if self._last_good_data == self._last_saved_data:
-                _LOGGER.debug("Cached data unchanged, skipping save")
-                return
-            try:
-                await self._store.async_save(
-                    {
-                        "data": self._last_good_data,
-                        "timestamp": self._last_successful_update.isoformat(),
-                    }
-                )
-                self._last_saved_data = self._last_good_data
-                _LOGGER.debug("Cached data saved to storage")
-            except Exception as err:
-                _LOGGER.warning("Failed to save cache: %s", err)
+    @property
+    def unique_id_prefix(self) -> str:
+        """Return the prefix for this entry's entity unique IDs."""
+        if self.config_entry is None:
+            return ""
+        return self.config_entry.data.get(CONF_UNIQUE_ID_PREFIX, "")
 
-    async def async_available_stations(self) -> dict[str, str]:
-        """Return {station_ref: name} of permitted stations for the picker.
+    @property
+    def stations(self) -> StationRegistry:
+        """Return the shared station metadata registry."""
+        return self.hub.stations
 
-        Uses the index built during normal updates; if it is empty (e.g. the
-        integration is currently running on cached data), fetch the feed once
-        to populate it. Never raises - returns an empty dict on failure.
-        """
-        if self.available_stations:
-            return self.available_stations
-        try:
-            session = async_get_clientsession(self.hass)
-            async with session.get(
-                API_URL, timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
-            ) as response:
-                response.raise_for_status()
-                geojson = await response.json()
-            # Side effect: _parse_data populates self.available_stations.
-            self._parse_data(geojson)
-        except Exception as err:  # noqa: BLE001 - best effort for the picker
-            _LOGGER.warning("Could not fetch station list for options flow: %s", err)
-        return self.available_stations
+    @property
+    def available_stations(self) -> dict[str, str]:
+        """Return {station_ref: name} of every permitted station in the feed."""
+        return self.hub.available_stations
 
     @property
     def api_available(self) -> bool:
         """Return whether the API is currently available."""
-        return self._api_available
+        return self.hub.api_available
 
     @property
     def last_successful_update(self) -> datetime | None:
         """Return the timestamp of the last successful update."""
-        return self._last_successful_update
+        return self.hub.last_successful_update
 
     @property
     def consecutive_failures(self) -> int:
         """Return the number of consecutive update failures."""
-        return self._consecutive_failures
+        return self.hub.consecutive_failures
+
+    @property
+    def bytes_on_wire(self) -> int:
+        """Return the compressed size of the last feed download."""
+        return self.hub.bytes_on_wire
+
+    @property
+    def bytes_decoded(self) -> int:
+        """Return the decoded size of the last feed download."""
+        return self.hub.bytes_decoded
+
+    @property
+    def content_encoding(self) -> str | None:
+        """Return the content coding of the last feed download."""
+        return self.hub.content_encoding
+
+    @property
+    def fetch_source(self) -> str | None:
+        """Return the source of the last successful fetch."""
+        return self.hub.source
+
+    @property
+    def cache_bytes_written(self) -> int:
+        """Return the bytes written to the cache by the last cycle."""
+        return self.hub.cache_bytes_written
+
+    @property
+    def cache_bytes_on_disk(self) -> int:
+        """Return the size of the compressed cache files."""
+        return self.hub.cache_bytes_on_disk
+
+    def station_name(self, station_id: str) -> str:
+        """Return a station's display name, falling back to its ref."""
+        return self.hub.station_name(station_id)
+
+    async def async_load_cache(self) -> None:
+        """Load cached data from storage (shared by all entries)."""
+        await self.hub.async_load_cache()
+
+    async def async_available_stations(self) -> dict[str, str]:
+        """Return {station_ref: name} of permitted stations for the picker."""
+        return await self.hub.async_available_stations()
+
+    async def async_station_picker(self) -> StationPicker | None:
+        """Return the prebuilt options-flow picker (shared by all entries)."""
+        return await self.hub.async_station_picker()
 
     async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from WaterLevel.ie with retry logic and data retention."""
-        session = async_get_clientsession(self.hass)
-        last_exception = None
-
-        # Try with exponential backoff
-        for attempt in range(MAX_RETRY_ATTEMPTS):
-            try:
-                async with session.get(
-                    API_URL,
-                    timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-                ) as response:
-                    response.raise_for_status()
-                    geojson = await response.json()
-
-                    # Success! Parse and store the data
-                    parsed_data = self._parse_data(geojson)
-                    self._last_good_data = parsed_data
-                    self._last_successful_update = dt_util.utcnow()
-                    self._consecutive_failures = 0
-
-                    # Update API availability status
-                    if not self._api_available:
-                        _LOGGER.info("WaterLevel.ie API is back online")
-                        self._api_available = True
-
-                    # Save to persistent storage for future restarts
-                    await self.async_save_cache()
-
-                    return parsed_data
-
-            except aiohttp.ClientResponseError as err:
-                last_exception = err
-                if err.status >= 500:
-                    # Server error - worth retrying with backoff
-                    if attempt < MAX_RETRY_ATTEMPTS - 1:
-                        backoff = RETRY_BACKOFF_FACTOR**attempt
-                        _LOGGER.debug(
-                            "Server error (attempt %d/%d), retrying in %ds: %s",
-                            attempt + 1,
-                            MAX_RETRY_ATTEMPTS,
-                            backoff,
-                            err,
-                        )
-                        await asyncio.sleep(backoff)
-                        continue
-                else:
-                    # Client error (4xx) - don't retry
-                    break
-
-            except (aiohttp.ClientError, TimeoutError, asyncio.TimeoutError) as err:
-                last_exception = err
-                if attempt < MAX_RETRY_ATTEMPTS - 1:
-                    backoff = RETRY_BACKOFF_FACTOR**attempt
-                    _LOGGER.debug(
-                        "Connection error (attempt %d/%d), retrying in %ds: %s",
-                        attempt + 1,
-                        MAX_RETRY_ATTEMPTS,
-                        backoff,
-                        err,
-                    )
-                    await asyncio.sleep(backoff)
-                else:
-                    break
-
-        # All retries failed
-        self._consecutive_failures += 1
-        self._api_available = False
-
-        # Check if we have recent good data to return
-        if self._last_good_data and self._last_successful_update:
-            age = dt_util.utcnow() - self._last_successful_update
-            if age < timedelta(hours=DATA_RETENTION_HOURS):
-                # Log warning but only every 4 failures to reduce spam
-                if self._consecutive_failures % 4 == 1:
-                    _LOGGER.warning(
-                        "WaterLevel.ie API unavailable (%d consecutive failures), "
-                        "using cached data from %s ago. Last error: %s",
-                        self._consecutive_failures,
-                        age,
-                        last_exception,
-                    )
-                return self._last_good_data
-
-        # No valid cached data available
-        error_msg = f"Error fetching data from {API_URL}"
-        if last_exception:
-            error_msg += f": {last_exception}"
-
-        _LOGGER.error(
-            "%s (failed %d times, no valid cached data available)",
-            error_msg,
-            self._consecutive_failures,
+        """Refresh the shared feed and project this entry's stations from it."""
+        # The river map is first needed to aggregate the data, so on startup
+        # it is read while the feed is being fetched.
+        await asyncio.gather(
+            self.hub.async_refresh(), rivers_mod.async_load_river_map(self.hass)
         )
-        raise UpdateFailed(error_msg) from last_exception
+        snapshot = self.hub.usable_data
+        if snapshot is None:
+            raise UpdateFailed(self.hub.error_message) from self.hub.last_exception
+        return await self._async_process(snapshot)
 
-    def _parse_data(self, geojson: dict[str, Any]) -> dict[str, Any]:
-        """Parse GeoJSON data into station dictionary."""
-        stations: dict[str, Any] = {}
-        filtered_stations = set()
-        available: dict[str, str] = {}
-
-        for feature in geojson.get("features", []):
-            props = feature.get("properties", {})
-            geometry = feature.get("geometry") or {}
-            coords = geometry.get("coordinates") or []
-            longitude = coords[0] if len(coords) > 0 else None
-            latitude = coords[1] if len(coords) > 1 else None
-            station_id = props.get("station_ref")
-            station_name = props.get("station_name", "Unknown")
-            sensor_type = props.get("sensor_ref")
-            value = props.get("value")
-            timestamp = props.get("datetime")
-
-            if not station_id or not sensor_type:
-                continue
-
-            # Enforce OPW republication restrictions first - only stations
-            # 00001-41000 are permitted for republication.
-            try:
-                station_num = int(station_id)
-                if not (STATION_REF_MIN <= station_num <= STATION_REF_MAX):
-                    filtered_stations.add((station_id, station_num, station_name))
-                    continue
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid station_ref format: %s", station_id)
-                continue
-
-            # Record every permitted station for the options picker, regardless
-            # of the active tracking filter.
-            available[station_id] = station_name
-
-            # Apply the user-configured tracking filter (if any). Match on the
-            # station ref (preferred) or, for backwards compatibility, the name.
-            if self._station_filter and (
-                station_id not in self._station_filter
-                and _normalise_name(station_name) not in self._station_filter_normalised
-            ):
-                continue
-
-            if station_id not in stations:
-                stations[station_id] = {
-                    "name": props.get("station_name", station_id),
-                    "region": props.get("region_id"),
-                    "location": f"{latitude}, {longitude}",
-                    "last_updated": timestamp,
-                    "sensors": {},
-                }
+    async def async_reconfigure(
+        self,
+        update_interval_minutes: int,
+        station_filter: set[str] | None,
+        reading_filter: str,
+        lead_time_stations: set[str] | None,
+        metrics: bool,
+        pause_dormant: bool,
+        per_station_fetch: bool,
+        archive: bool,
+        archive_retention: int,
+    ) -> None:
+        """Apply changed options in place, without fetching the feed.
+
+        The selection is re-projected from the hub's current snapshot and
+        published to the listeners, which also restarts the polling timer
+        with the new interval. Only when no usable snapshot is held does this
+        fall back to a normal refresh, and only when the snapshot holds just
+        the per-station demand is the full feed fetched first.
+        """
+        self.update_interval = timedelta(minutes=update_interval_minutes)
+        self.per_station_fetch = per_station_fetch
+        self._set_station_filter(station_filter)
+        self.selection_version += 1
+
+        self._set_reading_filter(reading_filter)
+
+        lead_time_stations = set(lead_time_stations or ())
+        rebuild_propagation = lead_time_stations != self.propagation.targets
+        if rebuild_propagation:
+            self.propagation = PropagationIndex(lead_time_stations)
+
+        self._set_metrics(metrics)
+
+        if self.archive_readings and not archive:
+            await self.archive.async_flush(self.hass)
+        self._set_archive(archive, archive_retention)
+
+        resume = self.pause_dormant and not pause_dormant
+        self.pause_dormant = pause_dormant
+        if resume and self.data and self.freshness.dormant:
+            # Dormant stations were dropped from the aggregates; put back
+            # the ones still tracked.
+            self.river_aggregates.apply(
+                self.data,
+                {(ref, "") for ref in self.freshness.dormant if ref in self.data},
+                set(),
+                rivers_mod.river_for_ref,
+            )
+
+        if self.hub.partial:
+            # Newly selected stations may be missing from a per-station
+            # snapshot; this entry's demand is reset, so this fetches the feed.
+            await self.hub.async_refresh(force=True)
+
+        snapshot = self.hub.usable_data
+        if snapshot is None:
+            await self.async_refresh()
+            return
+        new_data = await self._async_process(snapshot)
+        if rebuild_propagation and self.propagation.targets:
+            self.propagation.rebuild(new_data, rivers_mod.river_for_ref)
+        self.async_set_updated_data(new_data)
+
+    async def _async_process(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        """Project the hub's snapshot and fold the delta into derived state."""
+        new_data = self._project(snapshot)
+        self._apply_delta(new_data)
+        self._update_freshness(new_data)
+        if self.archive_readings and self.changed_readings:
+            await self.archive.async_record(
+                self.hass, new_data, self.changed_readings
+            )
+        await self._async_update_lags()
+        if self._metrics is not None:
+            from .metrics import async_get_exporter  # noqa: PLC0415
+
+            self._metrics.update(
+                new_data, self.changed_readings, self.removed_readings, self.stations
+            )
+            async_get_exporter(self.hass).async_publish(
+                self._entry_id, self._metrics, self.hub
+            )
+        return new_data
+
+    async def async_shutdown(self) -> None:
+        """Stop exporting this entry's metrics when it is unloaded.
 
-            try:
-                parsed_value = float(value) if value is not None else None
-            except (ValueError, TypeError):
-                _LOGGER.warning(
-                    "Invalid value %r for station %s sensor %s, skipping",
-                    value,
-                    station_id,
-                    sensor_type,
+        Readings still buffered for the archive are written out.
+        """
+        await super().async_shutdown()
+        self.hub.remove_demand(self)
+        if self.archive_readings:
+            await self.archive.async_flush(self.hass)
+            self.archive.set_retention(self, None)
+        exporter = self.hass.data.get(DATA_METRICS)
+        if self._metrics is not None and exporter is not None:
+            exporter.async_remove(self._entry_id, self.hub)
+
+    def _project(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        """Return this entry's stations from the hub's snapshot.
+
+        Station entries are shared with the snapshot unless the reading
+        filter rewrites their values. Returns the current data unchanged when
+        neither the snapshot nor the station registry moved since last time
+        (e.g. another entry's fetch was reused, or the API is down).
+        """
+        registry = self.hub.stations
+        if (
+            self.data is not None
+            and snapshot is self._projected_from
+            and registry.version == self._tracked_version
+        ):
+            return self.data
+        self._projected_from = snapshot
+
+        if self._station_filter and registry.version != self._tracked_version:
+            # Resolve names to refs only when the registry changed.
+            self._tracked_refs = set(self._station_filter) | {
+                ref
+                for ref, meta in registry.stations.items()
+                if _normalise_name(meta.name) in self._station_filter_normalised
+            }
+            if self.per_station_fetch:
+                self.hub.set_demand(
+                    self,
+                    {ref for ref in self._tracked_refs if ref in registry.stations},
                 )
-                continue
+        self._tracked_version = registry.version
 
-            stations[station_id]["sensors"][sensor_type] = {
-                "value": parsed_value,
-                "datetime": timestamp,
+        if not self._station_filter:
+            selected = snapshot
+        else:
+            selected = {
+                ref: snapshot[ref] for ref in self._tracked_refs if ref in snapshot
+            }
+        if self._reading_filter is None:
+            return selected
+
+        stations: dict[str, Any] = {}
+        reading_count = 0
+        for station_id, station in selected.items():
+            sensors: dict[str, Any] = {}
+            for sensor_type, reading in station["sensors"].items():
+                value, quality = self._reading_filter.check(
+                    station_id, sensor_type, reading["value"], reading["datetime"]
+                )
+                sensors[sensor_type] = {
+                    **reading,
+                    "value": value,
+                    "raw_value": reading["value"],
+                    "quality": quality,
+                }
+            reading_count += len(sensors)
+            stations[station_id] = {
+                "last_updated": station["last_updated"],
+                "sensors": sensors,
             }
 
-            # Update last_updated to the latest timestamp. Compare parsed
-            # datetimes rather than raw strings so differing formats/offsets
-            # still order correctly; the original string is kept for display.
-            if timestamp:
-                current = stations[station_id]["last_updated"]
-                new_dt = dt_util.parse_datetime(timestamp)
-                current_dt = dt_util.parse_datetime(current) if current else None
-                if current_dt is None or (new_dt is not None and new_dt > current_dt):
-                    stations[station_id]["last_updated"] = timestamp
-
-        # Log filtered stations for transparency (OPW compliance)
-        if filtered_stations:
-            filtered_list = sorted(filtered_stations, key=lambda x: x[1])
+        # Forget filter state for readings that have left the feed/selection.
+        if len(self._reading_filter) > reading_count:
+            self._reading_filter.prune(
+                {
+                    (station_id, sensor_type)
+                    for station_id, station in stations.items()
+                    for sensor_type in station["sensors"]
+                }
+            )
+        return stations
+
+    def _apply_delta(self, new_data: dict[str, Any]) -> None:
+        """Work out which readings changed since the last cycle and fold them in.
+
+        Readings are compared against the snapshot currently held in self.data,
+        so this must run before the coordinator publishes new_data.
+        """
+        changed: set[tuple[str, str]] = set()
+        added: set[tuple[str, str]] = set()
+        removed: set[tuple[str, str]] = set()
+        datum_moved = False
+        old_data = self.data or {}
+        if new_data is not old_data:
+            dormant = self.freshness.dormant if self.pause_dormant else ()
+            for station_id, station in new_data.items():
+                old_station = old_data.get(station_id)
+                if (
+                    station_id in dormant
+                    and old_station is not None
+                    and old_station["last_updated"] == station["last_updated"]
+                ):
+                    continue
+                old_sensors = old_station["sensors"] if old_station else {}
+                for sensor_type, reading in station["sensors"].items():
+                    old_reading = old_sensors.get(sensor_type)
+                    if old_reading != reading:
+                        changed.add((station_id, sensor_type))
+                        if old_reading is None:
+                            added.add((station_id, sensor_type))
+                        elif (
+                            sensor_type == DATUM_SENSOR
+                            and old_reading.get("value") != reading.get("value")
+                        ):
+                            datum_moved = True
+            for station_id, station in old_data.items():
+                new_station = new_data.get(station_id)
+                new_sensors = new_station["sensors"] if new_station else {}
+                for sensor_type in station["sensors"]:
+                    if sensor_type not in new_sensors:
+                        removed.add((station_id, sensor_type))
+
+        self.changed_readings = changed
+        self.added_readings = added
+        self.removed_readings = removed
+        self.delta_cycle += 1
+        if not changed and not removed:
+            return
+        self.river_aggregates.apply(
+            new_data, changed, removed, rivers_mod.river_for_ref
+        )
+        for key in changed:
+            self.history.append(key, new_data[key[0]]["sensors"][key[1]])
+        for key in removed:
+            self.history.discard(key)
+
+        # The upstream ordering only depends on which gauges exist and their
+        # datum, so rebuild it only when readings come or go or a datum value
+        # moves; OD readings are re-timestamped every cycle without changing.
+        if self.propagation.targets and (added or removed or datum_moved):
+            self.propagation.rebuild(new_data, rivers_mod.river_for_ref)
+
+        # The first snapshot after setup is all "changes"; only publish real
+        # cycle-to-cycle deltas.
+        if self.data is not None:
+            self.change_feed.async_publish(
+                [
+                    _change_record(self.stations, new_data, key)
+                    for key in sorted(changed)
+                ],
+                [
+                    _change_record(self.stations, old_data, key, False)
+                    for key in sorted(removed)
+                ],
+                self._entry_id or None,
+            )
+
+    def _update_freshness(self, data: dict[str, Any]) -> None:
+        """Fold the delta into the freshness index and reclassify stations.
+
+        Staleness is measured against the last successful fetch, so an API
+        outage does not make every gauge look stale.
+        """
+        resumed = self.freshness.apply(
+            data, self.changed_readings, self.removed_readings
+        )
+        fetched = self.hub.last_successful_update
+        if fetched is None:
+            return
+        newly_dormant = self.freshness.advance(fetched.timestamp())
+        if resumed:
             _LOGGER.info(
-                "Filtered %d stations outside permitted range (%d-%d): %s",
-                len(filtered_stations),
-                STATION_REF_MIN,
-                STATION_REF_MAX,
-                ", ".join(f"{num} ({name})" for _, num, name in filtered_list),
+                "WaterLevel.ie: %d stale station(s) reporting again: %s",
+                len(resumed),
+                ", ".join(sorted(map(self.station_name, resumed))),
             )
+        if newly_dormant:
+            _LOGGER.info(
+                "WaterLevel.ie: %d station(s) have not reported for over %d hours: %s",
+                len(newly_dormant),
+                self.freshness.dormant_after.total_seconds() // 3600,
+                ", ".join(sorted(map(self.station_name, newly_dormant))),
+            )
+            if self.pause_dormant:
+                # A dormant gauge's last level is not current; it rejoins the
+                # river aggregates with its next reading.
+                self.river_aggregates.drop(newly_dormant)
 
-        # Refresh the picker index with every permitted station seen this cycle.
-        if available:
-            self.available_stations = available
+    async def _async_update_lags(self) -> None:
+        """Re-estimate upstream lags that have enough new samples.
 
-        return stations
+        Series are snapshotted on the event loop; the cross-correlation runs in
+        the executor.
+        """
+        jobs = self.propagation.pending_jobs(self.history)
+        if not jobs:
+            return
+        estimates = await self.hass.async_add_executor_job(estimate_lags, jobs)
+        self.propagation.apply(estimates)
@@ -0,0 +1,41 @@
+"""Diagnostics support for WaterLevel.ie."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import WaterLevelDataCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: WaterLevelDataCoordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+    last_update = hub.last_successful_update
+    return {
+        "options": dict(entry.options),
+        "feed": {
+            "api_available": hub.api_available,
+            "last_successful_update": last_update.isoformat() if last_update else None,
+            "consecutive_failures": hub.consecutive_failures,
+            "last_error": str(hub.last_exception) if hub.last_exception else None,
+            "stations": len(hub.data or {}),
+            "source": hub.source,
+            "cost_model": hub.cost_model.as_dict(),
+            "station_files_missing": hub.station_files_missing,
+            "bytes_on_wire": hub.bytes_on_wire,
+            "fetch_duration": hub.fetch_duration,
+            "parse_duration": hub.parse_duration,
+        },
+        "entry": {
+            "tracked_stations": len(coordinator.data or {}),
+            "stale_stations": sorted(coordinator.freshness.stale),
+            "dormant_stations": sorted(coordinator.freshness.dormant),
+        },
+        "feed_issues": hub.feed_issues.as_dict(),
+    }
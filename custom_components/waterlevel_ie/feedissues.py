@@ -0,0 +1,209 @@
+"""Deduplicated reporting of problems found while parsing the OPW feed.
+
+The feed keeps serving the same bad rows cycle after cycle: stations outside
+the range OPW permits for republication, malformed station refs and
+unparseable values. Logging each of them on every parse repeats the same
+formatting and log I/O every few minutes. Instead the parser records them in
+a FeedIssues collector, which counts them per cycle and logs one compact
+summary per kind only when the set of affected rows changes (and at most
+once per SUMMARY_INTERVAL while it keeps changing). The full details of the
+last cycle are available through the integration's diagnostics.
+
+Recording a problem only stores the raw fields; nothing is formatted unless
+a summary is actually emitted at an enabled log level.
+"""
+from __future__ import annotations
+
+from collections import Counter
+import logging
+import time
+from typing import Any
+
+from .const import STATION_REF_MAX, STATION_REF_MIN
+
+OUT_OF_RANGE = "out_of_range"
+INVALID_REF = "invalid_station_ref"
+INVALID_VALUE = "invalid_value"
+KINDS = (OUT_OF_RANGE, INVALID_REF, INVALID_VALUE)
+
+# Filtering restricted stations is expected (and logged for transparency);
+# malformed rows point at a feed problem.
+_LEVELS = {
+    OUT_OF_RANGE: logging.INFO,
+    INVALID_REF: logging.WARNING,
+    INVALID_VALUE: logging.WARNING,
+}
+_LABELS = {
+    OUT_OF_RANGE: "stations outside the permitted range",
+    INVALID_REF: "rows with an invalid station_ref",
+    INVALID_VALUE: "readings with an invalid value",
+}
+
+# Minimum seconds between two summaries of a kind whose rows keep changing.
+# Problems appearing or clearing are always reported straight away.
+SUMMARY_INTERVAL = 3600
+
+# Rows named in a summary; the rest are counted.
+SUMMARY_ITEMS = 10
+
+
+def _key_text(kind: str, key: Any) -> str:
+    """Return the short form of a recorded row's key."""
+    if kind == INVALID_VALUE:
+        return f"{key[0]}/{key[1]}"
+    if kind == INVALID_REF:
+        return repr(key)
+    return str(key)
+
+
+def _describe(kind: str, key: Any, detail: Any) -> str:
+    """Return the short form of one recorded row with its detail."""
+    if kind == OUT_OF_RANGE:
+        return f"{int(key)} ({detail})"
+    if kind == INVALID_VALUE:
+        return f"{_key_text(kind, key)}={detail!r}"
+    return _key_text(kind, key)
+
+
+def _listing(kind: str, items: dict[Any, Any], keys: set[Any] | frozenset[Any]) -> str:
+    """Return up to SUMMARY_ITEMS of the given rows, sorted, and a remainder."""
+    shown = sorted(keys, key=str)[:SUMMARY_ITEMS]
+    text = ", ".join(_describe(kind, key, items.get(key)) for key in shown)
+    if len(keys) > len(shown):
+        text += f" and {len(keys) - len(shown)} more"
+    return text
+
+
+class FeedIssues:
+    """Per-cycle collector of feed problems with change-only summaries."""
+
+    def __init__(self, logger: logging.Logger) -> None:
+        """Initialize an empty collector logging to the parser's logger."""
+        self._logger = logger
+        # Rows recorded by the parse in progress and by the last complete one:
+        # kind -> {key: detail}, key being the station ref (and sensor ref).
+        self._current: dict[str, dict[Any, Any]] = {kind: {} for kind in KINDS}
+        self.last: dict[str, dict[Any, Any]] = {kind: {} for kind in KINDS}
+        # Feed rows per kind in the last cycle (a station has several rows)
+        # and over every cycle since startup.
+        self._rows: Counter[str] = Counter()
+        self.last_rows: Counter[str] = Counter()
+        self.total_rows: Counter[str] = Counter()
+        self.cycles = 0
+        self.summaries = 0
+        # Keys as of the last summary of each kind, and when it was logged.
+        self._reported: dict[str, frozenset[Any]] = {kind: frozenset() for kind in KINDS}
+        self._reported_at: dict[str, float] = {}
+
+    def start(self) -> None:
+        """Begin collecting the problems of a new parse."""
+        for rows in self._current.values():
+            rows.clear()
+        self._rows = Counter()
+
+    def add(self, kind: str, key: Any, detail: Any = None) -> None:
+        """Record a problem row; cheap enough for the parse loop."""
+        self._current[kind][key] = detail
+        self._rows[kind] += 1
+
+    def finish(self) -> None:
+        """Close the parse and log a summary of each kind that changed."""
+        self.cycles += 1
+        self.total_rows.update(self._rows)
+        self.last_rows = self._rows
+        # Swap rather than copy; start() clears the other set of rows.
+        self.last, self._current = self._current, self.last
+        now = time.monotonic()
+        for kind in KINDS:
+            keys = frozenset(self.last[kind])
+            previous = self._reported[kind]
+            if keys == previous:
+                continue
+            # Coalesce a kind that changes every cycle; appearing and
+            # clearing are always reported.
+            if (
+                keys
+                and previous
+                and now - self._reported_at.get(kind, 0) < SUMMARY_INTERVAL
+            ):
+                continue
+            self._reported[kind] = keys
+            self._reported_at[kind] = now
+            self.summaries += 1
+            self._log(kind, keys, previous)
+
+    def _log(self, kind: str, keys: frozenset[Any], previous: frozenset[Any]) -> None:
+        """Log the summary of one kind, formatting only if it will be emitted."""
+        level = _LEVELS[kind] if keys else logging.INFO
+        if not self._logger.isEnabledFor(level):
+            return
+        if not keys:
+            self._logger.log(level, "No more %s in the feed", _LABELS[kind])
+            return
+
+        items = self.last[kind]
+        added = keys - previous
+        removed = previous - keys
+        if previous:
+            change = f" (+{len(added)} -{len(removed)})"
+            detail = f"new: {_listing(kind, items, added)}" if added else ""
+            if removed:
+                gone = ", ".join(
+                    sorted(_key_text(kind, key) for key in removed)[:SUMMARY_ITEMS]
+                )
+                detail += ("; " if detail else "") + f"cleared: {gone}"
+        else:
+            change = ""
+            detail = _listing(kind, items, keys)
+
+        if kind == OUT_OF_RANGE:
+            self._logger.log(
+                level,
+                "Filtered %d stations outside permitted range (%d-%d)%s: %s",
+                len(keys),
+                STATION_REF_MIN,
+                STATION_REF_MAX,
+                change,
+                detail,
+            )
+        elif kind == INVALID_REF:
+            self._logger.log(
+                level,
+                "Skipped %d feed rows with an invalid station_ref%s: %s",
+                self.last_rows[kind],
+                change,
+                detail,
+            )
+        else:
+            self._logger.log(
+                level,
+                "Skipped %d readings with an invalid value%s: %s",
+                len(keys),
+                change,
+                detail,
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters and the last cycle's rows, for diagnostics."""
+        last_cycle: dict[str, Any] = {}
+        for kind in KINDS:
+            items = self.last[kind]
+            if kind == OUT_OF_RANGE:
+                rows: list[Any] = [
+                    {"station_ref": ref, "station_name": name}
+                    for ref, name in sorted(items.items())
+                ]
+            elif kind == INVALID_VALUE:
+                rows = [
+                    {"station_ref": ref, "sensor_ref": sensor, "value": value}
+                    for (ref, sensor), value in sorted(items.items(), key=str)
+                ]
+            else:
+                rows = sorted(map(str, items))
+            last_cycle[kind] = {"rows": self.last_rows[kind], "items": rows}
+        return {
+            "cycles": self.cycles,
+            "summaries_logged": self.summaries,
+            "total_rows": {kind: self.total_rows[kind] for kind in KINDS},
+            "last_cycle": last_cycle,
+        }
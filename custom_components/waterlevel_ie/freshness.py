@@ -0,0 +1,120 @@
+"""Per-station freshness index for WaterLevel.ie.
+
+Some OPW gauges stop reporting for days while the feed keeps serving their
+last reading. The index tracks the newest reading time of every station and
+classifies a station as stale once that is STALE_AFTER older than the last
+successful fetch, and as dormant after DORMANT_AFTER.
+
+Like the river aggregates it is maintained from the per-cycle delta: station
+times sit in a min-heap with lazy deletion, and each cycle only pops the
+entries that crossed a threshold since the last one, so a cycle costs
+O(changes log n) rather than a scan of every station.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+import heapq
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# A station is stale once its newest reading is this much older than the
+# last successful fetch (OPW gauges normally report every 15 minutes).
+STALE_AFTER = timedelta(hours=3)
+
+# ...and dormant (eligible for the cheap path) after this long.
+DORMANT_AFTER = timedelta(days=2)
+
+# Compact a heap once it holds this many times more entries than stations.
+_COMPACT_RATIO = 2
+_COMPACT_MIN = 8
+
+
+class FreshnessIndex:
+    """Newest reading time per station, with stale and dormant sets."""
+
+    def __init__(
+        self,
+        stale_after: timedelta = STALE_AFTER,
+        dormant_after: timedelta = DORMANT_AFTER,
+    ) -> None:
+        """Initialise an empty index."""
+        self.stale_after = stale_after
+        self.dormant_after = dormant_after
+        self._stale_seconds = stale_after.total_seconds()
+        self._dormant_seconds = dormant_after.total_seconds()
+        # station_ref -> POSIX time of its newest reading
+        self.newest: dict[str, float] = {}
+        # Stations not yet stale / stale but not yet dormant, oldest first.
+        self._fresh_heap: list[tuple[float, str]] = []
+        self._stale_heap: list[tuple[float, str]] = []
+        self.stale: set[str] = set()
+        self.dormant: set[str] = set()
+
+    def __len__(self) -> int:
+        """Return the number of stations indexed."""
+        return len(self.newest)
+
+    def apply(
+        self,
+        data: dict[str, Any],
+        changed: set[tuple[str, str]],
+        removed: set[tuple[str, str]],
+    ) -> set[str]:
+        """Fold a cycle's delta into the index.
+
+        Only the stations touched by the delta are visited. Returns the
+        stations that were stale and reported again.
+        """
+        resumed: set[str] = set()
+        for ref in {ref for ref, _sensor in removed}:
+            if ref not in data:
+                self.newest.pop(ref, None)
+                self.stale.discard(ref)
+                self.dormant.discard(ref)
+        for ref in {ref for ref, _sensor in changed}:
+            last_updated = data[ref].get("last_updated")
+            parsed = dt_util.parse_datetime(last_updated) if last_updated else None
+            if parsed is None:
+                continue
+            epoch = parsed.timestamp()
+            if self.newest.get(ref) == epoch:
+                continue
+            self.newest[ref] = epoch
+            heapq.heappush(self._fresh_heap, (epoch, ref))
+            if ref in self.stale:
+                self.stale.discard(ref)
+                self.dormant.discard(ref)
+                resumed.add(ref)
+        self._maybe_compact()
+        return resumed
+
+    def advance(self, now: float) -> set[str]:
+        """Reclassify stations as of a fetch time; returns newly dormant ones."""
+        stale_before = now - self._stale_seconds
+        heap = self._fresh_heap
+        while heap and heap[0][0] < stale_before:
+            epoch, ref = heapq.heappop(heap)
+            if self.newest.get(ref) == epoch and ref not in self.stale:
+                self.stale.add(ref)
+                heapq.heappush(self._stale_heap, (epoch, ref))
+
+        dormant_before = now - self._dormant_seconds
+        newly_dormant: set[str] = set()
+        heap = self._stale_heap
+        while heap and heap[0][0] < dormant_before:
+            epoch, ref = heapq.heappop(heap)
+            if self.newest.get(ref) == epoch and ref not in self.dormant:
+                self.dormant.add(ref)
+                newly_dormant.add(ref)
+        return newly_dormant
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the fresh heap once it holds too many superseded entries."""
+        if len(self._fresh_heap) > _COMPACT_RATIO * len(self.newest) + _COMPACT_MIN:
+            self._fresh_heap = [
+                (epoch, ref)
+                for ref, epoch in self.newest.items()
+                if ref not in self.stale
+            ]
+            heapq.heapify(self._fresh_heap)
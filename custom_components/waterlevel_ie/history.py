@@ -0,0 +1,130 @@
+"""Recent reading history for WaterLevel.ie.
+
+The OPW feed only carries the latest reading per sensor, so the integration
+keeps its own short in-memory history of the samples it has seen. Samples are
+appended from the per-cycle delta (only readings that changed), so the cost of
+keeping the history grows with the number of new readings, not with the number
+of tracked stations.
+
+Each series is a fixed-capacity ring buffer of two float arrays (16 bytes per
+sample) rather than a container of tuples (over 100 bytes per sample), which
+keeps all-stations mode affordable.
+"""
+from __future__ import annotations
+
+from array import array
+
+from homeassistant.util import dt as dt_util
+
+# Samples kept per (station, sensor): 3 days at OPW's 15-minute cadence,
+# enough for the 48-hour lag estimation window.
+HISTORY_SAMPLES = 3 * 24 * 4
+
+
+class _Series:
+    """Ring buffer of (timestamp, value) samples in two float arrays."""
+
+    __slots__ = ("times", "values", "head")
+
+    def __init__(self) -> None:
+        self.times = array("d")
+        self.values = array("d")
+        # Index of the oldest sample once the buffer is full.
+        self.head = 0
+
+    def append(self, timestamp: float, value: float, maxlen: int) -> None:
+        if len(self.times) < maxlen:
+            self.times.append(timestamp)
+            self.values.append(value)
+            return
+        self.times[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % maxlen
+
+    def last(self) -> tuple[float, float]:
+        index = self.head - 1  # -1 wraps to the end when head is 0
+        return self.times[index], self.values[index]
+
+    def ordered(self) -> list[tuple[float, float]]:
+        head = self.head
+        times = self.times[head:] + self.times[:head]
+        values = self.values[head:] + self.values[:head]
+        return list(zip(times, values))
+
+
+class ReadingHistory:
+    """Bounded per-(station, sensor) series of (POSIX timestamp, value)."""
+
+    def __init__(self, maxlen: int = HISTORY_SAMPLES) -> None:
+        """Initialise an empty history."""
+        self._maxlen = maxlen
+        self._series: dict[tuple[str, str], _Series] = {}
+        # Total samples ever appended per key; lets consumers tell how many
+        # new samples arrived since they last looked, even after wrap-around.
+        self.appended: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of (station, sensor) series held."""
+        return len(self._series)
+
+    def append(self, key: tuple[str, str], reading: dict) -> bool:
+        """Append a parsed reading if it is newer than the last sample.
+
+        Returns True when a sample was added.
+        """
+        value = reading.get("value")
+        timestamp = reading.get("datetime")
+        if value is None or not timestamp:
+            return False
+        parsed = dt_util.parse_datetime(timestamp)
+        if parsed is None:
+            return False
+        epoch = parsed.timestamp()
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        elif series.times and epoch <= series.last()[0]:
+            return False
+        series.append(epoch, value, self._maxlen)
+        self.appended[key] = self.appended.get(key, 0) + 1
+        return True
+
+    def series(self, key: tuple[str, str]) -> list[tuple[float, float]]:
+        """Return a copy of the samples for a key, oldest first."""
+        series = self._series.get(key)
+        return series.ordered() if series else []
+
+    def first(self, key: tuple[str, str]) -> tuple[float, float] | None:
+        """Return the oldest sample for a key, or None."""
+        series = self._series.get(key)
+        if not series or not series.times:
+            return None
+        # head is 0 until the buffer is full, then the oldest slot.
+        return series.times[series.head], series.values[series.head]
+
+    def last(self, key: tuple[str, str]) -> tuple[float, float] | None:
+        """Return the newest sample for a key, or None."""
+        series = self._series.get(key)
+        return series.last() if series and series.times else None
+
+    def since(self, key: tuple[str, str], start: float) -> list[tuple[float, float]]:
+        """Return the samples at or after a POSIX timestamp, oldest first."""
+        series = self._series.get(key)
+        if not series or not series.times:
+            return []
+        size = len(series.times)
+        out: list[tuple[float, float]] = []
+        # Walk backwards from the newest sample until one is too old.
+        for step in range(1, size + 1):
+            index = (series.head - step) % size
+            timestamp = series.times[index]
+            if timestamp < start:
+                break
+            out.append((timestamp, series.values[index]))
+        out.reverse()
+        return out
+
+    def discard(self, key: tuple[str, str]) -> None:
+        """Forget the series for a key."""
+        self._series.pop(key, None)
+        self.appended.pop(key, None)
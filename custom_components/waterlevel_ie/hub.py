@@ -0,0 +1,716 @@
+"""Shared feed fetcher for all WaterLevel.ie config entries.
+
+Every config entry has its own coordinator (station/river selection, update
+interval, reading filter), but the OPW feed is the same for all of them. The
+FeedHub downloads and parses it once into a snapshot of every permitted
+station; each coordinator then projects its own selection from that
+snapshot.
+
+Fetches are single-flight: concurrent refreshes share the request in
+progress, and a fetch attempted within FEED_REUSE is reused rather than
+repeated, so OPW load and parse cost do not grow with the number of entries.
+When every entry only needs a few known stations, a cycle may instead fetch
+just their per-sensor files (see sources.py); each entry registers the
+stations it needs as its demand. The hub also owns everything derived from
+the full feed: the station metadata registry, the options-flow picker, the
+on-disk cache and the API availability and transfer statistics.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+from http import HTTPStatus
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import (
+    API_TIMEOUT,
+    API_URL,
+    DATA_HUB,
+    DATA_RETENTION_HOURS,
+    MAX_RETRY_ATTEMPTS,
+    MIN_UPDATE_INTERVAL,
+    RETRY_BACKOFF_FACTOR,
+    STATION_API_URL,
+    STATION_REF_MAX,
+    STATION_REF_MIN,
+)
+from .feedissues import INVALID_REF, INVALID_VALUE, OUT_OF_RANGE, FeedIssues
+from .sources import (
+    CARRIED_SENSORS,
+    FULL_FEED_REFRESH,
+    SOURCE_FULL_FEED,
+    SOURCE_PER_STATION,
+    STATION_FETCH_CONCURRENCY,
+    FeedCostModel,
+    RequestBudget,
+    latest_reading,
+    station_number,
+    station_snapshot,
+)
+from .stations import StationRegistry
+from .storage import (
+    ACCEPT_ENCODING,
+    STATIONS_STORAGE_KEY,
+    CompressedCache,
+    decode_body,
+)
+from . import rivers as rivers_mod
+
+if TYPE_CHECKING:
+    from .picker import StationPicker
+
+_LOGGER = logging.getLogger(__name__)
+
+# A fetch attempted this recently is reused by other entries instead of
+# repeated. Just under the OPW minimum interval, so entries polling at the
+# minimum still get every new feed.
+FEED_REUSE = timedelta(minutes=MIN_UPDATE_INTERVAL - 1)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> FeedHub:
+    """Return the hub shared by all entries, creating it if needed."""
+    hub: FeedHub | None = hass.data.get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DATA_HUB] = FeedHub(hass)
+    return hub
+
+
+class FeedHub:
+    """Single-flight fetcher and parser of the OPW feed."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+
+        # Last good parsed snapshot of every permitted station:
+        # {station_ref: {"last_updated": ..., "sensors": {sensor_ref: reading}}}
+        self.data: dict[str, Any] | None = None
+        self.last_successful_update: datetime | None = None
+        self.consecutive_failures = 0
+        self.api_available = True
+        self.last_exception: Exception | None = None
+        self._last_attempt: datetime | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._last_saved_data: dict[str, Any] | None = None
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+        # Static metadata (name, region, coordinates) of every permitted
+        # station, kept apart from the snapshot, which only holds readings.
+        self.stations = StationRegistry()
+        self._stations_saved_version = 0
+
+        # Picker index derived from the registry (ref -> name / region),
+        # rebuilt only when the registry changes.
+        self.available_stations: dict[str, str] = {}
+        self.station_regions: dict[str, Any] = {}
+        self._index_version = 0
+        # Options-flow picker built from the index above; dropped whenever the
+        # index changes and rebuilt on the next request.
+        self._picker: StationPicker | None = None
+
+        # Compressed storage for persisting cached data across restarts
+        self._cache = CompressedCache(hass)
+        self._stations_cache = CompressedCache(hass, STATIONS_STORAGE_KEY)
+
+        # Feed session with transparent decompression off, so the compressed
+        # size on the wire can be measured before decoding it ourselves.
+        self._session: aiohttp.ClientSession | None = None
+
+        # Bytes moved by the last update cycle, for the API status sensor.
+        self.bytes_on_wire = 0
+        self.bytes_decoded = 0
+        self.content_encoding: str | None = None
+        self.cache_bytes_written = 0
+        # Seconds spent downloading and parsing the last successful fetch.
+        self.fetch_duration: float | None = None
+        self.parse_duration: float | None = None
+
+        # Restricted stations and malformed rows seen by the last parse,
+        # logged only when they change (details in diagnostics).
+        self.feed_issues = FeedIssues(_LOGGER)
+
+        # Stations each entry needs (owner -> refs, None meaning the whole
+        # feed) and the source chosen for the last successful fetch. The
+        # snapshot only covers the demanded stations after a per-station one.
+        self._demand: dict[object, set[str] | None] = {}
+        self.cost_model = FeedCostModel()
+        self.source: str | None = None
+        self._last_full_fetch: datetime | None = None
+        self._stations_failed_at: datetime | None = None
+        # Per-station requests are counted against OPW's 15-minute window;
+        # a 404 means the per-sensor URL layout does not hold, and only the
+        # full feed is used from then on.
+        self.station_budget = RequestBudget()
+        self.station_files_missing = False
+
+    @property
+    def cache_bytes_on_disk(self) -> int:
+        """Return the size of the compressed cache files."""
+        return self._cache.bytes_on_disk + self._stations_cache.bytes_on_disk
+
+    @property
+    def partial(self) -> bool:
+        """Return True if the snapshot only covers the demanded stations."""
+        return self.source == SOURCE_PER_STATION
+
+    @property
+    def usable_data(self) -> dict[str, Any] | None:
+        """Return the last good snapshot while it is within the retention period."""
+        if self.data is None or self.last_successful_update is None:
+            return None
+        age = dt_util.utcnow() - self.last_successful_update
+        return self.data if age < timedelta(hours=DATA_RETENTION_HOURS) else None
+
+    @property
+    def error_message(self) -> str:
+        """Describe the last fetch failure."""
+        message = f"Error fetching data from {API_URL}"
+        if self.last_exception:
+            message += f": {self.last_exception}"
+        return message
+
+    def station_name(self, station_id: str) -> str:
+        """Return a station's display name, falling back to its ref."""
+        meta = self.stations.get(station_id)
+        return meta.name if meta else station_id
+
+    async def async_load_cache(self) -> None:
+        """Load cached data from storage (once, however many entries ask)."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            await self._async_load_cache()
+
+    async def _async_load_cache(self) -> None:
+        """Load the station metadata and the last snapshot from storage."""
+        try:
+            stored_stations = await self._stations_cache.async_load()
+            if isinstance(stored_stations, dict):
+                self.stations.load(stored_stations)
+                self._stations_saved_version = self.stations.version
+        except Exception as err:
+            _LOGGER.warning("Failed to load cached station metadata: %s", err)
+        try:
+            cached = await self._cache.async_load()
+            if cached and isinstance(cached, dict):
+                # Check if we have valid cached data
+                if "data" in cached and "timestamp" in cached:
+                    timestamp_str = cached["timestamp"]
+                    cached_time = dt_util.parse_datetime(timestamp_str)
+
+                    if cached_time:
+                        age = dt_util.utcnow() - cached_time
+                        if age < timedelta(hours=DATA_RETENTION_HOURS):
+                            self.data = cached["data"]
+                            # Caches written before the metadata split carry
+                            # it in each station entry.
+                            self.stations.seed_from_snapshot(cached["data"])
+                            self.last_successful_update = cached_time
+                            _LOGGER.info(
+                                "Loaded cached data from %s ago (stored at %s)",
+                                age,
+                                timestamp_str,
+                            )
+                        else:
+                            _LOGGER.debug(
+                                "Cached data too old (%s), discarding",
+                                age,
+                            )
+        except Exception as err:
+            _LOGGER.warning("Failed to load cached data: %s", err)
+
+    async def async_save_stations(self) -> int:
+        """Save the station metadata if it changed; returns bytes written."""
+        version = self.stations.version
+        if version == self._stations_saved_version:
+            return 0
+        try:
+            written = await self._stations_cache.async_save(self.stations.as_dict())
+        except Exception as err:
+            _LOGGER.warning("Failed to save station metadata: %s", err)
+            return 0
+        self._stations_saved_version = version
+        _LOGGER.debug("Station metadata saved to storage (%d bytes)", written)
+        return written
+
+    async def async_save_cache(self) -> None:
+        """Save current data to storage."""
+        stations_written = await self.async_save_stations()
+        self.cache_bytes_written = stations_written
+        if self.data and self.last_successful_update:
+            # Skip the write if the data is unchanged since the last save to
+            # avoid needless disk I/O every update cycle.
+            if self.data == self._last_saved_data:
+                _LOGGER.debug("Cached data unchanged, skipping save")
+                return
+            try:
+                self.cache_bytes_written += await self._cache.async_save(
+                    {
+                        "data": self.data,
+                        "timestamp": self.last_successful_update.isoformat(),
+                    }
+                )
+                self._last_saved_data = self.data
+                _LOGGER.debug(
+                    "Cached data saved to storage (%d bytes)",
+                    self.cache_bytes_written - stations_written,
+                )
+            except Exception as err:
+                _LOGGER.warning("Failed to save cache: %s", err)
+
+    @callback
+    def set_demand(self, owner: object, refs: set[str] | None) -> None:
+        """Record the stations an entry needs; None needs the whole feed."""
+        self._demand[owner] = refs
+        if self.partial and (refs is None or not refs.issubset(self.data or ())):
+            # The per-station snapshot lacks stations now needed, so the
+            # next refresh must not reuse it.
+            self._last_attempt = None
+
+    @callback
+    def remove_demand(self, owner: object) -> None:
+        """Forget an entry's demand when it unloads."""
+        self._demand.pop(owner, None)
+
+    async def async_available_stations(self) -> dict[str, str]:
+        """Return {station_ref: name} of permitted stations for the picker.
+
+        Uses the index built during normal updates; if it is empty (e.g. the
+        integration is currently running on cached data), fetch the feed once
+        to populate it. Never raises - returns an empty dict on failure.
+        """
+        if not self.available_stations:
+            await self.async_refresh(force=True)
+            if not self.available_stations:
+                _LOGGER.warning(
+                    "Could not fetch station list for options flow: %s",
+                    self.last_exception,
+                )
+        return self.available_stations
+
+    async def async_station_picker(self) -> StationPicker | None:
+        """Return the prebuilt options-flow picker, building it if needed.
+
+        The picker is only rebuilt after the set of available stations (or
+        their names/regions) changed, so repeated dialog opens are free.
+        Returns None when no station list could be obtained.
+        """
+        available = await self.async_available_stations()
+        if not available:
+            return None
+        if self._picker is None:
+            # Only the options flow needs the picker; keep it out of startup.
+            from .picker import StationPicker  # noqa: PLC0415
+
+            river_map = await self.hass.async_add_executor_job(
+                rivers_mod.station_river_map
+            )
+            self._picker = await self.hass.async_add_executor_job(
+                StationPicker, available, river_map, self.station_regions
+            )
+        return self._picker
+
+    async def async_refresh(self, force: bool = False) -> None:
+        """Fetch and parse the feed, shared by every entry asking for it.
+
+        Joins a fetch already in progress; otherwise reuses the last attempt
+        if it is younger than FEED_REUSE (unless forced). Never raises: the
+        outcome is reflected in data, api_available and last_exception.
+        """
+        if self._refresh_task is None:
+            if (
+                not force
+                and self._last_attempt is not None
+                and dt_util.utcnow() - self._last_attempt < FEED_REUSE
+            ):
+                return
+            self._refresh_task = self.hass.async_create_task(
+                self._async_fetch_and_parse(), "waterlevel_ie feed refresh"
+            )
+        # Shielded so a cancelled caller does not abort the shared fetch.
+        await asyncio.shield(self._refresh_task)
+
+    async def async_shutdown(self) -> None:
+        """Cancel a fetch in progress and close the feed session.
+
+        Called when the last entry unloads; the hub is dropped afterwards.
+        """
+        if (task := self._refresh_task) is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _async_download(self, url: str) -> tuple[bytes, bytes, str | None]:
+        """Return (body on the wire, decoded body, Content-Encoding) of a URL.
+
+        Compressed transfer is requested explicitly and decoded here rather
+        than by aiohttp, so the size on the wire is what was actually
+        downloaded.
+        """
+        if self._session is None:
+            self._session = async_create_clientsession(
+                self.hass, auto_decompress=False
+            )
+        async with self._session.get(
+            url,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            body = await response.read()
+            encoding = response.headers.get("Content-Encoding")
+        return body, decode_body(body, encoding), encoding
+
+    async def _async_fetch_feed(self) -> Any:
+        """Download and decode the feed, recording the bytes transferred."""
+        started = time.monotonic()
+        body, decoded, encoding = await self._async_download(API_URL)
+        self.fetch_duration = time.monotonic() - started
+        self.bytes_on_wire = len(body)
+        self.bytes_decoded = len(decoded)
+        self.content_encoding = encoding or "identity"
+        _LOGGER.debug(
+            "Fetched feed: %d bytes on the wire (%s), %d bytes decoded",
+            self.bytes_on_wire,
+            self.content_encoding,
+            self.bytes_decoded,
+        )
+        try:
+            return json_loads(decoded)
+        except ValueError as err:
+            # A truncated or garbled body is a bad download like any other,
+            # not a reason to drop the retained data.
+            raise aiohttp.ClientPayloadError(f"Invalid feed JSON: {err}") from err
+
+    def _station_plan(self) -> list[tuple[str, str]] | None:
+        """Return the per-sensor files to fetch this cycle, or None for the feed.
+
+        The full feed is used while any entry needs all of it, when a
+        demanded station is not in the snapshot yet (its sensors are only
+        known from the feed), when the last full fetch is older than
+        FULL_FEED_REFRESH, when the plan does not fit the request budget
+        left in this window, once a per-sensor file was not found, and
+        whenever the cost model prefers it. The plan's requests are counted
+        against the budget.
+        """
+        if (
+            self.station_files_missing
+            or not self._demand
+            or None in self._demand.values()
+            or self.data is None
+        ):
+            return None
+        now = dt_util.utcnow()
+        if (
+            self._last_full_fetch is None
+            or now - self._last_full_fetch >= FULL_FEED_REFRESH
+            or (
+                self._stations_failed_at is not None
+                and now - self._stations_failed_at < FULL_FEED_REFRESH
+            )
+        ):
+            return None
+        plan: list[tuple[str, str]] = []
+        for station_id in sorted(set().union(*self._demand.values())):
+            station = self.data.get(station_id)
+            if station is None:
+                return None
+            plan.extend(
+                (station_id, sensor)
+                for sensor in station["sensors"]
+                if sensor not in CARRIED_SENSORS
+            )
+        started = time.monotonic()
+        if (
+            not plan
+            or len(plan) > self.station_budget.remaining(started)
+            or self.cost_model.choose(len(plan)) != SOURCE_PER_STATION
+        ):
+            return None
+        self.station_budget.spend(len(plan), started)
+        return plan
+
+    async def _async_fetch_stations(
+        self, plan: list[tuple[str, str]]
+    ) -> dict[str, Any]:
+        """Fetch the planned per-sensor files and build a snapshot of them.
+
+        At most STATION_FETCH_CONCURRENCY requests are in flight; any failure
+        fails the whole cycle, like a failed feed download.
+        """
+        semaphore = asyncio.Semaphore(STATION_FETCH_CONCURRENCY)
+        sizes: list[tuple[int, int]] = []
+        encodings: set[str] = set()
+
+        async def fetch(station_id: str, sensor_type: str) -> tuple[str, float] | None:
+            url = STATION_API_URL.format(
+                station=station_number(station_id), sensor=sensor_type
+            )
+            async with semaphore:
+                body, decoded, encoding = await self._async_download(url)
+            sizes.append((len(body), len(decoded)))
+            encodings.add(encoding or "identity")
+            return latest_reading(decoded.decode("utf-8", "replace"))
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(fetch(*item) for item in plan))
+        self.fetch_duration = time.monotonic() - started
+        self.bytes_on_wire = sum(wire for wire, _ in sizes)
+        self.bytes_decoded = sum(decoded for _, decoded in sizes)
+        self.content_encoding = "/".join(sorted(encodings))
+        self.cost_model.observe_station(
+            len(plan), self.bytes_on_wire, self.bytes_decoded
+        )
+        _LOGGER.debug(
+            "Fetched %d station files: %d bytes on the wire (%s), %d bytes decoded",
+            len(plan),
+            self.bytes_on_wire,
+            self.content_encoding,
+            self.bytes_decoded,
+        )
+        started = time.monotonic()
+        data = station_snapshot(self.data or {}, dict(zip(plan, results)))
+        self.parse_duration = time.monotonic() - started
+        return data
+
+    async def _async_fetch_snapshot(self) -> None:
+        """Fetch a new snapshot from the cheaper source into data."""
+        plan = self._station_plan()
+        if plan is not None:
+            try:
+                self.data = await self._async_fetch_stations(plan)
+                self.source = SOURCE_PER_STATION
+                return
+            except (aiohttp.ClientError, TimeoutError) as err:
+                # Fall back to the feed rather than failing the cycle: for
+                # good if a file does not exist, otherwise until the next
+                # metadata refresh.
+                if (
+                    isinstance(err, aiohttp.ClientResponseError)
+                    and err.status == HTTPStatus.NOT_FOUND
+                ):
+                    _LOGGER.warning(
+                        "Per-station file not found (%s); using the full feed",
+                        err.request_info.real_url,
+                    )
+                    self.station_files_missing = True
+                else:
+                    _LOGGER.debug(
+                        "Per-station fetch failed, using the full feed: %s", err
+                    )
+                    self._stations_failed_at = dt_util.utcnow()
+
+        geojson = await self._async_fetch_feed()
+        started = time.monotonic()
+        self.data = self._parse_data(geojson)
+        self.parse_duration = time.monotonic() - started
+        self.source = SOURCE_FULL_FEED
+        self._last_full_fetch = dt_util.utcnow()
+        self.cost_model.observe_full_feed(self.bytes_on_wire, self.bytes_decoded)
+
+    async def _async_fetch_and_parse(self) -> None:
+        """Fetch data from WaterLevel.ie with retry logic and data retention."""
+        try:
+            await self._async_fetch_with_retry()
+        finally:
+            self._last_attempt = dt_util.utcnow()
+            self._refresh_task = None
+
+    async def _async_fetch_with_retry(self) -> None:
+        """Run one fetch cycle, retrying transient errors with backoff."""
+        last_exception = None
+
+        # Try with exponential backoff
+        for attempt in range(MAX_RETRY_ATTEMPTS):
+            try:
+                await self._async_fetch_snapshot()
+
+                # Success! Store the data
+                self.last_successful_update = dt_util.utcnow()
+                self.consecutive_failures = 0
+                self.last_exception = None
+
+                # Update API availability status
+                if not self.api_available:
+                    _LOGGER.info("WaterLevel.ie API is back online")
+                    self.api_available = True
+
+                # Save to persistent storage for future restarts
+                await self.async_save_cache()
+                return
+
+            except aiohttp.ClientResponseError as err:
+                last_exception = err
+                if err.status >= 500:
+                    # Server error - worth retrying with backoff
+                    if attempt < MAX_RETRY_ATTEMPTS - 1:
+                        backoff = RETRY_BACKOFF_FACTOR**attempt
+                        _LOGGER.debug(
+                            "Server error (attempt %d/%d), retrying in %ds: %s",
+                            attempt + 1,
+                            MAX_RETRY_ATTEMPTS,
+                            backoff,
+                            err,
+                        )
+                        await asyncio.sleep(backoff)
+                        continue
+                else:
+                    # Client error (4xx) - don't retry
+                    break
+
+            except (aiohttp.ClientError, TimeoutError, asyncio.TimeoutError) as err:
+                last_exception = err
+                if attempt < MAX_RETRY_ATTEMPTS - 1:
+                    backoff = RETRY_BACKOFF_FACTOR**attempt
+                    _LOGGER.debug(
+                        "Connection error (attempt %d/%d), retrying in %ds: %s",
+                        attempt + 1,
+                        MAX_RETRY_ATTEMPTS,
+                        backoff,
+                        err,
+                    )
+                    await asyncio.sleep(backoff)
+                else:
+                    break
+
+        # All retries failed
+        self.consecutive_failures += 1
+        self.api_available = False
+        self.last_exception = last_exception
+
+        # Check if we have recent good data to fall back on
+        if self.usable_data is not None:
+            # Log warning but only every 4 failures to reduce spam
+            if self.consecutive_failures % 4 == 1:
+                _LOGGER.warning(
+                    "WaterLevel.ie API unavailable (%d consecutive failures), "
+                    "using cached data from %s ago. Last error: %s",
+                    self.consecutive_failures,
+                    dt_util.utcnow() - self.last_successful_update,
+                    last_exception,
+                )
+            return
+
+        # No valid cached data available
+        _LOGGER.error(
+            "%s (failed %d times, no valid cached data available)",
+            self.error_message,
+            self.consecutive_failures,
+        )
+
+    def _parse_data(self, geojson: dict[str, Any]) -> dict[str, Any]:
+        """Parse GeoJSON data into a dictionary of every permitted station."""
+        stations: dict[str, Any] = {}
+        issues = self.feed_issues
+        issues.start()
+
+        for feature in geojson.get("features", []):
+            props = feature.get("properties", {})
+            geometry = feature.get("geometry") or {}
+            coords = geometry.get("coordinates") or []
+            longitude = coords[0] if len(coords) > 0 else None
+            latitude = coords[1] if len(coords) > 1 else None
+            station_id = props.get("station_ref")
+            station_name = props.get("station_name", "Unknown")
+            sensor_type = props.get("sensor_ref")
+            value = props.get("value")
+            timestamp = props.get("datetime")
+            err_code = props.get("err_code")
+
+            if not station_id or not sensor_type:
+                continue
+
+            # Enforce OPW republication restrictions first - only stations
+            # 00001-41000 are permitted for republication.
+            try:
+                station_num = int(station_id)
+                if not (STATION_REF_MIN <= station_num <= STATION_REF_MAX):
+                    issues.add(OUT_OF_RANGE, station_id, station_name)
+                    continue
+            except (ValueError, TypeError):
+                issues.add(INVALID_REF, str(station_id))
+                continue
+
+            if station_id not in stations:
+                stations[station_id] = {
+                    "last_updated": timestamp,
+                    "sensors": {},
+                }
+                # The feed repeats the station's metadata on every reading,
+                # so only compare it once per station; the registry only
+                # changes when the metadata does.
+                self.stations.update(
+                    station_id,
+                    props.get("station_name", station_id),
+                    props.get("region_id"),
+                    latitude,
+                    longitude,
+                )
+
+            try:
+                parsed_value = float(value) if value is not None else None
+            except (ValueError, TypeError):
+                issues.add(INVALID_VALUE, (station_id, sensor_type), value)
+                continue
+
+            reading: dict[str, Any] = {
+                "value": parsed_value,
+                "datetime": timestamp,
+            }
+            # OPW's per-reading status code (99 = normal); kept only when the
+            # feed supplies a usable one.
+            if err_code is not None:
+                try:
+                    reading["err_code"] = int(err_code)
+                except (ValueError, TypeError):
+                    pass
+            stations[station_id]["sensors"][sensor_type] = reading
+
+            # Update last_updated to the latest timestamp. Compare parsed
+            # datetimes rather than raw strings so differing formats/offsets
+            # still order correctly; the original string is kept for display.
+            if timestamp:
+                current = stations[station_id]["last_updated"]
+                new_dt = dt_util.parse_datetime(timestamp)
+                current_dt = dt_util.parse_datetime(current) if current else None
+                if current_dt is None or (new_dt is not None and new_dt > current_dt):
+                    stations[station_id]["last_updated"] = timestamp
+
+        # Filtered stations are logged for transparency (OPW compliance),
+        # like malformed rows, whenever they change.
+        issues.finish()
+
+        # Drop stations that left the feed, then rebuild the picker index only
+        # if the registry actually changed.
+        if stations:
+            self.stations.retain(set(stations))
+            if (
+                self.stations.version != self._index_version
+                or not self.available_stations
+            ):
+                self._index_version = self.stations.version
+                self.available_stations = {
+                    ref: meta.name for ref, meta in self.stations.stations.items()
+                }
+                self.station_regions = {
+                    ref: meta.region for ref, meta in self.stations.stations.items()
+                }
+                self._picker = None
+
+        return stations
@@ -0,0 +1,254 @@
+"""OpenMetrics (Prometheus) exporter for WaterLevel.ie.
+
+Serves every tracked reading at /api/waterlevel_ie/metrics, labelled by
+station ref, river, region and sensor type, together with the feed fetch and
+parse statistics. Going through Home Assistant's generic exporter means one
+entity per reading plus unrelated state; this renders straight from the
+coordinator's parsed data instead.
+
+The text is rendered once per coordinator cycle and served from memory, so
+a scrape costs the same however often it happens. Each entry keeps one
+pre-formatted line per reading and only re-formats the readings in the
+cycle's delta.
+"""
+from __future__ import annotations
+
+from http import HTTPStatus
+import math
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_METRICS
+from .stations import StationRegistry
+
+if TYPE_CHECKING:
+    from .hub import FeedHub
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Per-reading families: name -> (help, unit)
+READING_VALUE = "waterlevel_ie_reading"
+READING_TIMESTAMP = "waterlevel_ie_reading_timestamp_seconds"
+READING_FAMILIES: dict[str, tuple[str, str]] = {
+    READING_VALUE: ("Latest gauge reading in the sensor type's unit.", ""),
+    READING_TIMESTAMP: ("Time of the latest gauge reading.", "seconds"),
+}
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value for the text format."""
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, spelling non-finite values the text format's way."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _family_header(name: str, help_text: str, unit: str = "") -> str:
+    """Return the TYPE/UNIT/HELP lines of a gauge family."""
+    header = f"# TYPE {name} gauge\n"
+    if unit:
+        header += f"# UNIT {name} {unit}\n"
+    return header + f"# HELP {name} {help_text}\n"
+
+
+class EntryMetrics:
+    """Pre-formatted reading lines of one config entry."""
+
+    def __init__(self, entry_id: str | None, river_for_ref: Any) -> None:
+        """Initialize with no readings."""
+        self._entry_id = entry_id or ""
+        self._river_for_ref = river_for_ref
+        self._registry_version = -1
+        # family -> (station_ref, sensor_ref) -> formatted sample line
+        self._lines: dict[str, dict[tuple[str, str], str]] = {
+            family: {} for family in READING_FAMILIES
+        }
+
+    def update(
+        self,
+        data: dict[str, Any],
+        changed: set[tuple[str, str]],
+        removed: set[tuple[str, str]],
+        stations: StationRegistry,
+    ) -> None:
+        """Re-format the readings in the cycle's delta.
+
+        Everything is re-formatted when the station metadata (and so the
+        region labels) changed.
+        """
+        if stations.version != self._registry_version:
+            self._registry_version = stations.version
+            for lines in self._lines.values():
+                lines.clear()
+            changed = {
+                (station_id, sensor_type)
+                for station_id, station in data.items()
+                for sensor_type in station["sensors"]
+            }
+        for key in removed:
+            for lines in self._lines.values():
+                lines.pop(key, None)
+        for key in changed:
+            station_id, sensor_type = key
+            reading = data[station_id]["sensors"][sensor_type]
+            meta = stations.get(station_id)
+            labels = (
+                f'entry_id="{self._entry_id}",station_ref="{_escape(station_id)}",'
+                f'river="{_escape(self._river_for_ref(station_id) or "")}",'
+                f'region="{_escape(meta.region if meta else "")}",'
+                f'sensor_type="{_escape(sensor_type)}"'
+            )
+            self._set(READING_VALUE, key, labels, reading.get("value"))
+            timestamp = reading.get("datetime")
+            parsed = dt_util.parse_datetime(timestamp) if timestamp else None
+            self._set(
+                READING_TIMESTAMP, key, labels, parsed.timestamp() if parsed else None
+            )
+
+    def _set(
+        self, family: str, key: tuple[str, str], labels: str, value: float | None
+    ) -> None:
+        """Store (or drop, when None) one sample line."""
+        if value is None:
+            self._lines[family].pop(key, None)
+        else:
+            self._lines[family][key] = (
+                f"{family}{{{labels}}} {_format_value(value)}\n"
+            )
+
+    def samples(self, family: str) -> str:
+        """Return the formatted sample lines of a family."""
+        return "".join(self._lines[family].values())
+
+
+@callback
+def async_get_exporter(hass: HomeAssistant) -> MetricsExporter:
+    """Return the exporter shared by all entries, registering its view once."""
+    exporter: MetricsExporter | None = hass.data.get(DATA_METRICS)
+    if exporter is None:
+        exporter = hass.data[DATA_METRICS] = MetricsExporter()
+        hass.http.register_view(WaterLevelMetricsView(exporter))
+    return exporter
+
+
+class MetricsExporter:
+    """Assemble the exposition from every entry's pre-rendered samples."""
+
+    def __init__(self) -> None:
+        """Initialize with no entries."""
+        self._entries: dict[str, EntryMetrics] = {}
+        self.body: bytes | None = None
+
+    @callback
+    def async_publish(
+        self, entry_id: str, entry_metrics: EntryMetrics, hub: FeedHub
+    ) -> None:
+        """Re-render the exposition after an entry's update cycle."""
+        self._entries[entry_id] = entry_metrics
+        self._render(hub)
+
+    @callback
+    def async_remove(self, entry_id: str, hub: FeedHub) -> None:
+        """Stop exporting an entry's readings."""
+        if self._entries.pop(entry_id, None) is None:
+            return
+        if self._entries:
+            self._render(hub)
+        else:
+            self.body = None
+
+    def _render(self, hub: FeedHub) -> None:
+        """Render the readings and the feed statistics into self.body."""
+        parts: list[str] = []
+        for family, (help_text, unit) in READING_FAMILIES.items():
+            parts.append(_family_header(family, help_text, unit))
+            parts.extend(entry.samples(family) for entry in self._entries.values())
+
+        last_success = hub.last_successful_update
+        feed_stats: list[tuple[str, str, str, float | None]] = [
+            (
+                "waterlevel_ie_api_up",
+                "Whether the last feed fetch succeeded.",
+                "",
+                1 if hub.api_available else 0,
+            ),
+            (
+                "waterlevel_ie_consecutive_failures",
+                "Feed fetch cycles failed in a row.",
+                "",
+                hub.consecutive_failures,
+            ),
+            (
+                "waterlevel_ie_last_success_timestamp_seconds",
+                "Time of the last successful feed fetch.",
+                "seconds",
+                last_success.timestamp() if last_success else None,
+            ),
+            (
+                "waterlevel_ie_fetch_duration_seconds",
+                "Duration of the last feed download.",
+                "seconds",
+                hub.fetch_duration,
+            ),
+            (
+                "waterlevel_ie_parse_duration_seconds",
+                "Duration of the last feed parse.",
+                "seconds",
+                hub.parse_duration,
+            ),
+            (
+                "waterlevel_ie_feed_wire_bytes",
+                "Compressed size of the last feed download.",
+                "bytes",
+                hub.bytes_on_wire,
+            ),
+            (
+                "waterlevel_ie_feed_decoded_bytes",
+                "Decoded size of the last feed download.",
+                "bytes",
+                hub.bytes_decoded,
+            ),
+            (
+                "waterlevel_ie_stations",
+                "Permitted stations in the feed.",
+                "",
+                len(hub.stations),
+            ),
+        ]
+        for name, help_text, unit, value in feed_stats:
+            parts.append(_family_header(name, help_text, unit))
+            if value is not None:
+                parts.append(f"{name} {_format_value(value)}\n")
+        parts.append("# EOF\n")
+        self.body = "".join(parts).encode()
+
+
+class WaterLevelMetricsView(HomeAssistantView):
+    """Serve the pre-rendered OpenMetrics exposition."""
+
+    url = "/api/waterlevel_ie/metrics"
+    name = "api:waterlevel_ie:metrics"
+
+    def __init__(self, exporter: MetricsExporter) -> None:
+        """Initialize the view."""
+        self._exporter = exporter
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the exposition rendered at the last update cycle."""
+        body = self._exporter.body
+        if body is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        return web.Response(body=body, headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,122 @@
+"""Prebuilt station picker model for the WaterLevel.ie options flow.
+
+Building the picker (river lookup, sort, one option per station, the legacy
+name -> refs map) is proportional to the number of stations, so the
+coordinator keeps one StationPicker and only rebuilds it when the set of
+available stations actually changes. Opening the options dialog then costs a
+dictionary lookup.
+
+The picker also carries a small search index: every station is indexed under
+the words of its name and river, its region ("region 3") and its numeric ref.
+Tokens are kept in one sorted list so a prefix query is a binary search.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+import re
+from typing import Any
+
+from .stations import normalise_name
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> list[str]:
+    """Split text into lower-case alphanumeric search tokens."""
+    return _WORD.findall(text.lower())
+
+
+class StationPicker:
+    """Sorted picker options, river list and search index for the stations."""
+
+    def __init__(
+        self,
+        available: dict[str, str],
+        river_for_ref: dict[str, str],
+        regions: dict[str, Any] | None = None,
+    ) -> None:
+        """Build the picker from {ref: name}, {ref: river} and {ref: region}."""
+        regions = regions or {}
+        self.available = available
+        self.rivers: list[str] = sorted(
+            {river_for_ref[r] for r in available if r in river_for_ref}, key=str.lower
+        )
+
+        # Station selector: one entry per station, labelled "River — Station"
+        # and sorted by river so a system's gauges cluster together; unmatched
+        # stations sort last.
+        def _sort_key(item: tuple[str, str]) -> tuple[str, str]:
+            ref, name = item
+            river = river_for_ref.get(ref)
+            return (river.lower() if river else "~", name.lower())
+
+        self.options: list[dict[str, str]] = []
+        self._position: dict[str, int] = {}
+        for ref, name in sorted(available.items(), key=_sort_key):
+            river = river_for_ref.get(ref)
+            label = f"{river} — {name}" if river else name
+            self._position[ref] = len(self.options)
+            self.options.append({"value": ref, "label": label})
+
+        # A station name can be shared by more than one station, so map each
+        # name to every matching ref rather than a single one.
+        self.name_to_refs: dict[str, list[str]] = {}
+        for ref, name in available.items():
+            self.name_to_refs.setdefault(normalise_name(name), []).append(ref)
+
+        index: set[tuple[str, str]] = set()
+        for ref, name in available.items():
+            words = _tokens(name) + _tokens(river_for_ref.get(ref, ""))
+            region = regions.get(ref)
+            if region is not None:
+                words += ["region", *_tokens(str(region))]
+            if ref.isdigit():
+                words.append(str(int(ref)))
+            index.update((word, ref) for word in words)
+        self._index: list[tuple[str, str]] = sorted(index)
+
+    def __len__(self) -> int:
+        """Return the number of stations in the picker."""
+        return len(self.options)
+
+    def _prefix(self, word: str) -> set[str]:
+        """Return refs with any token starting with word."""
+        refs: set[str] = set()
+        position = bisect_left(self._index, (word, ""))
+        while position < len(self._index):
+            token, ref = self._index[position]
+            if not token.startswith(word):
+                break
+            refs.add(ref)
+            position += 1
+        return refs
+
+    def search(self, query: str) -> list[str]:
+        """Return refs matching every word of the query, in picker order.
+
+        Each query word must prefix-match a word of the station's name, its
+        river, its region or its ref, so "shan ath" finds Athlone on the
+        Shannon and "region 3" lists region 3.
+        """
+        words = _tokens(query)
+        if not words:
+            return [option["value"] for option in self.options]
+        matches: set[str] | None = None
+        for word in words:
+            found = self._prefix(word)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return sorted(matches, key=self._position.__getitem__)
+
+    def filtered_options(
+        self, query: str, keep: list[str] | None = None
+    ) -> list[dict[str, str]]:
+        """Return the options matching a query plus any refs in keep.
+
+        Already-selected stations are always kept so a filtered form does not
+        drop them from the selection.
+        """
+        wanted = set(self.search(query))
+        wanted.update(ref for ref in keep or () if ref in self._position)
+        return [option for option in self.options if option["value"] in wanted]
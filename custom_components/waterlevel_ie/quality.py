@@ -0,0 +1,209 @@
+"""Spike and outlier filtering for WaterLevel.ie readings.
+
+OPW gauges occasionally report spikes, physically impossible jumps or values
+that stop changing because the sensor is stuck. ReadingFilter runs each new
+sample through a few constant-cost checks, keeping a small fixed-size state per
+(station, sensor):
+
+- a plausible range per sensor type (catches sentinel/garbage values),
+- a maximum physical rate of change against the last accepted sample,
+- a rolling median/MAD test over the last few samples (isolated spikes),
+- a stuck-sensor counter (the same value for many consecutive samples).
+
+Each sample gets a quality flag. In "flag" mode the reading keeps its value;
+in "suppress" mode a suspect value is replaced by the last accepted one. The
+raw value is always kept so nothing is lost.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+
+from homeassistant.util import dt as dt_util
+
+from .const import READING_FILTER_FLAG, READING_FILTER_SUPPRESS
+
+QUALITY_OK = "ok"
+QUALITY_OUT_OF_RANGE = "out_of_range"
+QUALITY_RATE = "rate_of_change"
+QUALITY_SPIKE = "spike"
+QUALITY_STUCK = "stuck"
+
+# Samples kept for the rolling median/MAD, and the minimum before it applies.
+WINDOW_SIZE = 7
+WINDOW_MIN = 5
+# A sample is a spike when it is further than this many (scaled) MADs from the
+# rolling median. 1.4826 scales the MAD to a standard deviation for normal data.
+SPIKE_MADS = 6.0
+MAD_SCALE = 1.4826
+# After this many consecutive rejected samples the new level is accepted as
+# genuine (e.g. a gauge re-datum or a real step change).
+REJECT_LIMIT = 3
+
+
+@dataclass(frozen=True)
+class SensorLimits:
+    """Physical plausibility limits for one sensor type."""
+
+    minimum: float
+    maximum: float
+    # Largest plausible change per hour (None = not checked).
+    max_rate_per_hour: float | None
+    # Smallest deviation ever treated as a spike, so flat series (MAD = 0)
+    # are not flagged for ordinary sensor resolution steps.
+    spike_floor: float
+    # Consecutive identical samples before the sensor is considered stuck.
+    stuck_samples: int
+
+
+SENSOR_LIMITS: dict[str, SensorLimits] = {
+    # Water level (m): stage relative to the gauge datum.
+    "0001": SensorLimits(-10.0, 50.0, 1.5, 0.05, 48),
+    # Water temperature (°C).
+    "0002": SensorLimits(-5.0, 40.0, 4.0, 0.5, 96),
+    # Flow rate (m³/s): can legitimately change by orders of magnitude.
+    "0003": SensorLimits(0.0, 5000.0, None, 1.0, 48),
+}
+
+
+class _SensorState:
+    """Rolling filter state for one (station, sensor)."""
+
+    __slots__ = (
+        "window",
+        "last_datetime",
+        "accepted_value",
+        "accepted_time",
+        "rejected",
+        "repeat_count",
+        "last_raw",
+        "result",
+    )
+
+    def __init__(self) -> None:
+        self.window: deque[float] = deque(maxlen=WINDOW_SIZE)
+        self.last_datetime: str | None = None
+        self.accepted_value: float | None = None
+        self.accepted_time: float | None = None
+        self.rejected = 0
+        self.repeat_count = 0
+        self.last_raw: float | None = None
+        self.result: tuple[float | None, str] = (None, QUALITY_OK)
+
+
+class ReadingFilter:
+    """Flag or suppress suspect readings with O(1) work per sample."""
+
+    def __init__(self, mode: str = READING_FILTER_FLAG) -> None:
+        """Initialise the filter in the given mode."""
+        self.mode = mode
+        self._states: dict[tuple[str, str], _SensorState] = {}
+
+    def __len__(self) -> int:
+        """Return the number of (station, sensor) pairs being tracked."""
+        return len(self._states)
+
+    def check(
+        self,
+        station_id: str,
+        sensor_type: str,
+        value: float | None,
+        timestamp: str | None,
+    ) -> tuple[float | None, str]:
+        """Return (value to publish, quality flag) for a reading.
+
+        A sample is only evaluated once: re-reading the same sample on a later
+        poll (same timestamp) returns the earlier verdict without touching the
+        state, so slow-updating gauges are not counted as stuck.
+        """
+        limits = SENSOR_LIMITS.get(sensor_type)
+        if limits is None or value is None:
+            return value, QUALITY_OK
+
+        key = (station_id, sensor_type)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _SensorState()
+        elif timestamp is not None and timestamp == state.last_datetime:
+            return state.result
+        state.last_datetime = timestamp
+
+        quality = self._evaluate(state, limits, value, timestamp)
+        if quality == QUALITY_OK or quality == QUALITY_STUCK:
+            state.rejected = 0
+            state.accepted_value = value
+            state.accepted_time = _epoch(timestamp)
+        else:
+            state.rejected += 1
+            if state.rejected >= REJECT_LIMIT and quality != QUALITY_OUT_OF_RANGE:
+                # Persistently "suspect" means the level genuinely moved; take
+                # it as the new baseline instead of suppressing it forever.
+                state.rejected = 0
+                state.accepted_value = value
+                state.accepted_time = _epoch(timestamp)
+                quality = QUALITY_OK
+
+        if quality != QUALITY_OUT_OF_RANGE:
+            state.window.append(value)
+
+        published = value
+        suspect = quality not in (QUALITY_OK, QUALITY_STUCK)
+        if suspect and self.mode == READING_FILTER_SUPPRESS:
+            published = state.accepted_value
+        state.result = (published, quality)
+        return state.result
+
+    @staticmethod
+    def _evaluate(
+        state: _SensorState,
+        limits: SensorLimits,
+        value: float,
+        timestamp: str | None,
+    ) -> str:
+        """Classify a new sample against the sensor's state and limits."""
+        if not limits.minimum <= value <= limits.maximum:
+            return QUALITY_OUT_OF_RANGE
+
+        if (
+            limits.max_rate_per_hour is not None
+            and state.accepted_value is not None
+            and state.accepted_time is not None
+        ):
+            now = _epoch(timestamp)
+            if now is not None and now > state.accepted_time:
+                hours = (now - state.accepted_time) / 3600
+                # Allow at least a quarter-hour's worth of change so closely
+                # spaced samples are not held to an unrealistically tight bound.
+                allowed = limits.max_rate_per_hour * max(hours, 0.25)
+                if abs(value - state.accepted_value) > allowed:
+                    return QUALITY_RATE
+
+        if len(state.window) >= WINDOW_MIN:
+            ordered = sorted(state.window)
+            median = ordered[len(ordered) // 2]
+            mad = sorted(abs(v - median) for v in ordered)[len(ordered) // 2]
+            threshold = max(SPIKE_MADS * MAD_SCALE * mad, limits.spike_floor)
+            if abs(value - median) > threshold:
+                return QUALITY_SPIKE
+
+        if value == state.last_raw:
+            state.repeat_count += 1
+        else:
+            state.repeat_count = 0
+            state.last_raw = value
+        if state.repeat_count >= limits.stuck_samples:
+            return QUALITY_STUCK
+        return QUALITY_OK
+
+    def prune(self, keep: set[tuple[str, str]]) -> None:
+        """Drop state for (station, sensor) pairs no longer in the feed."""
+        for key in [k for k in self._states if k not in keep]:
+            del self._states[key]
+
+
+def _epoch(timestamp: str | None) -> float | None:
+    """Return a reading timestamp as POSIX seconds, or None if unparseable."""
+    if not timestamp:
+        return None
+    parsed = dt_util.parse_datetime(timestamp)
+    return parsed.timestamp() if parsed else None
@@ -1,9 +1,10 @@
 """River lookup for WaterLevel.ie stations.
 
 Maps station references to the river they sit on, using a static map generated
-offline from the EPA river network (1:50,000). Used to group/filter stations by
-river system in the options flow. Stations not in the map (coastal, tidal or
-lake gauges) simply have no river.
+offline from the EPA river network (1:50,000) by
+scripts/generate_station_rivers.py. Used to group/filter stations by river
+system in the options flow. Stations not in the map (coastal, tidal or lake
+gauges) simply have no river.
 """
 from __future__ import annotations
 
@@ -11,6 +12,10 @@ import json
 import logging
 import os
 from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +35,15 @@ def _river_map() -> dict[str, str]:
     return {}
 
 
+async def async_load_river_map(hass: HomeAssistant) -> None:
+    """Load the map in the executor, unless it is already loaded.
+
+    The lookups below read the cached map and are then safe on the event loop.
+    """
+    if not _river_map.cache_info().currsize:
+        await hass.async_add_executor_job(_river_map)
+
+
 def station_river_map() -> dict[str, str]:
     """Return a copy of the full station_ref -> river name map."""
     return dict(_river_map())
@@ -1,12 +1,16 @@
 """Sensor platform for WaterLevel.ie integration."""
 from __future__ import annotations
 
+from collections.abc import Iterable
 import logging
 from typing import Any
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
@@ -53,6 +57,50 @@ SENSOR_PRECISION: dict[str, int] = {
     "OD": 2,  # Ordnance datum to cm precision
 }
 
+# Near-constant sensor types that recorder footprint mode shows as an
+# attribute of the station's other sensors instead of as an entity:
+# sensor type -> attribute name
+STATIC_SENSOR_ATTRIBUTES: dict[str, str] = {
+    "OD": "ordnance_datum",
+}
+
+# Attributes that never (or hardly ever) change; footprint mode keeps them
+# out of the recorder. Attribution is never recorded anyway.
+STATIC_ATTRIBUTES = frozenset(
+    {
+        "region",
+        "latitude",
+        "longitude",
+        "location_link",
+        *STATIC_SENSOR_ATTRIBUTES.values(),
+    }
+)
+
+# Attributes that change with every reading or cycle. Each change would
+# otherwise store a fresh state_attributes row; footprint mode leaves them
+# out of the recorder too; they are still shown on the sensor.
+CYCLE_ATTRIBUTES = frozenset({"last_updated", "data_age_hours"})
+
+# Aggregate sensors created on every river system device: key -> name
+RIVER_AGGREGATE_NAMES: dict[str, str] = {
+    "max_level": "Highest Water Level",
+    "min_level": "Lowest Water Level",
+    "mean_level": "Mean Water Level",
+    "stations_in_alarm": "Stations in Alarm",
+    "latest_gauge": "Latest Gauge",
+}
+
+RIVER_AGGREGATE_ICONS: dict[str, str] = {
+    "max_level": "mdi:arrow-collapse-up",
+    "min_level": "mdi:arrow-collapse-down",
+    "mean_level": "mdi:waves",
+    "stations_in_alarm": "mdi:alert",
+    "latest_gauge": "mdi:clock-outline",
+}
+
+# Aggregates that are water levels (metres) rather than counts/labels
+RIVER_LEVEL_AGGREGATES = {"max_level", "min_level", "mean_level"}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -61,26 +109,169 @@ async def async_setup_entry(
 ) -> None:
     """Set up WaterLevel.ie sensors."""
     coordinator: WaterLevelDataCoordinator = hass.data[DOMAIN][entry.entry_id]
-    known: set[tuple[str, str]] = set()
+    # Entities created so far, by reading / river / lead-time station (None
+    # for readings shown as attributes instead).
+    known: dict[tuple[str, str], WaterLevelSensor | None] = {}
+    known_rivers: dict[str, list[WaterLevelRiverSensor]] = {}
+    known_lead_time: dict[str, WaterLevelLeadTimeSensor] = {}
+    # Stations with entities, per river, so a river's sensors go with its
+    # last station without rescanning the others.
+    river_stations: dict[str, set[str]] = {}
+    selection_version = coordinator.selection_version
+    delta_cycle = coordinator.delta_cycle
+    ent_reg = er.async_get(hass)
+    footprint = coordinator.recorder_footprint
+    sensor_class = WaterLevelFootprintSensor if footprint else WaterLevelSensor
+
+    # Static sensor types are attributes in footprint mode. Their entities
+    # are disabled rather than removed, so renames, areas and other
+    # customisations come back if the mode is turned off again.
+    static_suffixes = tuple(f"_{t}" for t in STATIC_SENSOR_ATTRIBUTES)
+    by_integration = er.RegistryEntryDisabler.INTEGRATION
+    for entity in er.async_entries_for_config_entry(ent_reg, entry.entry_id):
+        if entity.domain != "sensor" or not entity.unique_id.endswith(
+            static_suffixes
+        ):
+            continue
+        if footprint and entity.disabled_by is None:
+            ent_reg.async_update_entity(entity.entity_id, disabled_by=by_integration)
+        elif not footprint and entity.disabled_by == by_integration:
+            ent_reg.async_update_entity(entity.entity_id, disabled_by=None)
+
+    @callback
+    def _remove_entities(entities: list[SensorEntity], deselected: bool) -> None:
+        """Remove entities from HA, and from the registry if deselected.
+
+        Entities of a station that merely dropped out of the feed keep their
+        registry entries (and any customisation) for when it comes back.
+        """
+        for entity in entities:
+            if deselected:
+                if entity.registry_entry is not None:
+                    ent_reg.async_remove(entity.entity_id)
+            elif entity.hass is not None:
+                hass.async_create_task(entity.async_remove())
+
+    @callback
+    def _add_readings(keys: Iterable[tuple[str, str]]) -> list[SensorEntity]:
+        """Create entities for new readings, and their rivers and lead times."""
+        new_entities: list[SensorEntity] = []
+        targets = coordinator.propagation.targets
+        for key in keys:
+            if key in known:
+                continue
+            station_id, sensor_type = key
+            if footprint and sensor_type in STATIC_SENSOR_ATTRIBUTES:
+                known[key] = None
+            else:
+                entity = known[key] = sensor_class(
+                    coordinator, station_id, sensor_type
+                )
+                new_entities.append(entity)
+            if (river := rivers_mod.river_for_ref(station_id)) is not None:
+                river_stations.setdefault(river, set()).add(station_id)
+                if river not in known_rivers:
+                    known_rivers[river] = [
+                        WaterLevelRiverSensor(coordinator, river, kind)
+                        for kind in RIVER_AGGREGATE_NAMES
+                    ]
+                    new_entities.extend(known_rivers[river])
+            if station_id in targets and station_id not in known_lead_time:
+                entity = known_lead_time[station_id] = WaterLevelLeadTimeSensor(
+                    coordinator, station_id
+                )
+                new_entities.append(entity)
+        return new_entities
 
     @callback
-    def _add_new_entities() -> None:
-        """Add entities for any stations/sensors not seen before."""
-        new_entities: list[WaterLevelSensor] = []
-        for station_id, station in coordinator.data.items():
-            for sensor_type in station["sensors"]:
-                key = (station_id, sensor_type)
-                if key not in known:
-                    known.add(key)
-                    new_entities.append(
-                        WaterLevelSensor(coordinator, station_id, sensor_type)
-                    )
+    def _remove_readings(keys: Iterable[tuple[str, str]], deselected: bool) -> None:
+        """Remove entities of readings gone, and of rivers left without a station."""
+        data = coordinator.data
+        stale: list[SensorEntity] = []
+        for key in keys:
+            if (entity := known.pop(key, None)) is not None:
+                stale.append(entity)
+            station_id = key[0]
+            if station_id in data:
+                continue
+            if (lead_time := known_lead_time.pop(station_id, None)) is not None:
+                stale.append(lead_time)
+            river = rivers_mod.river_for_ref(station_id)
+            if (stations := river_stations.get(river)) is not None:
+                stations.discard(station_id)
+                if not stations:
+                    del river_stations[river]
+                    stale.extend(known_rivers.pop(river, ()))
+        _remove_entities(stale, deselected)
+
+    @callback
+    def _sync_lead_time() -> list[SensorEntity]:
+        """Match lead-time sensors to the current propagation targets."""
+        data = coordinator.data
+        targets = coordinator.propagation.targets
+        _remove_entities(
+            [
+                known_lead_time.pop(ref)
+                for ref in list(known_lead_time)
+                if ref not in targets or ref not in data
+            ],
+            True,
+        )
+        new_entities: list[SensorEntity] = []
+        for station_id in targets:
+            if station_id in data and station_id not in known_lead_time:
+                entity = known_lead_time[station_id] = WaterLevelLeadTimeSensor(
+                    coordinator, station_id
+                )
+                new_entities.append(entity)
+        return new_entities
+
+    @callback
+    def _apply_delta() -> None:
+        """Add and remove entities from the readings added and removed this cycle.
+
+        A cycle that adds or removes nothing costs the same however many
+        stations are tracked. Should a cycle have been missed, the known
+        readings are compared with the whole data instead.
+        """
+        nonlocal delta_cycle, selection_version
+        cycle = coordinator.delta_cycle
+        if cycle == delta_cycle:
+            return
+        reselected = coordinator.selection_version != selection_version
+        selection_version = coordinator.selection_version
+        if cycle == delta_cycle + 1:
+            added: set[tuple[str, str]] = coordinator.added_readings
+            removed: set[tuple[str, str]] = coordinator.removed_readings
+        else:
+            current = {
+                (station_id, sensor_type)
+                for station_id, station in coordinator.data.items()
+                for sensor_type in station["sensors"]
+            }
+            added = current - known.keys()
+            removed = known.keys() - current
+        delta_cycle = cycle
+        if removed:
+            _remove_readings(removed, reselected)
+        new_entities = _add_readings(added) if added else []
+        if reselected:
+            new_entities.extend(_sync_lead_time())
         if new_entities:
             async_add_entities(new_entities)
 
-    # Initial population, then add any new stations that appear in later updates
-    _add_new_entities()
-    entry.async_on_unload(coordinator.async_add_listener(_add_new_entities))
+    # Initial population, then follow each update's delta
+    async_add_entities(
+        [
+            WaterLevelStaleStationsSensor(coordinator),
+            *_add_readings(
+                (station_id, sensor_type)
+                for station_id, station in coordinator.data.items()
+                for sensor_type in station["sensors"]
+            ),
+        ]
+    )
+    entry.async_on_unload(coordinator.async_add_listener(_apply_delta))
 
 
 class WaterLevelSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntity):
@@ -99,21 +290,25 @@ class WaterLevelSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntit
         self._station_id = station_id
         self._sensor_type = sensor_type
 
-        # Precompute names and location
-        station = coordinator.data.get(station_id, {})
-        self._station_name = station.get("name", station_id)
+        # Precompute names; location and region come from the shared station
+        # metadata, which carries the parsed coordinates and map link.
+        self._station_name = coordinator.station_name(station_id)
         self._sensor_name = SENSOR_NAMES.get(sensor_type, sensor_type)
+        # Set once the state has been written with the station dormant.
+        self._paused = False
 
-        # Parse coordinates safely
-        try:
-            location = station.get("location", "0,0")
-            lat_str, lon_str = location.split(", ")
-            self._lat = float(lat_str)
-            self._lon = float(lon_str)
-        except (ValueError, AttributeError):
-            _LOGGER.warning("Invalid location format for station %s", station_id)
-            self._lat = 0.0
-            self._lon = 0.0
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state, except while the station is paused as dormant."""
+        coordinator = self.coordinator
+        dormant = (
+            coordinator.pause_dormant
+            and self._station_id in coordinator.freshness.dormant
+        )
+        if dormant and self._paused:
+            return
+        self._paused = dormant
+        super()._handle_coordinator_update()
 
     @property
     def name(self) -> str:
@@ -123,7 +318,9 @@ class WaterLevelSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntit
     @property
     def unique_id(self) -> str:
         """Unique ID for entity registry. Preserves history."""
-        return f"{self._station_id}_{self._sensor_type}"
+        return (
+            f"{self.coordinator.unique_id_prefix}{self._station_id}_{self._sensor_type}"
+        )
 
     @property
     def native_value(self) -> float | None:
@@ -166,16 +363,30 @@ class WaterLevelSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntit
         """Extra attributes like location and timestamp."""
         station = self.coordinator.data.get(self._station_id, {})
         sensor_info = station.get("sensors", {}).get(self._sensor_type, {})
+        meta = self.coordinator.stations.get(self._station_id)
 
         attrs = {
-            "region": station.get("region"),
+            "region": meta.region if meta else None,
             "last_updated": sensor_info.get("datetime"),
-            "latitude": self._lat,
-            "longitude": self._lon,
-            "location_link": f"https://www.google.com/maps/search/?api=1&query={self._lat},{self._lon}",
+            "latitude": meta.latitude if meta else None,
+            "longitude": meta.longitude if meta else None,
+            "location_link": meta.location_link if meta else None,
+            "stale": self._station_id in self.coordinator.freshness.stale,
             "attribution": "Data provided by WaterLevel.ie (OPW)",
         }
 
+        # Footprint mode: near-constant readings of the station ride along.
+        if self.coordinator.recorder_footprint:
+            for sensor_type, attribute in STATIC_SENSOR_ATTRIBUTES.items():
+                reading = station.get("sensors", {}).get(sensor_type)
+                if reading is not None:
+                    attrs[attribute] = reading.get("value")
+
+        # Present only when the spike/outlier filter is enabled.
+        if "quality" in sensor_info:
+            attrs["raw_value"] = sensor_info.get("raw_value")
+            attrs["quality"] = sensor_info["quality"]
+
         # Add information about cached data if API is unavailable
         if not self.coordinator.api_available and self.coordinator.last_successful_update:
             attrs["using_cached_data"] = True
@@ -208,3 +419,220 @@ class WaterLevelSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntit
         if river:
             info["via_device"] = (DOMAIN, f"river:{river}")
         return info
+
+
+class WaterLevelFootprintSensor(WaterLevelSensor):
+    """WaterLevelSensor that records only the attributes that matter to history."""
+
+    _unrecorded_attributes = STATIC_ATTRIBUTES | CYCLE_ATTRIBUTES
+
+
+class WaterLevelRiverSensor(CoordinatorEntity[WaterLevelDataCoordinator], SensorEntity):
+    """Aggregate over every tracked gauge on one river system."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: WaterLevelDataCoordinator,
+        river: str,
+        kind: str,
+    ) -> None:
+        """Initialize the river aggregate sensor."""
+        super().__init__(coordinator)
+        self._river = river
+        self._kind = kind
+        self._attr_name = RIVER_AGGREGATE_NAMES[kind]
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}river:{river}_{kind}"
+        self._attr_icon = RIVER_AGGREGATE_ICONS[kind]
+        if kind in RIVER_LEVEL_AGGREGATES:
+            self._attr_native_unit_of_measurement = SENSOR_UNITS["0001"]
+            self._attr_device_class = SensorDeviceClass.DISTANCE
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+            self._attr_suggested_display_precision = SENSOR_PRECISION["0001"]
+        elif kind == "stations_in_alarm":
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def available(self) -> bool:
+        """Available while at least one gauge on the river contributes."""
+        return (
+            super().available
+            and self.coordinator.river_aggregates.get(self._river) is not None
+        )
+
+    @property
+    def native_value(self) -> float | int | str | None:
+        """Return the aggregate value."""
+        stats = self.coordinator.river_aggregates.get(self._river)
+        if stats is None:
+            return None
+        if self._kind == "max_level":
+            top = stats.max
+            return top[1] if top else None
+        if self._kind == "min_level":
+            bottom = stats.min
+            return bottom[1] if bottom else None
+        if self._kind == "mean_level":
+            mean = stats.mean
+            return round(mean, 3) if mean is not None else None
+        if self._kind == "stations_in_alarm":
+            return len(stats.alarms)
+        latest = stats.latest
+        return self.coordinator.station_name(latest[0]) if latest else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Identify the gauge(s) behind the aggregate."""
+        stats = self.coordinator.river_aggregates.get(self._river)
+        attrs: dict[str, Any] = {
+            "river": self._river,
+            "attribution": "Data provided by WaterLevel.ie (OPW)",
+        }
+        if stats is None:
+            return attrs
+        if self._kind in ("max_level", "min_level"):
+            entry = stats.max if self._kind == "max_level" else stats.min
+            if entry:
+                attrs["station_ref"] = entry[0]
+                attrs["station_name"] = self.coordinator.station_name(entry[0])
+        elif self._kind == "mean_level":
+            attrs["station_count"] = stats.count
+        elif self._kind == "stations_in_alarm":
+            attrs["stations"] = sorted(
+                self.coordinator.station_name(ref) for ref in stats.alarms
+            )
+        else:
+            latest = stats.latest
+            if latest:
+                attrs["station_ref"] = latest[0]
+                attrs["last_updated"] = self.coordinator.data.get(
+                    latest[0], {}
+                ).get("last_updated")
+        return attrs
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        """Attach to the river system device created at setup."""
+        return {
+            "identifiers": {(DOMAIN, f"river:{self._river}")},
+            "name": self._river,
+            "manufacturer": "WaterLevel.ie",
+            "model": "River system",
+            "entry_type": DeviceEntryType.SERVICE,
+            "configuration_url": "https://waterlevel.ie/",
+        }
+
+
+class WaterLevelLeadTimeSensor(
+    CoordinatorEntity[WaterLevelDataCoordinator], SensorEntity
+):
+    """Hours until a rise detected at the upstream gauge reaches this station."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Upstream Rise ETA"
+    _attr_icon = "mdi:timer-sand"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 1
+
+    def __init__(
+        self,
+        coordinator: WaterLevelDataCoordinator,
+        station_id: str,
+    ) -> None:
+        """Initialize the lead-time sensor."""
+        super().__init__(coordinator)
+        self._station_id = station_id
+        self._attr_unique_id = (
+            f"{coordinator.unique_id_prefix}{station_id}_upstream_eta"
+        )
+        self._station_name = coordinator.station_name(station_id)
+        self._status = coordinator.propagation.rise_status(
+            station_id, coordinator.history
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Evaluate the upstream rise once per update."""
+        self._status = self.coordinator.propagation.rise_status(
+            self._station_id, self.coordinator.history
+        )
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the ETA in hours while an upstream rise is in progress."""
+        return self._status["eta_hours"] if self._status else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Describe the upstream gauge, the rise and the lag estimate."""
+        status = self._status
+        if status is None:
+            return {"rise_detected": False, "upstream_station_ref": None}
+        upstream = status["upstream"]
+        attrs: dict[str, Any] = {
+            "rise_detected": status["rise_detected"],
+            "upstream_station_ref": upstream,
+            "upstream_station_name": self.coordinator.station_name(upstream),
+        }
+        for key in ("rise_m", "lag_hours", "correlation"):
+            if key in status:
+                attrs[key] = status[key]
+        return attrs
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        """Attach to the station's device."""
+        return {
+            "identifiers": {(DOMAIN, self._station_id)},
+            "name": self._station_name,
+            "manufacturer": "WaterLevel.ie",
+            "model": "Hydrometric Station",
+            "configuration_url": "https://waterlevel.ie/",
+        }
+
+
+class WaterLevelStaleStationsSensor(
+    CoordinatorEntity[WaterLevelDataCoordinator], SensorEntity
+):
+    """Number of tracked stations that have stopped reporting."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Stale Stations"
+    _attr_icon = "mdi:clock-alert-outline"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: WaterLevelDataCoordinator) -> None:
+        """Initialize the stale station count sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}{DOMAIN}_stale_stations"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of stale stations."""
+        return len(self.coordinator.freshness.stale)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Name the stale and dormant stations and the thresholds."""
+        freshness = self.coordinator.freshness
+        return {
+            "stale_after_hours": freshness.stale_after.total_seconds() / 3600,
+            "dormant_after_hours": freshness.dormant_after.total_seconds() / 3600,
+            "stations": sorted(map(self.coordinator.station_name, freshness.stale)),
+            "dormant_stations": len(freshness.dormant),
+            "dormant_paused": self.coordinator.pause_dormant,
+        }
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        """Attach to the WaterLevel.ie service device."""
+        return {
+            "identifiers": {(DOMAIN, "waterlevel_ie_service")},
+            "name": "! WaterLevel.ie API",
+            "manufacturer": "OPW Ireland",
+            "model": "API Service",
+            "configuration_url": "https://waterlevel.ie/",
+        }
@@ -0,0 +1,155 @@
+"""Services for WaterLevel.ie."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import (
+    ServiceValidationError,
+    Unauthorized,
+    UnknownUser,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .archive import (
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_PARQUET,
+    EXPORT_FORMATS,
+    async_get_archive,
+)
+from .const import DATA_HUB, DOMAIN, SERVICE_EXPORT
+from . import rivers as rivers_mod
+
+# Exports are written here, under the config directory.
+EXPORT_DIR = f"{DOMAIN}_exports"
+
+ATTR_STATION_REFS = "station_refs"
+ATTR_RIVERS = "rivers"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+ATTR_FILENAME = "filename"
+
+
+def _plain_filename(value: Any) -> str:
+    """Validate a bare file name (no directories)."""
+    name = cv.string(value).strip()
+    if not name or Path(name).name != name or name.startswith("."):
+        raise vol.Invalid("filename must be a plain file name")
+    return name
+
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_STATION_REFS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_RIVERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_FILENAME): _plain_filename,
+    }
+)
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def export(call: ServiceCall) -> ServiceResponse:
+        """Export archived readings to a file in the exports folder."""
+        start = call.data.get(ATTR_START)
+        end = call.data.get(ATTR_END)
+        # Naive times are taken as Home Assistant's local time.
+        if start is not None and start.tzinfo is None:
+            start = start.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        if end is not None and end.tzinfo is None:
+            end = end.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        if start is not None and end is not None and start > end:
+            raise ServiceValidationError("start must be before end")
+
+        station_refs: set[str] | None = None
+        if call.data.get(ATTR_STATION_REFS) or call.data.get(ATTR_RIVERS):
+            station_refs = set(call.data.get(ATTR_STATION_REFS, []))
+            if rivers := call.data.get(ATTR_RIVERS):
+                station_refs |= await hass.async_add_executor_job(
+                    rivers_mod.refs_for_rivers, rivers
+                )
+
+        export_format = call.data[ATTR_FORMAT]
+        extension = "parquet" if export_format == EXPORT_FORMAT_PARQUET else "csv"
+        filename = call.data.get(ATTR_FILENAME) or (
+            f"{DOMAIN}_{dt_util.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{extension}"
+        )
+        path = Path(hass.config.path(EXPORT_DIR, filename))
+        if not await hass.async_add_executor_job(
+            hass.config.is_allowed_path, str(path)
+        ):
+            raise ServiceValidationError(
+                f"Cannot write to {path.parent}; add it to "
+                "allowlist_external_dirs in your configuration"
+            )
+
+        # Names and regions come from the live station registry when an
+        # entry is loaded, rivers from the bundled map. Both change on the
+        # event loop, so the columns are looked up here for the executor.
+        await rivers_mod.async_load_river_map(hass)
+        hub = hass.data.get(DATA_HUB)
+        registry = hub.stations if hub is not None else None
+        refs = station_refs
+        if refs is None:
+            refs = set(rivers_mod.station_river_map())
+            if registry is not None:
+                refs |= registry.stations.keys()
+        stations: dict[str, tuple[str, str | None, Any]] = {}
+        for ref in refs:
+            meta = registry.get(ref) if registry is not None else None
+            stations[ref] = (
+                meta.name if meta else ref,
+                rivers_mod.river_for_ref(ref),
+                meta.region if meta else None,
+            )
+
+        archive = async_get_archive(hass)
+        rows = await hass.async_add_executor_job(
+            archive.export,
+            path,
+            export_format,
+            start,
+            end,
+            station_refs,
+            stations,
+            archive.pending_rows(),
+        )
+        return {"path": str(path), "rows": rows}
+
+    async def admin_export(call: ServiceCall) -> ServiceResponse:
+        """Run the export for administrators only.
+
+        Mirrors homeassistant.helpers.service.async_register_admin_service,
+        which cannot register a service that returns a response.
+        """
+        if call.context.user_id:
+            user = await hass.auth.async_get_user(call.context.user_id)
+            if user is None:
+                raise UnknownUser(context=call.context)
+            if not user.is_admin:
+                raise Unauthorized(context=call.context)
+        return await export(call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT,
+        admin_export,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,218 @@
+"""Per-station readings and the choice between the two OPW feed sources.
+
+The national geojson/latest/ feed carries every station, so an entry tracking
+a handful of gauges downloads and parses hundreds of stations it drops. OPW
+also publishes each sensor's recent readings on its own (STATION_API_URL, a
+small CSV of time,value rows); fetching those for the tracked stations can
+be far cheaper. FeedCostModel compares the two from the tracked station
+count and the payload sizes actually observed, and the hub fetches either
+the full feed or a bounded-concurrency fan-out of per-sensor requests. Both
+produce the same snapshot:
+
+    {station_ref: {"last_updated": ..., "sensors": {sensor_ref: reading}}}
+
+The per-sensor files carry no metadata or OPW status code, and only cover
+stations already known, so the full feed is still fetched on startup, when
+the selection grows, and at least every FULL_FEED_REFRESH to pick up
+metadata, status codes and new sensors; in between the status code of the
+last full fetch is kept, and so are the Ordnance Datum readings, which are
+not re-fetched. The per-sensor URL layout is not part of OPW's documented
+API: a 404 for any file makes the hub fall back to the full feed for good.
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta, timezone
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import MIN_UPDATE_INTERVAL
+from .propagation import DATUM_SENSOR
+
+# Longest a per-station snapshot may go without a full-feed fetch.
+FULL_FEED_REFRESH = timedelta(hours=6)
+
+# OPW asks for at most one feed request per MIN_UPDATE_INTERVAL and gives no
+# limit for the per-sensor files, so those are counted in the same rolling
+# window (STATION_REQUEST_WINDOW) and capped at STATION_REQUEST_BUDGET. The
+# cap keeps a window's requests below the one feed request they replace,
+# whatever sizes the cost model has observed since: at the built-in
+# estimates a file costs about 3.5 KB on the wire with request overhead, so
+# 8 of them stay under the gzipped feed's 31.5 KB. At most
+# STATION_FETCH_CONCURRENCY are in flight at once.
+STATION_REQUEST_WINDOW = MIN_UPDATE_INTERVAL * 60  # seconds
+STATION_REQUEST_BUDGET = 8
+STATION_FETCH_CONCURRENCY = 4
+
+# Sensor types that do not change between full-feed fetches: their last
+# reading is carried over instead of fetched per station.
+CARRIED_SENSORS = frozenset({DATUM_SENSOR})
+
+# Cost of a request (headers, TLS and round trip) in bytes on the wire, and
+# of a decoded byte (JSON/CSV parsing) relative to one on the wire.
+REQUEST_COST_BYTES = 1500
+DECODE_COST = 0.1
+
+# Payload estimates until sizes have been observed: the full feed as seen in
+# 2026 (gzip) and one sensor's day of 15-minute readings.
+FULL_FEED_ESTIMATE = (30_000, 550_000)
+STATION_ESTIMATE = (2_000, 3_500)
+
+# Weight of a new observation in the running payload averages.
+_SMOOTHING = 0.3
+
+SOURCE_FULL_FEED = "full_feed"
+SOURCE_PER_STATION = "per_station"
+
+
+def station_number(station_ref: str) -> str:
+    """Return the five-digit station number OPW uses in per-station URLs."""
+    return f"{int(station_ref):05d}"
+
+
+def latest_reading(text: str) -> tuple[str, float] | None:
+    """Return the newest (ISO 8601 UTC time, value) of a time,value CSV.
+
+    Header, blank and unparseable rows are skipped; naive times are UTC.
+    """
+    latest: tuple[Any, float] | None = None
+    for line in text.splitlines():
+        time_str, _, value_str = line.partition(",")
+        parsed = dt_util.parse_datetime(time_str.strip())
+        if parsed is None:
+            continue
+        try:
+            value = float(value_str.split(",", 1)[0])
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        if latest is None or parsed > latest[0]:
+            latest = (parsed, value)
+    if latest is None:
+        return None
+    stamp = latest[0].astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+    return stamp, latest[1]
+
+
+def station_snapshot(
+    previous: dict[str, Any],
+    readings: dict[tuple[str, str], tuple[str, float] | None],
+) -> dict[str, Any]:
+    """Build a snapshot of the fetched stations in the full feed's shape.
+
+    Sensors whose file had no usable row keep their previous reading, as do
+    the CARRIED_SENSORS of each station, and each reading keeps the previous
+    OPW status code.
+    """
+    stations: dict[str, Any] = {}
+    for (station_id, sensor_type), latest in readings.items():
+        old_station = previous.get(station_id, {})
+        old = old_station.get("sensors", {}).get(sensor_type)
+        station = stations.setdefault(
+            station_id,
+            {"last_updated": old_station.get("last_updated"), "sensors": {}},
+        )
+        if latest is None:
+            if old is not None:
+                station["sensors"][sensor_type] = old
+            continue
+        timestamp, value = latest
+        reading: dict[str, Any] = {"value": value, "datetime": timestamp}
+        if old is not None and "err_code" in old:
+            reading["err_code"] = old["err_code"]
+        station["sensors"][sensor_type] = reading
+        current = station["last_updated"]
+        current_dt = dt_util.parse_datetime(current) if current else None
+        if current_dt is None or dt_util.parse_datetime(timestamp) > current_dt:
+            station["last_updated"] = timestamp
+    for station_id, station in stations.items():
+        old_sensors = previous.get(station_id, {}).get("sensors", {})
+        for sensor_type in CARRIED_SENSORS & old_sensors.keys():
+            station["sensors"].setdefault(sensor_type, old_sensors[sensor_type])
+    return {ref: station for ref, station in stations.items() if station["sensors"]}
+
+
+class RequestBudget:
+    """Per-station requests made in the last STATION_REQUEST_WINDOW."""
+
+    def __init__(
+        self,
+        limit: int = STATION_REQUEST_BUDGET,
+        window: float = STATION_REQUEST_WINDOW,
+    ) -> None:
+        """Initialize an unspent budget."""
+        self.limit = limit
+        self.window = window
+        self._sent: deque[float] = deque()
+
+    def remaining(self, now: float) -> int:
+        """Return how many requests may still be made at monotonic time now."""
+        while self._sent and now - self._sent[0] >= self.window:
+            self._sent.popleft()
+        return self.limit - len(self._sent)
+
+    def spend(self, requests: int, now: float) -> None:
+        """Count requests made at monotonic time now."""
+        self._sent.extend([now] * requests)
+
+
+class FeedCostModel:
+    """Running payload sizes of both sources and the cheaper choice."""
+
+    def __init__(self) -> None:
+        """Initialize with the built-in estimates."""
+        self.full_feed = FULL_FEED_ESTIMATE
+        self.per_request = STATION_ESTIMATE
+
+    @staticmethod
+    def _blend(
+        old: tuple[float, float], wire: float, decoded: float
+    ) -> tuple[float, float]:
+        """Return (wire, decoded) averages moved towards an observation."""
+        return (
+            old[0] + _SMOOTHING * (wire - old[0]),
+            old[1] + _SMOOTHING * (decoded - old[1]),
+        )
+
+    def observe_full_feed(self, wire: int, decoded: int) -> None:
+        """Record the sizes of a full-feed download."""
+        self.full_feed = self._blend(self.full_feed, wire, decoded)
+
+    def observe_station(self, requests: int, wire: int, decoded: int) -> None:
+        """Record the total sizes of a per-station cycle."""
+        if requests:
+            self.per_request = self._blend(
+                self.per_request, wire / requests, decoded / requests
+            )
+
+    @staticmethod
+    def _cost(sizes: tuple[float, float], requests: int) -> float:
+        """Return the cost of n requests of the given average sizes."""
+        wire, decoded = sizes
+        return requests * (wire + DECODE_COST * decoded + REQUEST_COST_BYTES)
+
+    def full_feed_cost(self) -> float:
+        """Return the estimated cost of one full-feed fetch."""
+        return self._cost(self.full_feed, 1)
+
+    def station_cost(self, requests: int) -> float:
+        """Return the estimated cost of a per-station cycle of n requests."""
+        return self._cost(self.per_request, requests)
+
+    def choose(self, requests: int) -> str:
+        """Return the cheaper source for a cycle of n per-sensor requests."""
+        if requests > STATION_REQUEST_BUDGET:
+            return SOURCE_FULL_FEED
+        if self.station_cost(requests) < self.full_feed_cost():
+            return SOURCE_PER_STATION
+        return SOURCE_FULL_FEED
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the model's current sizes, for diagnostics."""
+        return {
+            "full_feed_bytes": [round(size) for size in self.full_feed],
+            "per_request_bytes": [round(size) for size in self.per_request],
+            "full_feed_cost": round(self.full_feed_cost()),
+        }
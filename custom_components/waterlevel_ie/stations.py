@@ -0,0 +1,141 @@
+"""Static station metadata for WaterLevel.ie.
+
+Station name, region and coordinates hardly ever change, yet the feed repeats
+them on every reading. Rather than copying them into the per-cycle snapshot,
+the coordinator keeps one StationMeta per permitted station in a
+StationRegistry. The registry is only touched when the feed's metadata for a
+station differs from what is held, is persisted separately from the readings
+(and only when it changed), and sensors reference the shared objects with
+derived values such as the map link computed once.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any
+
+MAPS_URL = "https://www.google.com/maps/search/?api=1&query={lat},{lon}"
+
+
+def normalise_name(name: str) -> str:
+    """Lower-case and collapse whitespace for fuzzy station name matching."""
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+
+class StationMeta:
+    """Metadata for one station, shared by all of its sensors."""
+
+    __slots__ = ("ref", "name", "region", "latitude", "longitude", "location_link")
+
+    def __init__(
+        self,
+        ref: str,
+        name: str,
+        region: Any,
+        latitude: float | None,
+        longitude: float | None,
+    ) -> None:
+        """Initialize the metadata and derive the map link."""
+        self.ref = ref
+        self.name = name
+        self.region = region
+        self.latitude = latitude
+        self.longitude = longitude
+        self.location_link = (
+            MAPS_URL.format(lat=latitude, lon=longitude)
+            if latitude is not None and longitude is not None
+            else None
+        )
+
+    def matches(
+        self, name: str, region: Any, latitude: float | None, longitude: float | None
+    ) -> bool:
+        """Return True if the feed's metadata equals what is held."""
+        return (
+            self.name == name
+            and self.region == region
+            and self.latitude == latitude
+            and self.longitude == longitude
+        )
+
+    def as_list(self) -> list[Any]:
+        """Return the compact persisted form."""
+        return [self.name, self.region, self.latitude, self.longitude]
+
+
+class StationRegistry:
+    """Station ref -> StationMeta, updated only on metadata changes."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self.stations: dict[str, StationMeta] = {}
+        # Bumped on every change; lets consumers rebuild derived indexes.
+        self.version = 0
+
+    def __len__(self) -> int:
+        """Return the number of stations."""
+        return len(self.stations)
+
+    def __contains__(self, ref: object) -> bool:
+        """Return True if a station is known."""
+        return ref in self.stations
+
+    def get(self, ref: str) -> StationMeta | None:
+        """Return the metadata for a station, if known."""
+        return self.stations.get(ref)
+
+    def update(
+        self,
+        ref: str,
+        name: str,
+        region: Any,
+        latitude: float | None,
+        longitude: float | None,
+    ) -> bool:
+        """Record a station's metadata; returns True if it was new or changed."""
+        meta = self.stations.get(ref)
+        if meta is not None and meta.matches(name, region, latitude, longitude):
+            return False
+        self.stations[ref] = StationMeta(ref, name, region, latitude, longitude)
+        self.version += 1
+        return True
+
+    def retain(self, refs: set[str]) -> bool:
+        """Forget stations not in refs; returns True if any were removed."""
+        gone = self.stations.keys() - refs
+        for ref in gone:
+            del self.stations[ref]
+        if gone:
+            self.version += 1
+        return bool(gone)
+
+    def as_dict(self) -> dict[str, list[Any]]:
+        """Return the compact persisted form of the registry."""
+        return {ref: meta.as_list() for ref, meta in self.stations.items()}
+
+    def load(self, stored: dict[str, list[Any]]) -> None:
+        """Replace the registry with a persisted one."""
+        self.stations = {
+            ref: StationMeta(ref, *values)
+            for ref, values in stored.items()
+            if isinstance(values, list) and len(values) == 4
+        }
+        self.version += 1
+
+    def seed_from_snapshot(self, data: dict[str, Any]) -> None:
+        """Fill gaps from a snapshot cached before metadata was split out.
+
+        Older caches carry name, region and a "lat, lon" location string in
+        each station entry.
+        """
+        for ref, station in data.items():
+            if ref in self.stations or "name" not in station:
+                continue
+            latitude = longitude = None
+            try:
+                lat_str, lon_str = station.get("location", "").split(", ")
+                latitude, longitude = float(lat_str), float(lon_str)
+            except (ValueError, AttributeError):
+                pass
+            self.update(
+                ref, station["name"], station.get("region"), latitude, longitude
+            )
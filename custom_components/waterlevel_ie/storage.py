@@ -0,0 +1,136 @@
+"""Compressed on-disk cache and feed transfer helpers for WaterLevel.ie.
+
+The last good snapshot is persisted so the integration can serve data across
+restarts while the API is down. Home Assistant's Store writes indented JSON,
+which for all-stations mode is several hundred kilobytes rewritten every
+update cycle; on SD-card installs that is a lot of wear for data that
+compresses roughly tenfold. The cache is therefore written as compact,
+gzip-compressed JSON next to the other .storage files, atomically, from the
+executor. A cache left by older versions (Store version 1) is migrated on
+first load and then removed.
+"""
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+from pathlib import Path
+from typing import Any
+import zlib
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.cache"
+# Station metadata, written only when it changes.
+STATIONS_STORAGE_KEY = f"{DOMAIN}.stations"
+
+# Layout written by versions before the compressed cache (HA Store, JSON).
+LEGACY_STORAGE_VERSION = 1
+
+# Version of the compressed cache layout.
+CACHE_VERSION = 2
+
+# Content codings requested from the feed; both are decoded with the stdlib.
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def decode_body(body: bytes, encoding: str | None) -> bytes:
+    """Return a response body with its Content-Encoding removed.
+
+    Raises aiohttp.ClientPayloadError for unknown codings or corrupt data so
+    the coordinator's retry logic treats it like any other bad download.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    try:
+        if encoding == "identity":
+            return body
+        if encoding in ("gzip", "x-gzip"):
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            # Servers disagree on zlib-wrapped vs raw deflate; accept both.
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+    except (OSError, EOFError, zlib.error) as err:
+        raise aiohttp.ClientPayloadError(
+            f"Could not decode {encoding} response: {err}"
+        ) from err
+    raise aiohttp.ClientPayloadError(f"Unsupported content encoding: {encoding}")
+
+
+class CompressedCache:
+    """Gzip-compressed JSON cache file with migration from the legacy Store."""
+
+    def __init__(self, hass: HomeAssistant, key: str = STORAGE_KEY) -> None:
+        """Initialize the cache for a storage key."""
+        self.hass = hass
+        self.path = Path(hass.config.path(STORAGE_DIR, f"{key}.json.gz"))
+        self._legacy_store = Store(hass, LEGACY_STORAGE_VERSION, key)
+        # Size of the cache file after the last load or save.
+        self.bytes_on_disk = 0
+
+    async def async_load(self) -> Any:
+        """Return the cached payload, migrating a legacy cache if present."""
+        data = await self.hass.async_add_executor_job(self._read)
+        if data is not None:
+            return data
+
+        legacy = await self._legacy_store.async_load()
+        if legacy is None:
+            return None
+        try:
+            await self.async_save(legacy)
+        except OSError as err:
+            # Keep the legacy file so the migration is retried next time.
+            _LOGGER.warning("Could not migrate cache to compressed format: %s", err)
+            return legacy
+        await self._legacy_store.async_remove()
+        _LOGGER.info(
+            "Migrated cache to compressed format (%d bytes on disk)",
+            self.bytes_on_disk,
+        )
+        return legacy
+
+    async def async_save(self, data: Any) -> int:
+        """Write the payload and return the number of bytes written."""
+        return await self.hass.async_add_executor_job(self._write, data)
+
+    def _read(self) -> Any:
+        """Read and decode the cache file; None if missing or unreadable."""
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            payload = json_loads(gzip.decompress(raw))
+        except (OSError, EOFError, ValueError) as err:
+            _LOGGER.warning("Ignoring unreadable cache file %s: %s", self.path, err)
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            _LOGGER.debug("Ignoring cache file with unknown layout: %s", self.path)
+            return None
+        self.bytes_on_disk = len(raw)
+        return payload.get("data")
+
+    def _write(self, data: Any) -> int:
+        """Compress and atomically replace the cache file."""
+        raw = gzip.compress(
+            json_bytes({"version": CACHE_VERSION, "data": data}), mtime=0
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f"{self.path.name}.tmp")
+        temp.write_bytes(raw)
+        os.replace(temp, self.path)
+        self.bytes_on_disk = len(raw)
+        return len(raw)
+
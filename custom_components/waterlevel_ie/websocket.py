@@ -0,0 +1,152 @@
+"""WebSocket API for WaterLevel.ie."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .changefeed import async_get_change_feed
+from .const import DOMAIN
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the integration's WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_readings)
+    websocket_api.async_register_command(hass, ws_chart_series)
+
+
+# Chart requests: points per series by default and at most, stations per
+# request, and the default range when neither hours nor start_time is given.
+DEFAULT_CHART_POINTS = 300
+MAX_CHART_POINTS = 5000
+MAX_CHART_STATIONS = 50
+DEFAULT_CHART_HOURS = 24
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_readings",
+        vol.Optional("station_refs"): [str],
+        vol.Optional("rivers"): [str],
+        vol.Optional("regions"): [vol.Any(str, int)],
+        vol.Optional("sensor_types"): [str],
+    }
+)
+@callback
+def ws_subscribe_readings(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream each cycle's changed readings matching the given filters.
+
+    Every filter is optional; readings must match all filters given. One
+    event message is sent per update cycle, and only when something in the
+    subscriber's slice changed.
+    """
+
+    @callback
+    def forward(changed: list[dict[str, Any]], removed: list[dict[str, Any]]) -> None:
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"], {"readings": changed, "removed": removed}
+            )
+        )
+
+    connection.subscriptions[msg["id"]] = async_get_change_feed(hass).async_subscribe(
+        forward,
+        station_refs=msg.get("station_refs"),
+        rivers=msg.get("rivers"),
+        regions=msg.get("regions"),
+        sensor_types=msg.get("sensor_types"),
+    )
+    connection.send_result(msg["id"])
+
+
+def _parse_time(value: str | None, field: str) -> datetime | None:
+    """Parse an ISO 8601 time; naive times are Home Assistant's local time."""
+    if value is None:
+        return None
+    parsed = dt_util.parse_datetime(value)
+    if parsed is None:
+        raise vol.Invalid(f"Invalid {field}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/chart_series",
+        vol.Required("station_refs"): vol.All(
+            [str], vol.Length(min=1, max=MAX_CHART_STATIONS)
+        ),
+        vol.Optional("sensor_types", default=["0001"]): vol.All(
+            [str], vol.Length(min=1)
+        ),
+        vol.Exclusive("hours", "range"): vol.All(
+            vol.Coerce(float), vol.Range(min=0.25, max=24 * 400)
+        ),
+        vol.Exclusive("start_time", "range"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("points", default=DEFAULT_CHART_POINTS): vol.All(
+            vol.Coerce(int), vol.Range(min=3, max=MAX_CHART_POINTS)
+        ),
+    }
+)
+@websocket_api.async_response
+async def ws_chart_series(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return downsampled series of the given stations over a time range.
+
+    The range is either the last `hours` (default 24) up to now, or
+    start_time to end_time (default now). Each (station, sensor) series is
+    reduced to at most `points` points, as [epoch seconds, value] pairs.
+    """
+    # Only dashboards using the command need the charting code.
+    from .charts import async_chart_series  # noqa: PLC0415
+
+    try:
+        start = _parse_time(msg.get("start_time"), "start_time")
+        end = _parse_time(msg.get("end_time"), "end_time")
+    except vol.Invalid as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+
+    now = dt_util.utcnow()
+    if start is None:
+        hours = msg.get("hours", DEFAULT_CHART_HOURS)
+        start = (end or now) - timedelta(hours=hours)
+        # A relative window is cached as such, so repeated dashboard loads
+        # hit the cache while the window slides.
+        range_key: Any = ("hours", hours, msg.get("end_time"))
+    else:
+        range_key = (start.timestamp(), end.timestamp() if end else None)
+    end = end or now
+    if start >= end:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_INVALID_FORMAT,
+            "start_time must be before end_time",
+        )
+        return
+
+    keys = [
+        (station_id, sensor_type)
+        for station_id in dict.fromkeys(msg["station_refs"])
+        for sensor_type in dict.fromkeys(msg["sensor_types"])
+    ]
+    series = await async_chart_series(hass, keys, start, end, msg["points"], range_key)
+    connection.send_result(
+        msg["id"],
+        {"start": start.isoformat(), "end": end.isoformat(), "series": series},
+    )
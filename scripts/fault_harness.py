@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""Fault-injection harness for the WaterLevel.ie fetch and retry path.
+
+Drives a real WaterLevelDataCoordinator against a local stub OPW server for
+many simulated hours of polling. Each request to the stub fails, with
+probability --fault-rate, in one of the ways the real service does:
+
+- latency: the response starts after up to 20 s,
+- slow: the body trickles out over up to a minute,
+- truncated: the body is cut off mid-JSON,
+- rate_limit / server_error: a burst of 429 / 503 responses,
+- hang: no response at all,
+- outage: every request fails for 1-30 hours.
+
+The event loop runs on a virtual clock. Whenever it has nothing to do but
+wait for a timer (the poll interval, a retry backoff, a request timeout, a
+stub delay) the clock jumps to that timer, so days of polling take seconds
+while every timeout and backoff fires exactly as it would in real time.
+Executor jobs and socket I/O are still waited for in real time.
+
+Reported:
+
+- update latency: virtual seconds per coordinator update, retries included,
+- requests sent to OPW, per cycle and per simulated hour,
+- time served fresh, from retained data (stale) and unavailable,
+- event-loop blocking: the longest real time between two selector waits,
+- unexpected errors: anything but UpdateFailed escaping an update.
+
+It exits non-zero on an unexpected error, on a cycle sending more than
+MAX_RETRY_ATTEMPTS requests, when data within the retention period is
+dropped, or when retained data is served beyond it.
+
+    python scripts/fault_harness.py --hours 72 --fault-rate 0.3
+    python scripts/fault_harness.py --faults hang,truncated --seed 7
+    python scripts/fault_harness.py --track 5 --per-station
+
+Needs a Home Assistant development environment (the homeassistant package).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+from pathlib import Path
+import random
+import selectors
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.update_coordinator import UpdateFailed  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.waterlevel_ie import hub as hub_mod  # noqa: E402
+from custom_components.waterlevel_ie import rivers as rivers_mod  # noqa: E402
+from custom_components.waterlevel_ie.const import (  # noqa: E402
+    DATA_RETENTION_HOURS,
+    MAX_RETRY_ATTEMPTS,
+)
+from custom_components.waterlevel_ie.coordinator import (  # noqa: E402
+    WaterLevelDataCoordinator,
+)
+
+FAULTS = (
+    "latency",
+    "slow",
+    "truncated",
+    "rate_limit",
+    "server_error",
+    "hang",
+    "outage",
+)
+# Relative frequency of each fault; outages are rare but long.
+FAULT_WEIGHTS = {"outage": 0.05}
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+SLOT_SECONDS = 15 * 60
+
+# Callbacks running longer than this between two waits block the loop.
+BLOCKING_THRESHOLD = 0.05
+
+SENSOR_BASES = (("0001", 1.0), ("0002", 9.0), ("0003", 12.0), ("OD", 30.0))
+
+
+class _JumpingSelector:
+    """Selector that advances the loop's clock instead of sleeping idle."""
+
+    def __init__(self, selector: selectors.BaseSelector, loop: VirtualClockLoop):
+        self._selector = selector
+        self._loop = loop
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._selector, name)
+
+    def select(self, timeout: float | None = None) -> list[Any]:
+        loop = self._loop
+        loop.record_busy()
+        try:
+            # Loopback traffic is delivered synchronously, so a non-blocking
+            # poll sees every reply already sent.
+            events = self._selector.select(0)
+            if events or (timeout is not None and timeout <= 0):
+                return events
+            if loop.executor_jobs or timeout is None:
+                # Work in another thread (or nothing scheduled at all):
+                # wait for it in real time.
+                return self._selector.select(timeout)
+            loop.offset += timeout
+            return []
+        finally:
+            loop.busy_since = time.perf_counter()
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps ahead whenever it would only be waiting."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.offset = 0.0
+        self.executor_jobs = 0
+        self._selector = _JumpingSelector(self._selector, self)
+        self.busy_since = time.perf_counter()
+        self.longest_busy = 0.0
+        self.blocked = 0
+
+    def time(self) -> float:
+        """Return the virtual monotonic time."""
+        return time.monotonic() + self.offset
+
+    def run_in_executor(self, executor: Any, func: Any, *args: Any) -> Any:
+        """Run a job in the executor, counted so the clock waits for it."""
+        future = super().run_in_executor(executor, func, *args)
+        self.executor_jobs += 1
+        future.add_done_callback(self._executor_job_done)
+        return future
+
+    def _executor_job_done(self, _future: Any) -> None:
+        self.executor_jobs -= 1
+
+    def record_busy(self) -> None:
+        """Record the real time spent running callbacks since the last wait."""
+        busy = time.perf_counter() - self.busy_since
+        self.longest_busy = max(self.longest_busy, busy)
+        if busy > BLOCKING_THRESHOLD:
+            self.blocked += 1
+
+
+def reading_value(index: int, sensor: str, base: float, slot: int) -> float:
+    """Return a station's synthetic reading for a 15-minute slot."""
+    if sensor == "OD":
+        return base
+    return base + 0.5 + 0.4 * ((index * 7 + slot) % 24 - 12) / 12
+
+
+def slot_time(slot: int) -> str:
+    """Return the ISO 8601 time of a 15-minute slot."""
+    return (START + timedelta(seconds=slot * SLOT_SECONDS)).isoformat().replace(
+        "+00:00", "Z"
+    )
+
+
+class StubOPW:
+    """Local stand-in for the OPW service that injects faults."""
+
+    def __init__(self, args: argparse.Namespace, loop: VirtualClockLoop) -> None:
+        """Initialize the stub; faults are drawn from a seeded generator."""
+        self._loop = loop
+        self._rng = random.Random(args.seed)
+        self._fault_rate = args.fault_rate
+        self._faults = args.faults
+        self._weights = [FAULT_WEIGHTS.get(fault, 1.0) for fault in self._faults]
+        self._bursts: list[str] = []
+        self._outage_until = float("-inf")
+        river_refs = list(rivers_mod.station_river_map())
+        self.refs = river_refs[: args.stations] + [
+            f"{40000 - i:010d}" for i in range(max(0, args.stations - len(river_refs)))
+        ]
+        self._index = {ref: i for i, ref in enumerate(self.refs)}
+        self._bodies: dict[int, bytes] = {}
+        # Request times (virtual) and outcome counts.
+        self.requests: list[float] = []
+        self.outcomes: Counter[str] = Counter()
+
+    def slot(self) -> int:
+        """Return the 15-minute slot of the current virtual time."""
+        return int((self._loop.time() - self.started) // SLOT_SECONDS)
+
+    def _feed_body(self, slot: int) -> bytes:
+        """Serialise the synthetic feed of a slot (runs in the executor)."""
+        timestamp = slot_time(slot)
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [-10 + (i % 40) * 0.1, 51.5 + (i // 40) * 0.1],
+                },
+                "properties": {
+                    "station_ref": ref,
+                    "station_name": f"Station {i}",
+                    "sensor_ref": sensor,
+                    "region_id": i % 8,
+                    "datetime": timestamp,
+                    "value": f"{reading_value(i, sensor, base, slot):.3f}",
+                    "err_code": 99,
+                },
+            }
+            for i, ref in enumerate(self.refs)
+            for sensor, base in SENSOR_BASES
+        ]
+        return json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+    def _next_fault(self) -> str | None:
+        """Return the fault to inject into this request, if any."""
+        now = self._loop.time()
+        if now < self._outage_until:
+            return "outage"
+        if self._bursts:
+            return self._bursts.pop()
+        if not self._faults or self._rng.random() >= self._fault_rate:
+            return None
+        fault = self._rng.choices(self._faults, self._weights)[0]
+        if fault == "outage":
+            self._outage_until = now + self._rng.uniform(1, 30) * 3600
+        elif fault in ("rate_limit", "server_error"):
+            self._bursts = [fault] * self._rng.randint(0, 4)
+        return fault
+
+    async def _respond(self, request: web.Request, body: bytes, content_type: str):
+        """Send a body, with the fault drawn for this request."""
+        self.requests.append(self._loop.time())
+        fault = self._next_fault()
+        self.outcomes[fault or "ok"] += 1
+        if fault == "outage":
+            return web.Response(status=502)
+        if fault == "rate_limit":
+            return web.Response(status=429, headers={"Retry-After": "900"})
+        if fault == "server_error":
+            return web.Response(status=503)
+        if fault == "hang":
+            await asyncio.sleep(3600)
+        if fault == "latency":
+            await asyncio.sleep(self._rng.uniform(1, 20))
+        if fault == "truncated":
+            body = body[: len(body) // 2]
+        if fault != "slow":
+            return web.Response(body=body, content_type=content_type)
+
+        duration = self._rng.uniform(5, 60)
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        response.content_length = len(body)
+        await response.prepare(request)
+        chunk = len(body) // 20 + 1
+        try:
+            for offset in range(0, len(body), chunk):
+                await response.write(body[offset : offset + chunk])
+                await asyncio.sleep(duration / 20)
+            await response.write_eof()
+        except ConnectionError:
+            pass
+        return response
+
+    async def handle_feed(self, request: web.Request) -> web.StreamResponse:
+        """Serve geojson/latest/."""
+        slot = self.slot()
+        if slot not in self._bodies:
+            self._bodies = {
+                slot: await self._loop.run_in_executor(None, self._feed_body, slot)
+            }
+        return await self._respond(request, self._bodies[slot], "application/json")
+
+    async def handle_station(self, request: web.Request) -> web.StreamResponse:
+        """Serve one sensor's readings of the last day as time,value CSV."""
+        station, _, sensor = request.match_info["name"].partition("_")
+        index = self._index.get(f"{int(station):010d}")
+        base = dict(SENSOR_BASES).get(sensor)
+        if index is None or base is None:
+            return web.Response(status=404)
+        slot = self.slot()
+        rows = "".join(
+            f"{slot_time(past)},{reading_value(index, sensor, base, past):.3f}\n"
+            for past in range(max(0, slot - 95), slot + 1)
+        )
+        body = f"datetime,value\n{rows}".encode()
+        return await self._respond(request, body, "text/csv")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return a nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the simulation and print the report; returns the exit code."""
+    loop: VirtualClockLoop = asyncio.get_running_loop()  # type: ignore[assignment]
+    stub = StubOPW(args, loop)
+    app = web.Application()
+    app.router.add_get("/geojson/latest/", stub.handle_feed)
+    app.router.add_get("/data/day/{name}.csv", stub.handle_station)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+    hub_mod.API_URL = f"http://127.0.0.1:{port}/geojson/latest/"
+    hub_mod.STATION_API_URL = (
+        f"http://127.0.0.1:{port}/data/day/{{station}}_{{sensor}}.csv"
+    )
+
+    # Home Assistant's wall clock follows the virtual one.
+    stub.started = started = loop.time()
+    dt_util.utcnow = lambda: START + timedelta(seconds=loop.time() - started)
+
+    latencies: list[float] = []
+    requests_per_update: list[int] = []
+    unexpected: list[str] = []
+    violations: list[str] = []
+    time_in: Counter[str] = Counter()
+    updated = asyncio.Event()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await hass.async_add_executor_job(rivers_mod.station_river_map)
+        coordinator = WaterLevelDataCoordinator(
+            hass,
+            args.interval,
+            set(stub.refs[: args.track]) if args.track else None,
+            per_station_fetch=args.per_station,
+        )
+        hub = coordinator.hub
+        update_data = coordinator._async_update_data  # noqa: SLF001
+
+        async def timed_update() -> dict[str, Any]:
+            began = loop.time()
+            sent = len(stub.requests)
+            try:
+                return await update_data()
+            except UpdateFailed:
+                raise
+            except Exception as err:
+                unexpected.append(f"{type(err).__name__}: {err}")
+                raise
+            finally:
+                latencies.append(loop.time() - began)
+                requests_per_update.append(len(stub.requests) - sent)
+                updated.set()
+
+        coordinator._async_update_data = timed_update  # noqa: SLF001
+        remove = coordinator.async_add_listener(lambda: None)
+        await coordinator.async_refresh()
+
+        end = started + args.hours * 3600
+        last_sample = loop.time()
+        while loop.time() < end:
+            # Wait for the coordinator's next scheduled update to complete.
+            updated.clear()
+            try:
+                await asyncio.wait_for(updated.wait(), end - loop.time())
+            except TimeoutError:
+                pass
+            now = loop.time()
+            age = (
+                dt_util.utcnow() - hub.last_successful_update
+                if hub.last_successful_update
+                else None
+            )
+            retained = age is not None and age < timedelta(hours=DATA_RETENTION_HOURS)
+            if not coordinator.last_update_success:
+                state = "unavailable"
+                if retained:
+                    violations.append(f"data dropped {age} after the last success")
+            elif not hub.api_available:
+                state = "stale"
+                if not retained:
+                    violations.append(f"retained data served {age} after success")
+            else:
+                state = "fresh"
+            time_in[state] += now - last_sample
+            last_sample = now
+
+        remove()
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+    await runner.cleanup()
+
+    hours = args.hours
+    total = sum(time_in.values()) or 1
+    print(
+        f"{hours:g} simulated hours, {args.interval} min interval, "
+        f"{args.stations} stations"
+        + (f", {args.track} tracked" if args.track else "")
+        + (" (per-station fetch)" if args.per_station else "")
+        + f", fault rate {args.fault_rate:g}"
+    )
+    print(f"  virtual time simulated in {time.perf_counter() - args.wall_start:.1f} s")
+    print(f"\nupdates: {len(latencies)}")
+    print(
+        "  latency (virtual s): "
+        f"p50 {statistics.median(latencies):.2f}  "
+        f"p90 {percentile(latencies, 0.9):.2f}  "
+        f"p99 {percentile(latencies, 0.99):.2f}  max {max(latencies):.2f}"
+    )
+    requests = len(stub.requests)
+    print(f"\nrequests to OPW: {requests} ({requests / hours:.2f}/h)")
+    print(
+        f"  per update: max {max(requests_per_update)}, "
+        f"mean {statistics.mean(requests_per_update):.2f}"
+    )
+    busiest = Counter(int((t - started) // 3600) for t in stub.requests)
+    print(f"  busiest hour: {max(busiest.values(), default=0)} requests")
+    responses = ", ".join(
+        f"{outcome} {count}" for outcome, count in stub.outcomes.most_common()
+    )
+    print(f"  responses: {responses}")
+    print("\ntime served:")
+    for state in ("fresh", "stale", "unavailable"):
+        hours_in = time_in[state] / 3600
+        print(f"  {state:<12} {hours_in:8.1f} h  {time_in[state] / total:6.1%}")
+    print(
+        f"\nevent loop: longest callback run {loop.longest_busy * 1000:.1f} ms, "
+        f"{loop.blocked} runs over {BLOCKING_THRESHOLD * 1000:.0f} ms"
+    )
+    print(f"unexpected errors: {len(unexpected)}")
+    for error, count in Counter(unexpected).most_common(5):
+        print(f"  {count} x {error}")
+
+    failures: list[str] = []
+    if unexpected:
+        failures.append(f"{len(unexpected)} updates failed with an unexpected error")
+    # Per-station cycles may send one request per tracked sensor.
+    allowed = MAX_RETRY_ATTEMPTS * (4 * args.track + 1 if args.per_station else 1)
+    if max(requests_per_update) > allowed:
+        failures.append(
+            f"an update sent {max(requests_per_update)} requests (allowed {allowed})"
+        )
+    failures.extend(dict.fromkeys(violations))
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=72)
+    parser.add_argument("--interval", type=int, default=15, help="Minutes")
+    parser.add_argument("--stations", type=int, default=450)
+    parser.add_argument(
+        "--track", type=int, default=0, help="Stations tracked (0 = all)"
+    )
+    parser.add_argument(
+        "--per-station", action="store_true", help="Enable per-station fetching"
+    )
+    parser.add_argument("--fault-rate", type=float, default=0.3)
+    parser.add_argument(
+        "--faults",
+        type=lambda value: [fault for fault in value.split(",") if fault],
+        default=list(FAULTS),
+        help=f"Comma-separated subset of {','.join(FAULTS)}",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--log-level",
+        default="CRITICAL",
+        help="Integration log level; retry and outage logging is expected",
+    )
+    args = parser.parse_args(argv)
+    if unknown := set(args.faults) - set(FAULTS):
+        parser.error(f"unknown faults: {', '.join(sorted(unknown))}")
+    args.wall_start = time.perf_counter()
+    logging.basicConfig(level=args.log_level.upper())
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(run(args))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Generate custom_components/waterlevel_ie/station_rivers.json.
+
+Snaps every OPW station to the nearest river segment of a local river network
+file (e.g. the EPA 1:50,000 river network exported to GeoJSON) and writes the
+compact station_ref -> river name map used by rivers.py. No network access is
+needed: station coordinates come from a saved copy of the OPW feed.
+
+    python scripts/generate_station_rivers.py \
+        --network epa_rivers.geojson --stations latest.geojson
+
+The network is projected to a local metric plane and bucketed into a uniform
+grid whose cell size is the snapping distance, so each station only compares
+against the segments in its 3x3 block of cells. Distances to those candidates
+are computed in one vectorised numpy expression.
+
+Requires numpy (a development-time dependency only; the integration itself
+only reads the generated JSON).
+"""
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+import gzip
+import json
+import math
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+DEFAULT_OUTPUT = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "waterlevel_ie"
+    / "station_rivers.json"
+)
+
+# Mean Earth radius (m) and the latitude the equirectangular projection is
+# centred on (Ireland). Distortion over the island is well under 1%.
+EARTH_RADIUS = 6_371_008.8
+REFERENCE_LATITUDE = 53.4
+
+# Only stations in the OPW republication range are mapped (see const.py).
+STATION_REF_MIN = 1
+STATION_REF_MAX = 41000
+
+
+def _load_geojson(path: Path) -> dict[str, Any]:
+    """Load a (optionally gzip-compressed) GeoJSON file."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _project(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Project lon/lat degrees to metres on a plane centred on Ireland."""
+    scale = math.radians(1) * EARTH_RADIUS
+    x = lon * scale * math.cos(math.radians(REFERENCE_LATITUDE))
+    y = lat * scale
+    return x, y
+
+
+def load_segments(
+    path: Path, name_field: str, qualifier_field: str | None
+) -> tuple[np.ndarray, list[str]]:
+    """Return (segments, names) from a LineString/MultiLineString network.
+
+    segments is an (N, 5) float array of x1, y1, x2, y2, name_index. Features
+    without a name are skipped. When qualifier_field is given, river names
+    shared by unrelated rivers are disambiguated as "Name [qualifier]", the
+    same convention as the shipped map (e.g. "Blackwater [Monaghan]").
+    """
+    features = _load_geojson(path).get("features", [])
+
+    qualifiers: dict[str, set[str]] = defaultdict(set)
+    if qualifier_field:
+        for feature in features:
+            props = feature.get("properties") or {}
+            name = props.get(name_field)
+            if name and props.get(qualifier_field):
+                qualifiers[str(name).strip()].add(str(props[qualifier_field]).strip())
+
+    names: list[str] = []
+    name_index: dict[str, int] = {}
+    lon1: list[float] = []
+    lat1: list[float] = []
+    lon2: list[float] = []
+    lat2: list[float] = []
+    index: list[int] = []
+    for feature in features:
+        props = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        raw_name = props.get(name_field)
+        if not raw_name:
+            continue
+        name = str(raw_name).strip()
+        if qualifier_field and len(qualifiers.get(name, ())) > 1:
+            name = f"{name} [{str(props.get(qualifier_field)).strip()}]"
+        if name not in name_index:
+            name_index[name] = len(names)
+            names.append(name)
+
+        if geometry.get("type") == "LineString":
+            lines = [geometry.get("coordinates") or []]
+        elif geometry.get("type") == "MultiLineString":
+            lines = geometry.get("coordinates") or []
+        else:
+            continue
+        for line in lines:
+            for (ax, ay, *_), (bx, by, *_) in zip(line, line[1:]):
+                lon1.append(ax)
+                lat1.append(ay)
+                lon2.append(bx)
+                lat2.append(by)
+                index.append(name_index[name])
+
+    x1, y1 = _project(np.asarray(lon1, dtype=float), np.asarray(lat1, dtype=float))
+    x2, y2 = _project(np.asarray(lon2, dtype=float), np.asarray(lat2, dtype=float))
+    segments = np.column_stack([x1, y1, x2, y2, np.asarray(index, dtype=float)])
+    return segments, names
+
+
+def load_stations(path: Path) -> dict[str, tuple[float, float]]:
+    """Return {station_ref: (lon, lat)} for permitted stations in an OPW feed."""
+    stations: dict[str, tuple[float, float]] = {}
+    for feature in _load_geojson(path).get("features", []):
+        props = feature.get("properties") or {}
+        coords = (feature.get("geometry") or {}).get("coordinates") or []
+        ref = props.get("station_ref")
+        if not ref or len(coords) < 2 or ref in stations:
+            continue
+        try:
+            if not STATION_REF_MIN <= int(ref) <= STATION_REF_MAX:
+                continue
+        except (TypeError, ValueError):
+            continue
+        stations[ref] = (float(coords[0]), float(coords[1]))
+    return stations
+
+
+class SegmentGrid:
+    """Uniform-grid spatial index over line segments (CSR layout)."""
+
+    def __init__(self, segments: np.ndarray, cell_size: float) -> None:
+        """Bucket every segment into each grid cell its bounding box touches."""
+        self.segments = segments
+        self.cell_size = cell_size
+        x1, y1, x2, y2 = segments[:, 0], segments[:, 1], segments[:, 2], segments[:, 3]
+        cx0 = np.floor(np.minimum(x1, x2) / cell_size).astype(np.int64)
+        cx1 = np.floor(np.maximum(x1, x2) / cell_size).astype(np.int64)
+        cy0 = np.floor(np.minimum(y1, y2) / cell_size).astype(np.int64)
+        cy1 = np.floor(np.maximum(y1, y2) / cell_size).astype(np.int64)
+
+        # Expand each segment into one (cell, segment) pair per covered cell,
+        # without a Python loop: offsets enumerate the cells of each bbox.
+        nx = cx1 - cx0 + 1
+        ny = cy1 - cy0 + 1
+        counts = nx * ny
+        ids = np.repeat(np.arange(len(segments)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = self._key(cx0[ids] + offsets % nx[ids], cy0[ids] + offsets // nx[ids])
+
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._ids = ids[order]
+
+    @staticmethod
+    def _key(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        """Combine cell coordinates into one sortable int64 key."""
+        return (cx << 32) ^ (cy & 0xFFFFFFFF)
+
+    def candidates(self, x: float, y: float) -> np.ndarray:
+        """Return ids of segments in the 3x3 cells around a point."""
+        cx = math.floor(x / self.cell_size)
+        cy = math.floor(y / self.cell_size)
+        xs, ys = np.meshgrid(np.arange(cx - 1, cx + 2), np.arange(cy - 1, cy + 2))
+        wanted = self._key(xs.ravel().astype(np.int64), ys.ravel().astype(np.int64))
+        lo = np.searchsorted(self._keys, wanted, side="left")
+        hi = np.searchsorted(self._keys, wanted, side="right")
+        if not (hi > lo).any():
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self._ids[a:b] for a, b in zip(lo, hi)]))
+
+    def nearest(self, x: float, y: float) -> tuple[int, float] | None:
+        """Return (segment id, distance in m) of the nearest candidate segment."""
+        ids = self.candidates(x, y)
+        if ids.size == 0:
+            return None
+        seg = self.segments[ids]
+        ax, ay, bx, by = seg[:, 0], seg[:, 1], seg[:, 2], seg[:, 3]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(length_sq > 0, ((x - ax) * dx + (y - ay) * dy) / length_sq, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        dist = np.hypot(ax + t * dx - x, ay + t * dy - y)
+        best = int(np.argmin(dist))
+        return int(ids[best]), float(dist[best])
+
+
+def snap_stations(
+    stations: dict[str, tuple[float, float]],
+    segments: np.ndarray,
+    names: list[str],
+    max_distance: float,
+) -> tuple[dict[str, str], list[str]]:
+    """Return ({ref: river} for snapped stations, refs left unmapped)."""
+    grid = SegmentGrid(segments, max_distance)
+    refs = list(stations)
+    xs, ys = _project(
+        np.asarray([stations[r][0] for r in refs], dtype=float),
+        np.asarray([stations[r][1] for r in refs], dtype=float),
+    )
+    mapping: dict[str, str] = {}
+    unmapped: list[str] = []
+    for ref, x, y in zip(refs, xs, ys):
+        hit = grid.nearest(float(x), float(y))
+        if hit is None or hit[1] > max_distance:
+            unmapped.append(ref)
+            continue
+        mapping[ref] = names[int(segments[hit[0], 4])]
+    return mapping, unmapped
+
+
+def write_map(mapping: dict[str, str], path: Path) -> None:
+    """Write the map in the compact one-entry-per-line layout rivers.py reads."""
+    lines = [
+        f"{json.dumps(ref)}: {json.dumps(river, ensure_ascii=False)}"
+        for ref, river in sorted(mapping.items())
+    ]
+    path.write_text("{\n" + ",\n".join(lines) + "\n}", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--network", type=Path, required=True,
+        help="River network GeoJSON (LineString/MultiLineString, .gz allowed)",
+    )
+    parser.add_argument(
+        "--stations", type=Path, required=True,
+        help="Saved OPW geojson/latest/ feed providing station coordinates",
+    )
+    parser.add_argument(
+        "--name-field", default="NAME", help="Network property holding the river name"
+    )
+    parser.add_argument(
+        "--qualifier-field", default=None,
+        help="Network property used to disambiguate rivers sharing a name",
+    )
+    parser.add_argument(
+        "--max-distance", type=float, default=250.0,
+        help="Largest station-to-river distance (m) that still counts as on the river",
+    )
+    parser.add_argument(
+        "--merge", action="store_true",
+        help="Keep existing entries for stations that are unmapped or not in the feed",
+    )
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    segments, names = load_segments(args.network, args.name_field, args.qualifier_field)
+    stations = load_stations(args.stations)
+    loaded = time.perf_counter()
+    mapping, unmapped = snap_stations(stations, segments, names, args.max_distance)
+    snapped = time.perf_counter()
+
+    if args.merge and args.output.exists():
+        existing = json.loads(args.output.read_text(encoding="utf-8"))
+        for ref, river in existing.items():
+            mapping.setdefault(ref, river)
+
+    write_map(mapping, args.output)
+    print(
+        f"{len(segments)} segments / {len(names)} rivers, {len(stations)} stations: "
+        f"{len(mapping)} mapped, {len(stations) - len(mapping)} unmapped "
+        f"(load {loaded - start:.2f}s, snap {snapped - loaded:.2f}s) -> {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Memory footprint harness for WaterLevel.ie in all-stations mode.
+
+Serves a synthetic (or recorded) OPW feed from a local stub server, drives a
+real WaterLevelDataCoordinator through N update cycles with every station
+tracked, builds one WaterLevelSensor per reading, and reports the memory the
+integration retains:
+
+- per component (deep size of the coordinator's data structures, the river
+  map and the entity objects), in total and per station,
+- per allocating module (tracemalloc, integration files only),
+- traced memory after every cycle.
+
+It exits non-zero if memory keeps growing across cycles once the bounded
+structures (the reading history and the river aggregate heaps, both capped by
+design) are discounted, which catches leaks such as snapshots being retained
+via aliasing or listeners accumulating. Growth is also attributed to the
+allocating module to point at the culprit.
+
+    python scripts/profile_memory.py --stations 450 --cycles 20
+    python scripts/profile_memory.py --feed recorded.geojson.gz
+
+Needs a Home Assistant development environment (the homeassistant package).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import deque
+from datetime import timedelta
+import gc
+import gzip
+import json
+import logging
+from pathlib import Path
+import random
+import sys
+import tempfile
+import tracemalloc
+from typing import Any
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Tracing starts before the integration is imported so module-level data
+# (e.g. the river map) is attributed correctly.
+tracemalloc.start(1)
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.waterlevel_ie import hub as hub_mod  # noqa: E402
+from custom_components.waterlevel_ie import rivers as rivers_mod  # noqa: E402
+from custom_components.waterlevel_ie.coordinator import (  # noqa: E402
+    WaterLevelDataCoordinator,
+)
+from custom_components.waterlevel_ie.history import HISTORY_SAMPLES  # noqa: E402
+from custom_components.waterlevel_ie.sensor import WaterLevelSensor  # noqa: E402
+
+PACKAGE_DIR = str(ROOT / "custom_components" / "waterlevel_ie")
+
+# Growth allowed between the warm-up cycle and the last cycle, beyond the
+# bounded structures, before the run is reported as leaking.
+LEAK_TOLERANCE_BYTES = 64 * 1024
+
+# Synthetic feed: sensor types per station and their base values.
+SENSOR_BASES = (("0001", 1.0), ("0002", 9.0), ("0003", 12.0), ("OD", 30.0))
+
+
+def synthetic_feed(stations: int, cycle: int, seed: int = 1) -> dict[str, Any]:
+    """Return an OPW-shaped feed; levels move every cycle like the real feed."""
+    rng = random.Random(seed)
+    river_refs = list(rivers_mod.station_river_map())
+    refs = river_refs[:stations] + [
+        f"{40000 - i:010d}" for i in range(max(0, stations - len(river_refs)))
+    ]
+    day, quarter = divmod(cycle, 96)
+    timestamp = f"2026-01-{1 + day:02d}T{quarter // 4:02d}:{(quarter % 4) * 15:02d}:00Z"
+    features = []
+    for i, ref in enumerate(refs):
+        lon = -10 + rng.random() * 4
+        lat = 51.5 + rng.random() * 3.8
+        for sensor, base in SENSOR_BASES:
+            value = base + (0.0 if sensor == "OD" else rng.random() + 0.01 * cycle)
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                    "properties": {
+                        "station_ref": ref,
+                        "station_name": f"Station {i}",
+                        "sensor_ref": sensor,
+                        "region_id": i % 8,
+                        "datetime": timestamp,
+                        "value": f"{value:.3f}",
+                        "err_code": 99,
+                    },
+                }
+            )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def load_feed(path: Path) -> dict[str, Any]:
+    """Load a recorded feed (plain or gzip-compressed JSON)."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def deep_size(obj: Any, seen: set[int] | None = None) -> int:
+    """Return the recursive size of an object graph, counting shared parts once."""
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(vars(item))
+        elif hasattr(item, "__slots__"):
+            stack.extend(
+                getattr(item, slot) for slot in item.__slots__ if hasattr(item, slot)
+            )
+    return total
+
+
+def component_sizes(
+    coordinator: WaterLevelDataCoordinator, entities: list[WaterLevelSensor]
+) -> dict[str, int]:
+    """Return the deep size of each component, attributing shared objects once.
+
+    Components are measured in order with a shared "seen" set, so an object
+    reachable from two components (e.g. the hub's snapshot shared by
+    coordinator.data, or _last_saved_data aliasing it) is only counted
+    against the first.
+    """
+    seen: set[int] = set()
+    components: dict[str, Any] = {
+        "coordinator.data": coordinator.data,
+        "hub.data": coordinator.hub.data,
+        "hub._last_saved_data": coordinator.hub._last_saved_data,
+        "station metadata": coordinator.stations,
+        "available_stations": coordinator.available_stations,
+        "river_aggregates": coordinator.river_aggregates,
+        "history": coordinator.history,
+        "freshness": coordinator.freshness,
+        "reading_filter": coordinator._reading_filter,
+        "archive": coordinator.archive,
+        "river map": rivers_mod._river_map(),
+        "entities": entities,
+    }
+    return {name: deep_size(obj, seen) for name, obj in components.items()}
+
+
+def module_sizes(snapshot: tracemalloc.Snapshot) -> dict[str, int]:
+    """Return retained bytes per integration module that allocated them."""
+    sizes: dict[str, int] = {}
+    for stat in snapshot.statistics("filename"):
+        filename = stat.traceback[0].filename
+        if filename.startswith(PACKAGE_DIR):
+            sizes[Path(filename).name] = stat.size
+    return sizes
+
+
+def module_growth(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+) -> dict[str, int]:
+    """Return growth in retained bytes per allocating file (top 10, any file)."""
+    return {
+        stat.traceback[0].filename.replace(PACKAGE_DIR + "/", ""): stat.size_diff
+        for stat in after.compare_to(before, "filename")[:10]
+        if stat.size_diff
+    }
+
+
+def bounded_size(coordinator: WaterLevelDataCoordinator) -> int:
+    """Return the size of the structures that are capped by design."""
+    seen: set[int] = set()
+    return deep_size(coordinator.history, seen) + deep_size(
+        coordinator.river_aggregates, seen
+    )
+
+
+def traced_now() -> int:
+    """Return currently traced memory after a full collection."""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Drive the coordinator and print the report; returns the exit code."""
+    recorded = load_feed(args.feed) if args.feed else None
+    state = {"cycle": 0}
+
+    async def handle(_request: web.Request) -> web.Response:
+        feed = recorded or synthetic_feed(args.stations, state["cycle"])
+        response = web.json_response(feed)
+        # Compress like the real feed so the transfer path is exercised.
+        response.enable_compression()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/geojson/latest/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+    hub_mod.API_URL = f"http://127.0.0.1:{port}/geojson/latest/"
+    # Every cycle below must fetch, not reuse the shared hub's last fetch.
+    hub_mod.FEED_REUSE = timedelta(0)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await hass.async_add_executor_job(rivers_mod.station_river_map)
+        coordinator = WaterLevelDataCoordinator(hass, 15, None)
+        # Every sensor entity subscribes to the coordinator like in HA.
+        await coordinator.async_refresh()
+        entities = [
+            WaterLevelSensor(coordinator, station_id, sensor_type)
+            for station_id, station in coordinator.data.items()
+            for sensor_type in station["sensors"]
+        ]
+        removers = [coordinator.async_add_listener(lambda: None) for _ in entities]
+
+        samples: list[tuple[int, int, int]] = []
+        warmup_snapshot: tracemalloc.Snapshot | None = None
+        for cycle in range(1, args.cycles + 1):
+            state["cycle"] = cycle
+            await coordinator.async_refresh()
+            samples.append((cycle, traced_now(), bounded_size(coordinator)))
+            if cycle == args.warmup + 1:
+                # Collect first: the snapshot keeps a traceback per live
+                # block, so uncollected garbage (e.g. from executor jobs)
+                # would otherwise show up as growth.
+                gc.collect()
+                warmup_snapshot = tracemalloc.take_snapshot()
+
+        stations = max(len(coordinator.data), 1)
+        snapshot = tracemalloc.take_snapshot()
+        sizes = component_sizes(coordinator, entities)
+        modules = module_sizes(snapshot)
+        listeners = len(coordinator._listeners)  # noqa: SLF001
+        growth_by_module = (
+            module_growth(warmup_snapshot, snapshot) if warmup_snapshot else {}
+        )
+        history_series = len(coordinator.history)
+        wire, decoded = coordinator.bytes_on_wire, coordinator.bytes_decoded
+        encoding, on_disk = coordinator.content_encoding, coordinator.cache_bytes_on_disk
+
+        for remove in removers:
+            remove()
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+    await runner.cleanup()
+
+    print(f"stations tracked: {stations}, readings/entities: {len(entities)}")
+    print(
+        f"last cycle: {wire / 1024:.1f} KiB on the wire ({encoding}), "
+        f"{decoded / 1024:.1f} KiB decoded, cache {on_disk / 1024:.1f} KiB on disk"
+    )
+    print("\nretained by component (deep size, shared objects counted once):")
+    for name, size in sizes.items():
+        print(f"  {name:<20} {size / 1024:10.1f} KiB  {size / stations:9.0f} B/station")
+    total = sum(sizes.values())
+    print(f"  {'total':<20} {total / 1024:10.1f} KiB  {total / stations:9.0f} B/station")
+    print("\nretained by allocating module (tracemalloc):")
+    for name, size in sorted(modules.items(), key=lambda item: -item[1]):
+        print(f"  {name:<20} {size / 1024:10.1f} KiB")
+    capacity = history_series * HISTORY_SAMPLES * 16
+    print(
+        f"\nhistory at capacity ({HISTORY_SAMPLES} samples x {history_series} series): "
+        f"{capacity / 1024:.1f} KiB, {capacity / stations:.0f} B/station (projected)"
+    )
+    print("\ntraced memory per cycle (bounded structures in brackets):")
+    for cycle, traced, bounded in samples:
+        print(f"  cycle {cycle:3d}: {traced / 1024:10.1f} KiB  ({bounded / 1024:.1f} KiB)")
+    if growth_by_module:
+        print("\ngrowth since warm-up by allocating file:")
+        for name, diff in growth_by_module.items():
+            print(f"  {diff / 1024:+9.1f} KiB  {name}")
+
+    failures: list[str] = []
+    if listeners != len(entities):
+        failures.append(
+            f"listener count {listeners} != {len(entities)} entities (accumulating)"
+        )
+    warmup = min(args.warmup, len(samples) - 1)
+    _, first, first_bounded = samples[warmup]
+    _, last, last_bounded = samples[-1]
+    growth = (last - first) - (last_bounded - first_bounded)
+    print(
+        f"\ngrowth after warm-up, excluding bounded structures: {growth / 1024:.1f} KiB"
+    )
+    if growth > LEAK_TOLERANCE_BYTES:
+        failures.append(
+            f"memory grew {growth / 1024:.1f} KiB over {len(samples) - warmup - 1} "
+            f"cycles (tolerance {LEAK_TOLERANCE_BYTES / 1024:.0f} KiB)"
+        )
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stations", type=int, default=450)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument(
+        "--warmup", type=int, default=3, help="Cycles ignored by the leak check"
+    )
+    parser.add_argument(
+        "--feed", type=Path, help="Recorded geojson/latest/ feed (.gz allowed)"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
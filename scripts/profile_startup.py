@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Startup profile of WaterLevel.ie: import time and setup up to first entities.
+
+Reports, against a local stub of the OPW feed:
+
+- import time per integration module (python -X importtime in a fresh
+  interpreter, after the Home Assistant modules any installation has already
+  imported by the time the integration loads) for the modules an entry setup
+  imports, plus any other module the integration pulls in,
+- the setup phases of a config entry through Home Assistant's own loader, up
+  to the sensor and binary sensor entities being added: component setup,
+  coordinator settings, cache load, first refresh and the platforms. A cold
+  start (empty .storage) and a warm restart (cache on disk) are measured.
+
+Adding the entities themselves (registry and state writes) is Home
+Assistant's work and reported apart. The script exits non-zero if a module
+meant to load on demand (the options-flow picker, the metrics exporter, the
+reading filter, diagnostics) is imported by a default setup, or if the import or a start
+up to the first entities exceeds its budget.
+
+    python scripts/profile_startup.py --stations 450
+    python scripts/profile_startup.py --latency-ms 300 --max-setup-ms 2000
+
+Needs a Home Assistant development environment (the homeassistant package).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import logging
+import os
+from pathlib import Path
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PACKAGE = "custom_components.waterlevel_ie"
+
+# Imported by Home Assistant before any integration of this kind loads (core,
+# the helpers, the sensor platforms and the http / websocket_api
+# dependencies); they are not the integration's cost.
+BASELINE_MODULES = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.entity_registry",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.sensor",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.http",
+    "homeassistant.components.websocket_api",
+)
+
+# Modules only needed after the first data (options flow, optional features);
+# a default setup must not import them.
+LAZY_MODULES = (
+    f"{PACKAGE}.picker",
+    f"{PACKAGE}.metrics",
+    f"{PACKAGE}.quality",
+    f"{PACKAGE}.diagnostics",
+    f"{PACKAGE}.charts",
+)
+
+SENSOR_BASES = (("0001", 1.0), ("0002", 9.0), ("0003", 12.0), ("OD", 30.0))
+
+# What Home Assistant imports to set up an entry: the component, its
+# config flow (checked on every setup) and the platforms.
+SETUP_IMPORTS = (
+    PACKAGE,
+    f"{PACKAGE}.config_flow",
+    f"{PACKAGE}.sensor",
+    f"{PACKAGE}.binary_sensor",
+)
+
+_MARKER = "--- waterlevel_ie ---"
+
+
+def synthetic_feed(stations: int) -> dict[str, Any]:
+    """Return an OPW-shaped feed with every sensor of every station."""
+    from custom_components.waterlevel_ie import rivers as rivers_mod  # noqa: PLC0415
+
+    rng = random.Random(1)
+    refs = list(rivers_mod.station_river_map())[:stations]
+    refs += [f"{40000 - i:010d}" for i in range(stations - len(refs))]
+    features = []
+    for i, ref in enumerate(refs):
+        coords = [-10 + rng.random() * 4, 51.5 + rng.random() * 3.8]
+        for sensor, base in SENSOR_BASES:
+            value = base if sensor == "OD" else base + rng.random()
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": coords},
+                    "properties": {
+                        "station_ref": ref,
+                        "station_name": f"Station {i}",
+                        "sensor_ref": sensor,
+                        "region_id": i % 8,
+                        "datetime": "2026-01-01T00:00:00Z",
+                        "value": f"{value:.3f}",
+                        "err_code": 99,
+                    },
+                }
+            )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def import_profile() -> tuple[list[tuple[str, int, int]], list[tuple[str, int]]]:
+    """Return the integration's modules and other newly imported modules.
+
+    Each integration module comes with its self and cumulative import time in
+    microseconds; the others with their cumulative time.
+    """
+    code = "; ".join(
+        [*(f"import {name}" for name in BASELINE_MODULES)]
+        + [
+            "import sys",
+            f"sys.stderr.write({_MARKER!r} + '\\n')",
+            "sys.stderr.flush()",
+            *(f"import {name}" for name in SETUP_IMPORTS),
+        ]
+    )
+    # The first run writes any stale bytecode, as the first start after an
+    # update would; the second is the one measured.
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    lines = result.stderr.split(_MARKER, 1)[1].splitlines()
+    ours: list[tuple[str, int, int]] = []
+    others: list[tuple[str, int]] = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        name = name.strip()
+        if name.startswith(PACKAGE) or name == "custom_components":
+            ours.append((name, int(self_us), int(cumulative_us)))
+        else:
+            others.append((name, int(cumulative_us)))
+    return ours, others
+
+
+class Timeline:
+    """Start and end of named setup phases, from wrapped coroutines."""
+
+    def __init__(self) -> None:
+        """Initialize an empty timeline."""
+        self.spans: dict[str, tuple[float, float]] = {}
+        self._restore: list[Callable[[], None]] = []
+
+    def wrap(self, owner: Any, attr: str, label: str) -> None:
+        """Time every await of owner.attr under label (first call only)."""
+        original = getattr(owner, attr)
+        spans = self.spans
+
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                spans.setdefault(label, (start, time.perf_counter()))
+
+        setattr(owner, attr, timed)
+        self._restore.append(lambda: setattr(owner, attr, original))
+
+    def restore(self) -> None:
+        """Undo every wrap."""
+        for restore in reversed(self._restore):
+            restore()
+        self._restore.clear()
+
+
+async def setup_once(
+    hass: Any, label: str
+) -> tuple[float, float, int, dict[str, tuple[float, float]]]:
+    """Add a config entry and time its setup.
+
+    Returns the time until the sensor entities were handed to Home Assistant,
+    the time until every entity was added, the entity count and the phases as
+    {name: (offset, duration)}.
+    """
+    from homeassistant.config_entries import SOURCE_USER, ConfigEntry  # noqa: PLC0415
+    from homeassistant.helpers import entity_registry as er  # noqa: PLC0415
+
+    from custom_components.waterlevel_ie import binary_sensor, sensor  # noqa: PLC0415
+    import custom_components.waterlevel_ie as integration  # noqa: PLC0415
+    from custom_components.waterlevel_ie.coordinator import (  # noqa: PLC0415
+        WaterLevelDataCoordinator,
+    )
+    from custom_components.waterlevel_ie.hub import FeedHub  # noqa: PLC0415
+
+    timeline = Timeline()
+    timeline.wrap(integration, "async_setup", "component setup")
+    timeline.wrap(integration, "_async_coordinator_settings", "coordinator settings")
+    timeline.wrap(FeedHub, "async_load_cache", "cache load")
+    timeline.wrap(
+        WaterLevelDataCoordinator, "async_config_entry_first_refresh", "first refresh"
+    )
+    timeline.wrap(sensor, "async_setup_entry", "sensor platform")
+    timeline.wrap(binary_sensor, "async_setup_entry", "binary_sensor platform")
+
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=integration.DOMAIN,
+        title=f"WaterLevel.ie ({label})",
+        data={},
+        source=SOURCE_USER,
+        options={},
+    )
+    start = time.perf_counter()
+    try:
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+    finally:
+        timeline.restore()
+    total = time.perf_counter() - start
+    entities = len(er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id))
+    phases = {
+        name: (begin - start, end - begin)
+        for name, (begin, end) in sorted(timeline.spans.items(), key=lambda i: i[1])
+    }
+    await hass.config_entries.async_remove(entry.entry_id)
+    first = timeline.spans["sensor platform"][1] - start
+    return first, total, entities, phases
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Profile the import and two setups; returns the exit code."""
+    failures: list[str] = []
+
+    ours, others = import_profile()
+    import_us = sum(self_us for _name, self_us, _cumulative in ours)
+    print(f"integration import: {import_us / 1000:.1f} ms")
+    for name, self_us, cumulative_us in sorted(ours, key=lambda item: -item[2]):
+        print(
+            f"  {name.replace(PACKAGE, '<pkg>'):<32}"
+            f"{self_us / 1000:7.2f} ms self {cumulative_us / 1000:7.2f} ms cumulative"
+        )
+    if others:
+        print("other modules imported by the integration:")
+        for name, cumulative_us in sorted(others, key=lambda item: -item[1])[:10]:
+            print(f"  {name:<32}{cumulative_us / 1000:7.2f} ms")
+    if import_us / 1000 > args.max_import_ms:
+        failures.append(
+            f"import took {import_us / 1000:.1f} ms (budget {args.max_import_ms} ms)"
+        )
+
+    # Everything below runs in this process: import Home Assistant first so
+    # the setups only measure the integration.
+    for name in BASELINE_MODULES:
+        __import__(name)
+    from homeassistant import config_entries, loader  # noqa: PLC0415
+    from homeassistant.core import CoreState, HomeAssistant  # noqa: PLC0415
+    from homeassistant.helpers import (  # noqa: PLC0415
+        area_registry as ar,
+        device_registry as dr,
+        entity,
+        entity_registry as er,
+        translation,
+    )
+
+    feed = synthetic_feed(args.stations)
+    latency = args.latency_ms / 1000
+
+    async def handle(_request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        response = web.json_response(feed)
+        response.enable_compression()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/geojson/latest/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+
+    from custom_components.waterlevel_ie import hub as hub_mod  # noqa: PLC0415
+    from custom_components.waterlevel_ie import rivers as rivers_mod  # noqa: PLC0415
+    from custom_components.waterlevel_ie.const import DATA_HUB  # noqa: PLC0415
+
+    hub_mod.API_URL = f"http://127.0.0.1:{port}/geojson/latest/"
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        # Home Assistant's loader finds the integration in the config dir.
+        os.symlink(ROOT / "custom_components", Path(config_dir, "custom_components"))
+        hass = HomeAssistant(config_dir)
+        hass.config.skip_pip = True
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        loader.async_setup(hass)
+        translation.async_setup(hass)
+        entity.async_setup(hass)
+        await ar.async_load(hass)
+        await dr.async_load(hass)
+        await er.async_load(hass)
+        # The dependencies are Home Assistant's to set up; mark them done.
+        hass.config.components.update({"http", "websocket_api"})
+        hass.set_state(CoreState.running)
+
+        for label in ("cold", "warm"):
+            # A restart starts without the shared hub and the river map.
+            hass.data.pop(DATA_HUB, None)
+            rivers_mod._river_map.cache_clear()  # noqa: SLF001
+            first, total, entities, phases = await setup_once(hass, label)
+            print(
+                f"\n{label} start: first entities at {first * 1000:.1f} ms, "
+                f"all {entities} added by Home Assistant at {total * 1000:.1f} ms"
+            )
+            for name, (offset, duration) in phases.items():
+                print(
+                    f"  {name:<24} at {offset * 1000:8.1f} ms"
+                    f"  took {duration * 1000:8.1f} ms"
+                )
+            if first * 1000 > args.max_setup_ms:
+                failures.append(
+                    f"{label} start took {first * 1000:.0f} ms to first entities "
+                    f"(budget {args.max_setup_ms} ms)"
+                )
+            if label == "cold":
+                eager = [name for name in LAZY_MODULES if name in sys.modules]
+                if eager:
+                    failures.append(f"loaded by a default setup: {', '.join(eager)}")
+
+        await hass.async_stop(force=True)
+    await runner.cleanup()
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stations", type=int, default=450)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Simulated feed latency"
+    )
+    parser.add_argument("--max-import-ms", type=float, default=50)
+    parser.add_argument(
+        "--max-setup-ms", type=float, default=1000, help="Budget to first entities"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    # The sensor platform's unit validation is noisy outside a real setup.
+    logging.getLogger("homeassistant.components.sensor").setLevel(logging.ERROR)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
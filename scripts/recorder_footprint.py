@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Recorder footprint of WaterLevel.ie per day, with and without footprint mode.
+
+Drives a real WaterLevelDataCoordinator through a day of synthetic OPW
+updates (one reading per sensor every 15 minutes, Ordnance Datum constant)
+and replays every gauge sensor's state the way Home Assistant's state
+machine and recorder would treat it:
+
+- a states row whenever the state or attributes change,
+- a state_attributes row whenever the recorded attributes (unrecorded and
+  globally excluded attributes removed) have not been seen before, with
+  their JSON size,
+- 288 short-term and 24 long-term statistics rows per entity with a state
+  class.
+
+    python scripts/recorder_footprint.py --stations 450
+
+Needs a Home Assistant development environment (the homeassistant package).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+from pathlib import Path
+import random
+import sys
+import tempfile
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.const import (  # noqa: E402
+    ATTR_ATTRIBUTION,
+    ATTR_RESTORED,
+    ATTR_SUPPORTED_FEATURES,
+)
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.json import json_bytes  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.waterlevel_ie import rivers as rivers_mod  # noqa: E402
+from custom_components.waterlevel_ie.coordinator import (  # noqa: E402
+    WaterLevelDataCoordinator,
+)
+from custom_components.waterlevel_ie.sensor import (  # noqa: E402
+    STATIC_SENSOR_ATTRIBUTES,
+    WaterLevelFootprintSensor,
+    WaterLevelSensor,
+)
+
+# Attributes the recorder never stores (its ALL_DOMAIN_EXCLUDE_ATTRS; the
+# recorder package itself needs extra dependencies to import).
+ALL_DOMAIN_EXCLUDE_ATTRS = frozenset(
+    {ATTR_ATTRIBUTION, ATTR_RESTORED, ATTR_SUPPORTED_FEATURES}
+)
+
+CYCLES_PER_DAY = 96
+# Statistics rows per entity with a state class: 5-minute and hourly.
+SHORT_TERM_PER_DAY = 288
+LONG_TERM_PER_DAY = 24
+
+SENSOR_BASES = (("0001", 1.0), ("0002", 9.0), ("0003", 12.0), ("OD", 30.0))
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def synthetic_feed(stations: int, cycle: int) -> dict[str, Any]:
+    """Return an OPW-shaped feed with every reading timestamped this cycle."""
+    rng = random.Random(cycle)
+    refs = list(rivers_mod.station_river_map())[:stations]
+    refs += [f"{40000 - i:010d}" for i in range(stations - len(refs))]
+    timestamp = (START + timedelta(minutes=15 * cycle)).isoformat()
+    features = []
+    for i, ref in enumerate(refs):
+        coords = [-10 + (i % 40) * 0.1, 51.5 + (i // 40) * 0.1]
+        for sensor, base in SENSOR_BASES:
+            value = base if sensor == "OD" else base + rng.random()
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": coords},
+                    "properties": {
+                        "station_ref": ref,
+                        "station_name": f"Station {i}",
+                        "sensor_ref": sensor,
+                        "region_id": i % 8,
+                        "datetime": timestamp,
+                        "value": f"{value:.3f}",
+                        "err_code": 99,
+                    },
+                }
+            )
+    return {"type": "FeatureCollection", "features": features}
+
+
+async def measure(
+    hass: HomeAssistant, stations: int, footprint: bool
+) -> dict[str, int]:
+    """Return the day's recorder rows and bytes for one mode."""
+    coordinator = WaterLevelDataCoordinator(
+        hass, 15, None, recorder_footprint=footprint
+    )
+    hub = coordinator.hub
+    sensor_class = WaterLevelFootprintSensor if footprint else WaterLevelSensor
+    entities: list[WaterLevelSensor] = []
+    last: dict[str, tuple[str, dict[str, Any]]] = {}
+    seen_attrs: set[bytes] = set()
+    totals = {"entities": 0, "states": 0, "attributes": 0, "attribute_bytes": 0}
+
+    for cycle in range(CYCLES_PER_DAY):
+        # Feed the hub directly and mark the fetch fresh so it is reused.
+        hub.data = hub._parse_data(synthetic_feed(stations, cycle))  # noqa: SLF001
+        hub.last_successful_update = dt_util.utcnow()
+        hub._last_attempt = hub.last_successful_update  # noqa: SLF001
+        await coordinator.async_refresh()
+        if not entities:
+            for station_id, station in coordinator.data.items():
+                for sensor_type in station["sensors"]:
+                    if footprint and sensor_type in STATIC_SENSOR_ATTRIBUTES:
+                        continue
+                    entity = sensor_class(coordinator, station_id, sensor_type)
+                    entity.hass = hass
+                    entity.entity_id = f"sensor.{station_id}_{sensor_type.lower()}"
+                    entities.append(entity)
+            totals["entities"] = len(entities)
+
+        for entity in entities:
+            calculated = entity._async_calculate_state()  # noqa: SLF001
+            state = (calculated.state, calculated.attributes)
+            if last.get(entity.entity_id) == state:
+                continue
+            last[entity.entity_id] = state
+            totals["states"] += 1
+            excluded = ALL_DOMAIN_EXCLUDE_ATTRS | entity._unrecorded_attributes  # noqa: SLF001
+            shared = json_bytes(
+                {
+                    key: value
+                    for key, value in calculated.attributes.items()
+                    if key not in excluded
+                }
+            )
+            if shared not in seen_attrs:
+                seen_attrs.add(shared)
+                totals["attributes"] += 1
+                totals["attribute_bytes"] += len(shared)
+
+    with_statistics = sum(1 for entity in entities if entity.state_class)
+    totals["statistics"] = with_statistics * (SHORT_TERM_PER_DAY + LONG_TERM_PER_DAY)
+    await coordinator.async_shutdown()
+    return totals
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Measure both modes and print the comparison."""
+    # The sensor platform's unit validation is noisy outside a real setup.
+    logging.getLogger("homeassistant.components.sensor").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await hass.async_add_executor_job(rivers_mod.station_river_map)
+        before = await measure(hass, args.stations, False)
+        after = await measure(hass, args.stations, True)
+        await hass.async_stop(force=True)
+
+    print(f"recorder footprint per day, {args.stations} stations")
+    print(f"  {'':24}{'default':>12}{'footprint':>12}{'change':>9}")
+    for key, label in (
+        ("entities", "gauge entities"),
+        ("states", "states rows"),
+        ("attributes", "state_attributes rows"),
+        ("attribute_bytes", "state_attributes bytes"),
+        ("statistics", "statistics rows"),
+    ):
+        change = (after[key] - before[key]) / before[key] * 100 if before[key] else 0
+        print(f"  {label:24}{before[key]:>12,}{after[key]:>12,}{change:>8.0f}%")
+
+
+def main() -> None:
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=450)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
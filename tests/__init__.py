@@ -0,0 +1,104 @@
+"""Tests for the WaterLevel.ie integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.waterlevel_ie.const import API_URL, DATA_HUB, DOMAIN
+
+# Two gauges on the Fane, two on the Glyde and one on the Deele (see
+# station_rivers.json).
+FANE = ("0000006011", "0000006012")
+GLYDE = ("0000006014", "0000006021")
+DEELE = ("0000001041",)
+REFS = FANE + GLYDE + DEELE
+
+# Reading time of cycle 0; later cycles are 15 minutes apart.
+BASE_TIME = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def cycle_time(cycle: int) -> datetime:
+    """Return the reading time of an update cycle."""
+    return BASE_TIME + timedelta(minutes=15 * cycle)
+
+
+def make_feed(
+    cycle: int = 0,
+    levels: dict[str, float | None] | None = None,
+    refs: tuple[str, ...] = REFS,
+    datums: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Return an OPW geojson feed of a level (0001) and OD reading per station.
+
+    Levels default to 1.0 + index / 10 and datums to 20.0 + index; levels
+    maps a station to another level (None drops its level reading).
+    """
+    levels = levels or {}
+    datums = datums or {}
+    timestamp = cycle_time(cycle).isoformat().replace("+00:00", "Z")
+    features = []
+    for index, ref in enumerate(refs):
+        level = levels.get(ref, 1.0 + index / 10)
+        readings = [("OD", datums.get(ref, 20.0 + index))]
+        if level is not None:
+            readings.insert(0, ("0001", level))
+        for sensor, value in readings:
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [-8.0 - index * 0.1, 53.0 + index * 0.05],
+                    },
+                    "properties": {
+                        "station_ref": ref,
+                        "station_name": f"Station {index}",
+                        "sensor_ref": sensor,
+                        "region_id": 1 + index % 2,
+                        "datetime": timestamp,
+                        "value": f"{value:.3f}",
+                        "err_code": 99,
+                    },
+                }
+            )
+    return {"type": "FeatureCollection", "features": features}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    feed: dict[str, Any] | None = None,
+    **options: Any,
+) -> MockConfigEntry:
+    """Set up an entry with these options, serving a feed."""
+    aioclient_mock.get(API_URL, json=feed or make_feed())
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={}, options={"update_interval": 15, **options}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def async_next_cycle(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    feed: dict[str, Any] | None = None,
+    **response: Any,
+) -> None:
+    """Serve a new feed (or response) and run every loaded entry's cycle."""
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(API_URL, **(response or {"json": feed}))
+    await hass.data[DATA_HUB].async_refresh(force=True)
+    for coordinator in hass.data[DOMAIN].values():
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
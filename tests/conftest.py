@@ -0,0 +1,8 @@
+"""Fixtures for WaterLevel.ie tests."""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading custom_components in every test."""
+    yield
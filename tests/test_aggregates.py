@@ -0,0 +1,124 @@
+"""Tests for the incremental per-river aggregates."""
+from datetime import datetime, timezone
+import random
+
+import pytest
+
+from custom_components.waterlevel_ie.aggregates import (
+    LEVEL_SENSOR,
+    NORMAL_ERR_CODE,
+    RiverAggregator,
+)
+
+from . import GLYDE, async_next_cycle, async_setup_entry, make_feed
+
+RIVERS = ("Fane", "Glyde", "Deele", None)
+
+
+def _station(rng: random.Random, with_level: bool = True) -> dict:
+    """Return a random station entry with an OD and maybe a level reading."""
+    moment = datetime.fromtimestamp(rng.randrange(10**6) * 900, timezone.utc)
+    sensors = {"OD": {"value": rng.uniform(0, 50), "err_code": NORMAL_ERR_CODE}}
+    if with_level:
+        sensors[LEVEL_SENSOR] = {
+            "value": rng.uniform(-1, 5),
+            "err_code": rng.choice((NORMAL_ERR_CODE, NORMAL_ERR_CODE, 1)),
+        }
+    return {"last_updated": moment.isoformat(), "sensors": sensors}
+
+
+def _delta(old: dict, new: dict) -> tuple[set, set]:
+    """Return the (changed, removed) reading keys between two snapshots."""
+    changed = {
+        (ref, sensor)
+        for ref, station in new.items()
+        for sensor, reading in station["sensors"].items()
+        if old.get(ref, {}).get("sensors", {}).get(sensor) != reading
+        or old[ref]["last_updated"] != station["last_updated"]
+    }
+    removed = {
+        (ref, sensor)
+        for ref, station in old.items()
+        for sensor in station["sensors"]
+        if sensor not in new.get(ref, {}).get("sensors", {})
+    }
+    return changed, removed
+
+
+def _recompute(data: dict, river_for_ref) -> dict:
+    """Return every river's statistics computed from scratch."""
+    rivers: dict = {}
+    for ref, station in data.items():
+        river = river_for_ref(ref)
+        if not river:
+            continue
+        stats = rivers.setdefault(river, {"levels": {}, "alarms": set(), "updated": {}})
+        level = station["sensors"].get(LEVEL_SENSOR)
+        if level is not None:
+            stats["levels"][ref] = level["value"]
+            if level["err_code"] != NORMAL_ERR_CODE:
+                stats["alarms"].add(ref)
+        stats["updated"][ref] = datetime.fromisoformat(
+            station["last_updated"]
+        ).timestamp()
+    return rivers
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_recompute(seed):
+    """After every random cycle the aggregates equal a full recompute."""
+    rng = random.Random(seed)
+    refs = [f"{6000000000 + n:010d}" for n in range(40)]
+    river_of = {ref: rng.choice(RIVERS) for ref in refs}
+    aggregator = RiverAggregator()
+    data: dict = {}
+
+    for _cycle in range(200):
+        new = dict(data)
+        for ref in rng.sample(refs, rng.randint(0, 12)):
+            action = rng.random()
+            if action < 0.15:
+                new.pop(ref, None)
+            else:
+                new[ref] = _station(rng, with_level=action > 0.25)
+        changed, removed = _delta(data, new)
+        data = new
+        aggregator.apply(data, changed, removed, river_of.get)
+
+        expected = _recompute(data, river_of.get)
+        assert set(aggregator.rivers) == set(expected)
+        for river, stats in aggregator.rivers.items():
+            want = expected[river]
+            levels = want["levels"]
+            assert stats.levels == levels
+            assert stats.alarms == want["alarms"]
+            assert stats.count == len(levels)
+            if levels:
+                high = max(levels, key=levels.get)
+                low = min(levels, key=levels.get)
+                assert stats.max == (high, levels[high])
+                assert stats.min == (low, levels[low])
+                assert stats.mean == pytest.approx(sum(levels.values()) / len(levels))
+            else:
+                assert stats.max is stats.min is stats.mean is None
+            newest = max(want["updated"].values())
+            assert stats.latest[1] == newest
+            assert want["updated"][stats.latest[0]] == newest
+            # Lazy deletion keeps the heaps within the compaction bound.
+            assert len(stats._max_heap) <= 2 * len(refs) + 8
+
+
+async def test_river_sensors_follow_feed(hass, aioclient_mock):
+    """River sensors track the highest level and drop gauges leaving the feed."""
+    await async_setup_entry(hass, aioclient_mock, rivers=["Glyde"])
+    assert hass.states.get("sensor.glyde_highest_water_level").state == "1.3"
+
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(1, levels={GLYDE[0]: 4.5})
+    )
+    assert hass.states.get("sensor.glyde_highest_water_level").state == "4.5"
+
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(2, levels={GLYDE[0]: None})
+    )
+    assert hass.states.get("sensor.glyde_highest_water_level").state == "1.3"
@@ -0,0 +1,131 @@
+"""Tests for the on-disk reading archive."""
+from datetime import datetime, timezone
+import gzip
+
+from custom_components.waterlevel_ie.archive import ReadingArchive
+
+# Start of the current month (UTC), so retention never prunes the test data.
+_NOW = datetime.now(timezone.utc)
+START = int(datetime(_NOW.year, _NOW.month, 1, tzinfo=timezone.utc).timestamp())
+MONTH = f"{_NOW.year:04d}-{_NOW.month:02d}"
+
+
+def _rows(stations, cycles):
+    """Return rows of two sensors per station, one per 15-minute cycle."""
+    return [
+        (START + cycle * 900, station, sensor, 1.0 + cycle / 100)
+        for cycle in range(cycles)
+        for station in stations
+        for sensor in ("0001", "OD")
+    ]
+
+
+def test_indexed_read_matches_full_scan(tmp_path):
+    """Reading a few stations through the index gives their full-scan rows."""
+    archive = ReadingArchive(tmp_path)
+    stations = [f"00000{n:05d}" for n in range(20)]
+    for batch in range(3):
+        archive._write(_rows(stations, 8), 13)
+        stations.append(f"00000{90 + batch:05d}")
+
+    wanted = {stations[1], stations[-1]}
+    indexed = list(archive.iter_rows(None, None, wanted))
+    scanned = [
+        row for row in archive.iter_rows(None, None, None) if row[1] in wanted
+    ]
+    assert indexed
+    assert sorted(indexed) == sorted(scanned)
+    assert (tmp_path / f"{MONTH}.idx").exists()
+
+
+def test_unindexed_tail_is_read(tmp_path):
+    """Members written without index lines (or by older versions) are read."""
+    archive = ReadingArchive(tmp_path)
+    archive._write(_rows(["0000000001"], 4), 13)
+    with (tmp_path / f"{MONTH}.csv.gz").open("ab") as file:
+        file.write(gzip.compress(f"{START + 9000},0000000002,0001,2.5\n".encode()))
+
+    rows = list(archive.iter_rows(None, None, {"0000000002"}))
+    assert rows == [(START + 9000, "0000000002", "0001", 2.5)]
+
+
+def test_malformed_rows_are_skipped(tmp_path):
+    """A bad row is skipped without dropping the rest of the month."""
+    archive = ReadingArchive(tmp_path)
+    tmp_path.mkdir(exist_ok=True)
+    text = (
+        f"{START},0000000001,0001,1.0\n"
+        f"bad,0000000001,0001,1.1\n"
+        f"{START + 900},0000000001,0001,not-a-number\n"
+        f"{START + 1800},0000000001,0001,1.2\n"
+    )
+    (tmp_path / f"{MONTH}.csv.gz").write_bytes(gzip.compress(text.encode()))
+
+    assert [row[0] for row in archive.iter_rows(None, None, None)] == [
+        START,
+        START + 1800,
+    ]
+
+
+def test_pending_rows_are_included(tmp_path):
+    """Readings still buffered are read after the files."""
+    archive = ReadingArchive(tmp_path)
+    archive._write(_rows(["0000000001"], 2), 13)
+    pending = [(START + 3600, "0000000001", "0001", 3.0)]
+
+    rows = list(archive.iter_rows(None, None, {"0000000001"}, pending))
+    assert rows[-1] == pending[0]
+
+
+def test_unindexed_gap_between_flushes_is_read(tmp_path):
+    """A flush that lost its index lines is read even with later flushes."""
+    archive = ReadingArchive(tmp_path)
+    stations = ["0000000001", "0000000002"]
+    index = tmp_path / f"{MONTH}.idx"
+    archive._write(_rows(stations, 2), 13)
+    indexed = index.read_bytes()
+    # Second flush: data written, then a crash before its index lines.
+    archive._write(
+        [(START + 7200, station, "0001", 5.0) for station in stations], 13
+    )
+    index.write_bytes(indexed)
+    archive._write(
+        [(START + 10800, station, "0001", 6.0) for station in stations], 13
+    )
+
+    wanted = {"0000000002"}
+    filtered = list(archive.iter_rows(None, None, wanted))
+    scanned = [row for row in archive.iter_rows(None, None, None) if row[1] in wanted]
+    assert filtered == scanned
+    assert (START + 7200, "0000000002", "0001", 5.0) in filtered
+    assert filtered[-1] == (START + 10800, "0000000002", "0001", 6.0)
+
+
+def test_unindexed_prefix_is_read(tmp_path):
+    """Members written before the index existed are read by filtered reads."""
+    archive = ReadingArchive(tmp_path)
+    (tmp_path / f"{MONTH}.csv.gz").write_bytes(
+        gzip.compress(f"{START},0000000001,0001,0.5\n".encode())
+    )
+    archive._write(_rows(["0000000001"], 2), 13)
+
+    rows = list(archive.iter_rows(None, None, {"0000000001"}))
+    assert rows[0] == (START, "0000000001", "0001", 0.5)
+    assert len(rows) == 4
+
+
+def test_torn_member_is_skipped(tmp_path):
+    """A torn member mid-month loses only its own rows."""
+    archive = ReadingArchive(tmp_path)
+    archive._write([(START, "0000000001", "0001", 1.0)], 13)
+    torn = gzip.compress(
+        "".join(f"{START + n},0000000001,0001,2.0\n" for n in range(1, 200)).encode()
+    )
+    with (tmp_path / f"{MONTH}.csv.gz").open("ab") as file:
+        file.write(torn[: len(torn) // 2])
+    archive._write([(START + 7200, "0000000001", "0001", 3.0)], 13)
+
+    for refs in (None, {"0000000001"}):
+        rows = list(archive.iter_rows(None, None, refs))
+        assert rows[0] == (START, "0000000001", "0001", 1.0)
+        assert rows[-1] == (START + 7200, "0000000001", "0001", 3.0)
@@ -0,0 +1,91 @@
+"""Tests for the per-cycle change feed."""
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.waterlevel_ie.changefeed import async_get_change_feed
+from custom_components.waterlevel_ie.const import EVENT_READINGS_UPDATED
+
+from . import (
+    DEELE,
+    FANE,
+    GLYDE,
+    async_next_cycle,
+    async_setup_entry,
+    cycle_time,
+    make_feed,
+)
+
+
+def _subscribe(hass, **filters) -> list[tuple[str, str]]:
+    """Subscribe with these filters; return the (station, sensor) keys received."""
+    received: list[tuple[str, str]] = []
+
+    def _callback(changed, removed):
+        received.extend(
+            (reading["station_ref"], reading["sensor_type"])
+            for reading in (*changed, *removed)
+        )
+
+    async_get_change_feed(hass).async_subscribe(_callback, **filters)
+    return received
+
+
+async def test_subscriber_filters(hass, aioclient_mock):
+    """Subscribers only get the readings their filters accept."""
+    await async_setup_entry(hass, aioclient_mock)
+    everything = _subscribe(hass)
+    station = _subscribe(hass, station_refs=[FANE[0]])
+    river = _subscribe(hass, rivers=["Glyde"], sensor_types=["0001"])
+    nothing = _subscribe(hass, station_refs=[FANE[0]], rivers=["Glyde"])
+
+    # Readings are re-timestamped; the Deele gauge drops its level reading.
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(1, levels={DEELE[0]: None})
+    )
+    assert sorted(station) == [(FANE[0], "0001"), (FANE[0], "OD")]
+    assert sorted(river) == [(GLYDE[0], "0001"), (GLYDE[1], "0001")]
+    assert nothing == []
+    assert (DEELE[0], "0001") in everything
+    assert len(everything) == 2 * len(FANE + GLYDE) + 2
+
+
+async def test_one_report_across_entries(hass, aioclient_mock):
+    """A reading tracked by two entries is reported once."""
+    await async_setup_entry(hass, aioclient_mock, stations=list(FANE))
+    await async_setup_entry(hass, aioclient_mock, rivers=["Fane", "Glyde"])
+    events = async_capture_events(hass, EVENT_READINGS_UPDATED)
+    received = _subscribe(hass)
+
+    await async_next_cycle(hass, aioclient_mock, make_feed(1))
+    assert sorted(received) == sorted(
+        (ref, sensor) for ref in FANE + GLYDE for sensor in ("0001", "OD")
+    )
+    assert sum(event.data["changed"] for event in events) == len(received)
+
+    # Nothing new: nothing is reported.
+    received.clear()
+    await async_next_cycle(hass, aioclient_mock, make_feed(1))
+    assert received == []
+
+
+async def test_value_change_at_same_timestamp(hass):
+    """A reading republished with another value is reported again."""
+    feed = async_get_change_feed(hass)
+    received = _subscribe(hass)
+    reading = {
+        "station_ref": FANE[0],
+        "sensor_type": "0001",
+        "datetime": cycle_time(1).isoformat(),
+        "value": 1.25,
+    }
+
+    feed.async_publish([reading], [])
+    feed.async_publish([reading], [])
+    assert len(received) == 1
+
+    # e.g. the reading filter now holds the same reading back as a spike.
+    feed.async_publish([{**reading, "value": 1.0, "quality": "spike"}], [])
+    assert len(received) == 2
+
+    feed.async_publish([], [reading])
+    feed.async_publish([], [reading])
+    assert len(received) == 3
@@ -0,0 +1,65 @@
+"""Tests for downsampled chart series."""
+from custom_components.waterlevel_ie.charts import (
+    SOURCE_HISTORY,
+    async_chart_series,
+    async_get_chart_cache,
+    lttb,
+)
+
+from . import FANE, async_next_cycle, async_setup_entry, cycle_time, make_feed
+
+
+def test_lttb_boundaries():
+    """Short series and tiny thresholds are returned whole; ends are kept."""
+    points = [(float(t), float(t % 7)) for t in range(10)]
+    assert lttb([], 5) == []
+    assert lttb(points, 10) == points
+    assert lttb(points, 50) == points
+    assert lttb(points, 2) == points
+    assert lttb(points, 2) is not points
+
+    sampled = lttb(points, 3)
+    assert len(sampled) == 3
+    assert sampled[0] == points[0]
+    assert sampled[-1] == points[-1]
+
+
+def test_lttb_keeps_peak():
+    """A single spike survives heavy downsampling."""
+    points = [(float(t), 1.0) for t in range(1000)]
+    points[421] = (421.0, 5.0)
+    sampled = lttb(points, 20)
+    assert len(sampled) == 20
+    assert (421.0, 5.0) in sampled
+    assert [point[0] for point in sampled] == sorted(point[0] for point in sampled)
+
+
+async def test_history_series_cache(hass, aioclient_mock):
+    """History series are cached until the series gets a new reading."""
+    await async_setup_entry(hass, aioclient_mock, make_feed(0))
+    await async_next_cycle(hass, aioclient_mock, make_feed(1))
+    cache = async_get_chart_cache(hass)
+    key = (FANE[0], "0001")
+    start, end = cycle_time(0), cycle_time(8)
+
+    async def _series() -> dict:
+        (series,) = await async_chart_series(
+            hass, [key], start, end, 100, ("abs", start, end)
+        )
+        return series
+
+    first = await _series()
+    assert first["source"] == SOURCE_HISTORY
+    assert len(first["points"]) == 2
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    assert await _series() == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A new reading invalidates the cached series (the archive is off).
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(2, levels={FANE[0]: 3.25})
+    )
+    third = await _series()
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert third["points"][-1] == [int(cycle_time(2).timestamp()), 3.25]
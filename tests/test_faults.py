@@ -0,0 +1,153 @@
+"""Fault-injection tests for the fetch and retry path.
+
+Deterministic, per-fault counterparts of scripts/fault_harness.py, which
+polls a stub OPW server through random faults for many simulated hours.
+"""
+import asyncio
+from datetime import timedelta
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from homeassistant.const import STATE_UNAVAILABLE
+
+from custom_components.waterlevel_ie.const import (
+    API_URL,
+    DATA_HUB,
+    DATA_RETENTION_HOURS,
+    DOMAIN,
+    MAX_RETRY_ATTEMPTS,
+    STATION_API_URL,
+)
+from custom_components.waterlevel_ie.sources import STATION_REQUEST_BUDGET
+
+from . import FANE, REFS, async_next_cycle, async_setup_entry, make_feed
+
+# Responses OPW has been seen to give, the requests a cycle then sends (client
+# errors are not retried) and the backoffs slept between them.
+RETRIED = (MAX_RETRY_ATTEMPTS, [1, 2])
+FAULTS = {
+    "truncated": ({"text": json.dumps(make_feed(1))[:500]}, RETRIED),
+    "server_error": ({"status": 503}, RETRIED),
+    "rate_limit": ({"status": 429}, (1, [])),
+    "hang": ({"exc": asyncio.TimeoutError()}, RETRIED),
+    "connection_reset": ({"exc": aiohttp.ClientConnectionError()}, RETRIED),
+}
+
+
+@pytest.fixture
+def backoffs():
+    """Record the retry backoffs instead of sleeping through them."""
+    delays: list[float] = []
+    sleep = asyncio.sleep
+
+    async def _sleep(delay, *args, **kwargs):
+        if delay:
+            delays.append(delay)
+        await sleep(0)
+
+    with patch("custom_components.waterlevel_ie.hub.asyncio.sleep", _sleep):
+        yield delays
+
+
+def _levels(hass) -> dict[str, float]:
+    """Return the published level of every tracked station."""
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+    return {
+        ref: station["sensors"]["0001"]["value"]
+        for ref, station in coordinator.data.items()
+    }
+
+
+@pytest.mark.parametrize("fault", FAULTS)
+async def test_fault_serves_retained_data(
+    hass, aioclient_mock, backoffs, caplog, fault
+):
+    """A failed cycle keeps the last data, within its retry budget."""
+    response, (requests, delays) = FAULTS[fault]
+    await async_setup_entry(hass, aioclient_mock, make_feed(0))
+    hub = hass.data[DATA_HUB]
+    before = _levels(hass)
+
+    await async_next_cycle(hass, aioclient_mock, **response)
+    assert aioclient_mock.call_count == requests
+    assert backoffs == delays
+    assert not hub.api_available
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+    assert coordinator.last_update_success
+    assert _levels(hass) == before
+
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(1, levels={FANE[0]: 2.5})
+    )
+    assert aioclient_mock.call_count == 1
+    assert hub.api_available
+    assert _levels(hass)[FANE[0]] == 2.5
+    assert "Unexpected error" not in caplog.text
+
+
+async def test_outage_beyond_retention(hass, aioclient_mock, backoffs, freezer):
+    """Retained data is served for DATA_RETENTION_HOURS, then dropped."""
+    await async_setup_entry(hass, aioclient_mock, make_feed(0))
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+
+    freezer.tick(timedelta(hours=DATA_RETENTION_HOURS) - timedelta(minutes=15))
+    await async_next_cycle(hass, aioclient_mock, status=502)
+    assert coordinator.last_update_success
+    assert all(
+        state.state != STATE_UNAVAILABLE for state in hass.states.async_all("sensor")
+    )
+
+    freezer.tick(timedelta(minutes=30))
+    await async_next_cycle(hass, aioclient_mock, status=502)
+    assert not coordinator.last_update_success
+    assert aioclient_mock.call_count == MAX_RETRY_ATTEMPTS
+    levels = [
+        entity_id
+        for entity_id in hass.states.async_entity_ids("sensor")
+        if entity_id.startswith("sensor.station_")
+        and entity_id.endswith("_water_level")
+    ]
+    assert len(levels) == len(REFS)
+    assert {hass.states.get(entity_id).state for entity_id in levels} == {
+        STATE_UNAVAILABLE
+    }
+
+    await async_next_cycle(hass, aioclient_mock, make_feed(100))
+    assert coordinator.last_update_success
+    assert STATE_UNAVAILABLE not in {
+        hass.states.get(entity_id).state for entity_id in levels
+    }
+
+
+@pytest.mark.parametrize(
+    ("feed_response", "requests"),
+    [
+        ({"json": make_feed(1)}, 2),
+        ({"status": 503}, 1 + MAX_RETRY_ATTEMPTS),
+    ],
+    ids=["feed_ok", "feed_down"],
+)
+async def test_per_station_fault_falls_back(
+    hass, aioclient_mock, backoffs, feed_response, requests
+):
+    """A failed per-station cycle tries the feed without a request storm."""
+    await async_setup_entry(
+        hass, aioclient_mock, stations=[FANE[0]], per_station_fetch=True
+    )
+    hub = hass.data[DATA_HUB]
+    level_url = STATION_API_URL.format(station="06011", sensor="0001")
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(level_url, status=503)
+    aioclient_mock.get(API_URL, **feed_response)
+    await hub.async_refresh(force=True)
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == requests
+    assert requests <= STATION_REQUEST_BUDGET + MAX_RETRY_ATTEMPTS
+    assert str(aioclient_mock.mock_calls[0][1]) == level_url
+    assert hub.usable_data is not None
+    assert hub.api_available == ("json" in feed_response)
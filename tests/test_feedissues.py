@@ -0,0 +1,131 @@
+"""Tests for the summarised logging of feed problems."""
+import logging
+from unittest.mock import patch
+
+from custom_components.waterlevel_ie.const import DATA_HUB
+from custom_components.waterlevel_ie.feedissues import (
+    INVALID_REF,
+    INVALID_VALUE,
+    OUT_OF_RANGE,
+    SUMMARY_INTERVAL,
+    SUMMARY_ITEMS,
+    FeedIssues,
+)
+
+from . import FANE, REFS, async_next_cycle, async_setup_entry, make_feed
+
+LOGGER = logging.getLogger("custom_components.waterlevel_ie.test_feedissues")
+RESTRICTED = ("0000041001", "0000041002")
+
+
+def _cycle(issues: FeedIssues, rows: dict[str, list]) -> None:
+    """Record one parse of the given (key, detail) rows per kind."""
+    issues.start()
+    for kind, kind_rows in rows.items():
+        for key, detail in kind_rows:
+            issues.add(kind, key, detail)
+    issues.finish()
+
+
+def test_summary_only_on_change(caplog):
+    """Repeated rows are logged once; changes are coalesced, clearing is not."""
+    caplog.set_level(logging.INFO, LOGGER.name)
+    issues = FeedIssues(LOGGER)
+    clock = 1000.0
+
+    with patch(
+        "custom_components.waterlevel_ie.feedissues.time.monotonic",
+        lambda: clock,
+    ):
+        for _cycle_number in range(3):
+            _cycle(issues, {OUT_OF_RANGE: [(RESTRICTED[0], "Lough X")]})
+        assert len(caplog.records) == 1
+        assert caplog.records[0].levelno == logging.INFO
+        assert "Filtered 1 stations outside permitted range" in caplog.text
+        assert "41001 (Lough X)" in caplog.text
+
+        # A change within SUMMARY_INTERVAL of the last summary waits...
+        rows = {OUT_OF_RANGE: [(ref, "Lough X") for ref in RESTRICTED]}
+        _cycle(issues, rows)
+        assert len(caplog.records) == 1
+        # ...and is reported once the interval has passed.
+        clock += SUMMARY_INTERVAL
+        _cycle(issues, rows)
+        assert len(caplog.records) == 2
+        assert "(+1 -0): new: 41002 (Lough X)" in caplog.records[1].getMessage()
+
+        # Clearing is reported straight away.
+        _cycle(issues, {})
+        assert caplog.records[2].getMessage() == (
+            "No more stations outside the permitted range in the feed"
+        )
+
+    assert issues.cycles == 6
+    assert issues.summaries == 3
+    assert issues.total_rows[OUT_OF_RANGE] == 3 + 2 + 2
+
+
+def test_malformed_rows(caplog):
+    """Malformed rows are warnings listing at most SUMMARY_ITEMS rows."""
+    caplog.set_level(logging.INFO, LOGGER.name)
+    issues = FeedIssues(LOGGER)
+    bad_values = [((ref, "0001"), "n/a") for ref in REFS]
+    bad_values += [((f"{6100000000 + n:010d}", "0001"), "") for n in range(8)]
+    _cycle(
+        issues,
+        {INVALID_REF: [("abc", None), ("abc", None)], INVALID_VALUE: bad_values},
+    )
+
+    assert [record.levelno for record in caplog.records] == [logging.WARNING] * 2
+    assert "Skipped 2 feed rows with an invalid station_ref: 'abc'" in caplog.text
+    message = caplog.records[1].getMessage()
+    assert message.startswith(f"Skipped {len(bad_values)} readings with an invalid")
+    assert message.endswith(f"and {len(bad_values) - SUMMARY_ITEMS} more")
+
+    last_cycle = issues.as_dict()["last_cycle"]
+    assert last_cycle[INVALID_REF] == {"rows": 2, "items": ["abc"]}
+    assert last_cycle[INVALID_VALUE]["items"][0] == {
+        "station_ref": min(REFS),
+        "sensor_ref": "0001",
+        "value": "n/a",
+    }
+
+
+def test_disabled_level_skips_formatting(caplog):
+    """Nothing is formatted when the summary's level is not enabled."""
+    caplog.set_level(logging.ERROR, LOGGER.name)
+    issues = FeedIssues(LOGGER)
+    with patch("custom_components.waterlevel_ie.feedissues._listing") as listing:
+        _cycle(issues, {INVALID_REF: [("abc", None)]})
+    listing.assert_not_called()
+    assert issues.summaries == 1
+    assert caplog.records == []
+
+
+async def test_feed_issues_logged_once(hass, aioclient_mock, caplog):
+    """The hub logs the feed's restricted stations and bad values once."""
+    caplog.set_level(logging.INFO, "custom_components.waterlevel_ie.hub")
+
+    def _feed(cycle: int) -> dict:
+        """Return a feed with restricted stations and an unparseable value."""
+        feed = make_feed(cycle, refs=REFS + RESTRICTED)
+        for feature in feed["features"]:
+            properties = feature["properties"]
+            if (properties["station_ref"], properties["sensor_ref"]) == (FANE[1], "OD"):
+                properties["value"] = "n/a"
+        return feed
+
+    await async_setup_entry(hass, aioclient_mock, _feed(0))
+    await async_next_cycle(hass, aioclient_mock, _feed(1))
+    await async_next_cycle(hass, aioclient_mock, _feed(2))
+
+    assert caplog.text.count("Filtered 2 stations outside permitted range") == 1
+    assert caplog.text.count("Skipped 1 readings with an invalid value") == 1
+    hub = hass.data[DATA_HUB]
+    assert RESTRICTED[0] not in hub.data
+    assert "OD" not in hub.data[FANE[1]]["sensors"]
+    assert hub.feed_issues.as_dict()["total_rows"] == {
+        OUT_OF_RANGE: 3 * 2 * len(RESTRICTED),
+        INVALID_REF: 0,
+        INVALID_VALUE: 3,
+    }
@@ -0,0 +1,137 @@
+"""Tests for stale and dormant station tracking."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.waterlevel_ie.const import CONF_PAUSE_DORMANT, DOMAIN
+from custom_components.waterlevel_ie.freshness import (
+    DORMANT_AFTER,
+    STALE_AFTER,
+    FreshnessIndex,
+)
+from custom_components.waterlevel_ie.sensor import WaterLevelSensor
+
+from . import GLYDE, async_next_cycle, async_setup_entry, cycle_time, make_feed
+
+HOUR = 3600.0
+# The Glyde gauge that stops reporting, and the entities of both Glyde gauges.
+SILENT = GLYDE[0]
+SILENT_LEVEL = "sensor.station_2_station_2_water_level"
+OTHER_LEVEL = "sensor.station_3_station_3_water_level"
+HIGHEST = "sensor.glyde_highest_water_level"
+STALE = "sensor.waterlevel_ie_api_stale_stations"
+
+
+def _iso(epoch: float) -> str:
+    """Return a POSIX time as an ISO 8601 string."""
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def test_index_thresholds():
+    """Stations go stale, then dormant once, and resume with a new reading."""
+    index = FreshnessIndex()
+    start = cycle_time(0).timestamp()
+    data = {ref: {"last_updated": _iso(start), "sensors": {}} for ref in GLYDE}
+    changed = {(ref, "0001") for ref in GLYDE}
+    assert index.apply(data, changed, set()) == set()
+    assert len(index) == 2
+
+    assert index.advance(start + STALE_AFTER.total_seconds() - 1) == set()
+    assert index.stale == set()
+    assert index.advance(start + STALE_AFTER.total_seconds() + 1) == set()
+    assert index.stale == set(GLYDE)
+
+    # GLYDE[1] reports again; GLYDE[0] goes on to dormant, reported once.
+    later = start + 4 * HOUR
+    data[GLYDE[1]] = {"last_updated": _iso(later), "sensors": {}}
+    assert index.apply(data, {(GLYDE[1], "0001")}, set()) == {GLYDE[1]}
+    dormant_at = start + DORMANT_AFTER.total_seconds() + 1
+    assert index.advance(dormant_at) == {GLYDE[0]}
+    assert index.advance(dormant_at + HOUR) == set()
+    assert index.dormant == {GLYDE[0]}
+    assert index.stale == set(GLYDE)
+
+    # A station leaving the feed is forgotten.
+    del data[GLYDE[0]]
+    index.apply(data, set(), {(GLYDE[0], "0001")})
+    assert len(index) == 1
+    assert index.dormant == set()
+
+
+def _feed(cycle: int) -> dict:
+    """Return a feed in which the silent gauge still reports cycle 0's reading."""
+    feed = make_feed(cycle, levels={SILENT: 5.0})
+    for feature in feed["features"]:
+        if feature["properties"]["station_ref"] == SILENT:
+            feature["properties"]["datetime"] = cycle_time(0).isoformat()
+    return feed
+
+
+@pytest.fixture
+def writes(monkeypatch) -> list[str]:
+    """Record the entity ids of gauge sensors writing their state."""
+    written: list[str] = []
+    write = WaterLevelSensor.async_write_ha_state
+
+    def _write(self):
+        written.append(self.entity_id)
+        write(self)
+
+    monkeypatch.setattr(WaterLevelSensor, "async_write_ha_state", _write)
+    return written
+
+
+async def test_pause_and_resume_dormant(hass, aioclient_mock, freezer, writes):
+    """A dormant gauge leaves the aggregates and stops writing until it reports."""
+    await async_setup_entry(
+        hass, aioclient_mock, _feed(0), rivers=["Glyde"], pause_dormant_stations=True
+    )
+    assert hass.states.get(HIGHEST).state == "5.0"
+
+    freezer.tick(STALE_AFTER + timedelta(hours=1))
+    await async_next_cycle(hass, aioclient_mock, _feed(16))
+    assert hass.states.get(STALE).state == "1"
+    assert hass.states.get(SILENT_LEVEL).attributes["stale"] is True
+    assert hass.states.get(HIGHEST).state == "5.0"
+
+    freezer.tick(DORMANT_AFTER)
+    await async_next_cycle(hass, aioclient_mock, _feed(208))
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+    assert coordinator.freshness.dormant == {SILENT}
+    assert hass.states.get(HIGHEST).state == "1.3"
+
+    # Paused: the dormant gauge's sensors are no longer written.
+    writes.clear()
+    freezer.tick(timedelta(minutes=15))
+    await async_next_cycle(hass, aioclient_mock, _feed(209))
+    assert OTHER_LEVEL in writes
+    assert SILENT_LEVEL not in writes
+
+    # It reports again: written, aggregated and no longer stale.
+    freezer.tick(timedelta(minutes=15))
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(210, levels={SILENT: 4.0})
+    )
+    assert coordinator.freshness.dormant == set()
+    assert hass.states.get(SILENT_LEVEL).state == "4.0"
+    assert hass.states.get(SILENT_LEVEL).attributes["stale"] is False
+    assert hass.states.get(HIGHEST).state == "4.0"
+    assert hass.states.get(STALE).state == "0"
+
+
+async def test_unpause_restores_aggregates(hass, aioclient_mock, freezer):
+    """Turning the option off puts dormant gauges back without a fetch."""
+    entry = await async_setup_entry(
+        hass, aioclient_mock, _feed(0), rivers=["Glyde"], pause_dormant_stations=True
+    )
+    freezer.tick(DORMANT_AFTER + STALE_AFTER)
+    await async_next_cycle(hass, aioclient_mock, _feed(204))
+    assert hass.states.get(HIGHEST).state == "1.3"
+
+    aioclient_mock.clear_requests()
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_PAUSE_DORMANT: False}
+    )
+    await hass.async_block_till_done()
+    assert aioclient_mock.call_count == 0
+    assert hass.states.get(HIGHEST).state == "5.0"
@@ -0,0 +1,65 @@
+"""Tests for the feed fetcher shared by every entry."""
+import asyncio
+
+from custom_components.waterlevel_ie.const import API_URL, DATA_HUB, DOMAIN
+
+from . import FANE, GLYDE, async_next_cycle, async_setup_entry, make_feed
+
+
+async def test_entries_share_one_fetch(hass, aioclient_mock):
+    """Two entries are served by one request per cycle."""
+    await async_setup_entry(hass, aioclient_mock, stations=list(FANE))
+    await async_setup_entry(hass, aioclient_mock, rivers=["Glyde"])
+    assert aioclient_mock.call_count == 1
+    assert len(hass.data[DOMAIN]) == 2
+
+    await async_next_cycle(hass, aioclient_mock, make_feed(1, levels={FANE[0]: 2.5}))
+    assert aioclient_mock.call_count == 1
+    fane, glyde = hass.data[DOMAIN].values()
+    assert set(fane.data) == set(FANE)
+    assert set(glyde.data) == set(GLYDE)
+    assert fane.data[FANE[0]]["sensors"]["0001"]["value"] == 2.5
+
+
+async def test_unload_stops_hub(hass, aioclient_mock):
+    """Unloading the last entry cancels its fetch and closes its session."""
+    first = await async_setup_entry(hass, aioclient_mock, stations=list(FANE))
+    second = await async_setup_entry(hass, aioclient_mock, rivers=["Glyde"])
+    hub = hass.data[DATA_HUB]
+    coordinators = list(hass.data[DOMAIN].values())
+    session = hub._session
+    assert session is not None
+
+    # The hub outlives the first entry.
+    assert await hass.config_entries.async_unload(first.entry_id)
+    assert hass.data[DATA_HUB] is hub
+    assert not session.closed
+
+    # Leave a fetch hanging when the last entry goes (released on failure,
+    # so a broken shutdown fails the test rather than hanging it).
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def _hang(*args):
+        started.set()
+        await release.wait()
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(API_URL, side_effect=_hang)
+    refresh = hass.async_create_task(hub.async_refresh(force=True))
+    await started.wait()
+    task = hub._refresh_task
+    assert task is not None
+
+    try:
+        assert await hass.config_entries.async_unload(second.entry_id)
+        await asyncio.sleep(0)
+        assert DATA_HUB not in hass.data
+        assert not hass.data[DOMAIN]
+        assert task.cancelled()
+        assert refresh.done()
+        assert session.closed
+        assert hub._session is None
+        for coordinator in coordinators:
+            assert coordinator._unsub_refresh is None
+    finally:
+        release.set()
@@ -0,0 +1,53 @@
+"""Tests for the OpenMetrics exporter."""
+from http import HTTPStatus
+import math
+
+from custom_components.waterlevel_ie.metrics import CONTENT_TYPE, _format_value
+
+from . import FANE, async_setup_entry, make_feed
+
+METRICS_URL = "/api/waterlevel_ie/metrics"
+
+
+def test_format_value():
+    """Non-finite values are spelled the way the text format requires."""
+    assert _format_value(1.25) == "1.25"
+    assert _format_value(3) == "3"
+    assert _format_value(math.nan) == "NaN"
+    assert _format_value(math.inf) == "+Inf"
+    assert _format_value(-math.inf) == "-Inf"
+
+
+async def test_scrape(hass, aioclient_mock, hass_client, hass_client_no_auth):
+    """The exposition is served to authenticated clients only."""
+    await async_setup_entry(
+        hass,
+        aioclient_mock,
+        make_feed(0),
+        prometheus_metrics=True,
+    )
+
+    anonymous = await hass_client_no_auth()
+    response = await anonymous.get(METRICS_URL)
+    assert response.status == HTTPStatus.UNAUTHORIZED
+
+    client = await hass_client()
+    response = await client.get(METRICS_URL)
+    assert response.status == HTTPStatus.OK
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    body = await response.text()
+    assert body.endswith("# EOF\n")
+    assert "# TYPE waterlevel_ie_reading gauge\n" in body
+    assert "waterlevel_ie_api_up 1\n" in body
+
+    levels = {
+        line.split('station_ref="', 1)[1][:10]: line.rsplit(" ", 1)[1]
+        for line in body.splitlines()
+        if line.startswith("waterlevel_ie_reading{") and 'sensor_type="0001"' in line
+    }
+    assert levels[FANE[0]] == "1.0"
+    assert levels[FANE[1]] == "1.1"
+    for line in body.splitlines():
+        if not line.startswith("#"):
+            value = line.rsplit(" ", 1)[1]
+            assert value in ("NaN", "+Inf", "-Inf") or math.isfinite(float(value))
@@ -0,0 +1,117 @@
+"""Tests for the options-flow station picker."""
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.waterlevel_ie.const import (
+    CONF_STATION_SEARCH,
+    CONF_STATIONS,
+    DATA_HUB,
+)
+from custom_components.waterlevel_ie.picker import StationPicker
+
+from . import DEELE, FANE, GLYDE, REFS, async_next_cycle, async_setup_entry, make_feed
+
+AVAILABLE = {
+    "0000006011": "Clarebane",
+    "0000006012": "Moyles Mill",
+    "0000006014": "Mansfieldstown",
+    "0000006021": "Tallanstown",
+    "0000025017": "Athlone",
+    "0000099999": "Moyles Mill",
+}
+RIVERS = {
+    "0000006011": "Fane",
+    "0000006012": "Fane",
+    "0000006014": "Glyde",
+    "0000006021": "Glyde",
+    "0000025017": "Shannon",
+}
+REGIONS = {ref: 1 if ref < "0000010000" else 3 for ref in AVAILABLE}
+
+
+def _picker() -> StationPicker:
+    """Return a picker of the stations above."""
+    return StationPicker(AVAILABLE, RIVERS, REGIONS)
+
+
+def test_options_sorted_by_river():
+    """Options are labelled and grouped by river, unmatched stations last."""
+    picker = _picker()
+    assert len(picker) == len(AVAILABLE)
+    assert picker.rivers == ["Fane", "Glyde", "Shannon"]
+    assert [option["label"] for option in picker.options] == [
+        "Fane — Clarebane",
+        "Fane — Moyles Mill",
+        "Glyde — Mansfieldstown",
+        "Glyde — Tallanstown",
+        "Shannon — Athlone",
+        "Moyles Mill",
+    ]
+    # A shared name maps to every station carrying it.
+    assert picker.name_to_refs["moyles mill"] == ["0000006012", "0000099999"]
+
+
+def test_search():
+    """Every query word must prefix a name, river, region or ref word."""
+    picker = _picker()
+    assert picker.search("") == [option["value"] for option in picker.options]
+    assert picker.search("moy") == ["0000006012", "0000099999"]
+    assert picker.search("fane moy") == ["0000006012"]
+    assert picker.search("SHAN ath") == ["0000025017"]
+    assert picker.search("region 3") == ["0000025017", "0000099999"]
+    assert picker.search("6021") == ["0000006021"]
+    assert picker.search("glyde athlone") == []
+    assert picker.search("zzz") == []
+
+
+def test_filtered_options_keep_selection():
+    """A filtered list still offers the stations already selected."""
+    picker = _picker()
+    options = picker.filtered_options("glyde", keep=["0000025017", "unknown"])
+    assert [option["value"] for option in options] == [
+        "0000006014",
+        "0000006021",
+        "0000025017",
+    ]
+
+
+async def test_hub_caches_picker(hass, aioclient_mock):
+    """The picker is built once and rebuilt only when the stations change."""
+    await async_setup_entry(hass, aioclient_mock)
+    hub = hass.data[DATA_HUB]
+    picker = await hub.async_station_picker()
+    assert len(picker) == len(REFS)
+
+    await async_next_cycle(hass, aioclient_mock, make_feed(1))
+    assert await hub.async_station_picker() is picker
+
+    await async_next_cycle(hass, aioclient_mock, make_feed(2, refs=FANE + GLYDE))
+    rebuilt = await hub.async_station_picker()
+    assert rebuilt is not picker
+    assert DEELE[0] not in rebuilt.available
+
+
+async def test_options_flow_search(hass, aioclient_mock):
+    """A search re-shows the form with the matching and selected stations."""
+    entry = await async_setup_entry(hass, aioclient_mock, stations=[DEELE[0]])
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    schema = result["data_schema"].schema
+    stations = next(key for key in schema if key == CONF_STATIONS)
+    assert len(schema[stations].config["options"]) == len(REFS)
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            "update_interval": 15,
+            CONF_STATION_SEARCH: "glyde",
+            CONF_STATIONS: [DEELE[0]],
+        },
+    )
+    assert result["type"] == FlowResultType.FORM
+    schema = result["data_schema"].schema
+    stations = next(key for key in schema if key == CONF_STATIONS)
+    assert [option["value"] for option in schema[stations].config["options"]] == [
+        DEELE[0],
+        *GLYDE,
+    ]
@@ -0,0 +1,161 @@
+"""Tests for upstream ordering and lead-time estimates."""
+from datetime import datetime, timezone
+import random
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.waterlevel_ie.history import ReadingHistory
+from custom_components.waterlevel_ie.propagation import (
+    LAG_MIN_SAMPLES,
+    LAG_STEP_SECONDS,
+    LagEstimate,
+    PropagationIndex,
+    _estimate_one,
+    estimate_lags,
+)
+
+UP, MID, DOWN = "0000006011", "0000006012", "0000006013"
+
+
+def _snapshot(datums: dict[str, float]) -> dict:
+    """Return a snapshot of stations with a level and an Ordnance Datum."""
+    return {
+        ref: {
+            "last_updated": None,
+            "sensors": {
+                "0001": {"value": 1.0, "datetime": None},
+                "OD": {"value": datum, "datetime": None},
+            },
+        }
+        for ref, datum in datums.items()
+    }
+
+
+def _river(_ref: str) -> str:
+    """Put every station on the same river."""
+    return "Fane"
+
+
+def test_failed_reestimate_clears_estimate():
+    """A re-estimate that finds no lag drops the previous one."""
+    index = PropagationIndex({DOWN})
+    index.rebuild(_snapshot({UP: 30.0, DOWN: 10.0}), _river)
+    estimate = LagEstimate(UP, DOWN, 3.0, 0.9)
+    index.apply([(UP, DOWN, estimate)])
+    assert index.estimate(DOWN) == estimate
+
+    # A result for a pairing that no longer exists is ignored.
+    index.apply([(MID, DOWN, None)])
+    assert index.estimate(DOWN) == estimate
+
+    index.apply([(UP, DOWN, None)])
+    assert index.estimate(DOWN) is None
+
+
+def _walk(start: float, samples: int, seed: int = 1) -> list[tuple[float, float]]:
+    """Return a 15-minute level series of a deterministic random walk."""
+    rng = random.Random(seed)
+    level = 1.0
+    series = []
+    for step in range(samples):
+        level += rng.uniform(-0.05, 0.05)
+        series.append((start + step * LAG_STEP_SECONDS, level))
+    return series
+
+
+def test_estimate_recovers_known_lag():
+    """A downstream copy of the upstream series delayed 3 h gives a 3 h lag."""
+    lag_steps = 12
+    upstream = _walk(0.0, 240)
+    downstream = [
+        (time + lag_steps * LAG_STEP_SECONDS, level + 0.5)
+        for time, level in upstream
+    ]
+
+    estimate = _estimate_one(UP, DOWN, upstream, downstream)
+    assert estimate is not None
+    assert estimate.lag_hours == 3.0
+    assert estimate.correlation > 0.99
+
+    # Independent series do not correlate well enough to give a lag.
+    assert _estimate_one(UP, DOWN, upstream, _walk(0.0, 240, seed=2)) is None
+    # Too little shared history for the largest lag gives no estimate.
+    short = upstream[: LAG_MIN_SAMPLES - 2]
+    assert _estimate_one(UP, DOWN, short, short) is None
+
+
+def test_estimate_lags_keys_results():
+    """Every job gets a result keyed by its pair, found or not."""
+    upstream = _walk(0.0, 240)
+    results = estimate_lags(
+        [(UP, DOWN, upstream, upstream), (MID, DOWN, upstream, upstream[:10])]
+    )
+    assert [(up, down) for up, down, _ in results] == [(UP, DOWN), (MID, DOWN)]
+    assert results[0][2].lag_hours == 0.0
+    assert results[1][2] is None
+
+
+def test_rebuild_orders_by_datum():
+    """Stations are ordered by falling datum and paired with the next one up."""
+    index = PropagationIndex({DOWN, MID})
+    snapshot = _snapshot({DOWN: 5.0, UP: 42.0, MID: 17.5})
+    snapshot["0000006014"] = {
+        "last_updated": None,
+        "sensors": {"OD": {"value": 60.0, "datetime": None}},
+    }
+    index.rebuild(snapshot, _river)
+
+    # The station without a level reading is left out.
+    assert index.order == {"Fane": [UP, MID, DOWN]}
+    assert index.upstream_of(MID) == UP
+    assert index.upstream_of(DOWN) == MID
+    assert index.upstream_of(UP) is None
+
+    # A surviving pair keeps its estimate; a re-paired one starts over.
+    estimate = LagEstimate(MID, DOWN, 2.0, 0.8)
+    index.apply([(MID, DOWN, estimate)])
+    index.rebuild(snapshot, _river)
+    assert index.estimate(DOWN) == estimate
+    index.rebuild(_snapshot({DOWN: 5.0, UP: 42.0, MID: 1.0}), _river)
+    assert index.upstream_of(DOWN) == UP
+    assert index.estimate(DOWN) is None
+
+
+def _history(levels: list[float], end: float) -> ReadingHistory:
+    """Return a history of upstream levels at 15-minute steps up to end."""
+    history = ReadingHistory()
+    start = end - (len(levels) - 1) * LAG_STEP_SECONDS
+    for step, level in enumerate(levels):
+        moment = datetime.fromtimestamp(start + step * LAG_STEP_SECONDS, timezone.utc)
+        history.append((UP, "0001"), {"value": level, "datetime": moment.isoformat()})
+    return history
+
+
+def test_rise_status():
+    """An upstream rise gives an ETA of its start plus the lag."""
+    index = PropagationIndex({DOWN})
+    index.rebuild(_snapshot({UP: 30.0, DOWN: 10.0}), _river)
+    now = dt_util.utcnow().timestamp()
+    assert index.rise_status(UP, ReadingHistory()) is None
+
+    # Flat, then rising from an hour ago.
+    rising = _history([1.0] * 8 + [1.05, 1.1, 1.2, 1.3], now)
+    status = index.rise_status(DOWN, rising)
+    assert status == {
+        "upstream": UP,
+        "rise_detected": True,
+        "eta_hours": None,
+        "rise_m": 0.3,
+    }
+
+    index.apply([(UP, DOWN, LagEstimate(UP, DOWN, 3.0, 0.876))])
+    status = index.rise_status(DOWN, rising)
+    assert status["lag_hours"] == 3.0
+    assert status["correlation"] == 0.88
+    # The rise started at the last flat sample, an hour ago.
+    assert status["eta_hours"] == 2.0
+
+    steady = _history([1.0, 1.01, 1.02, 1.01], now)
+    status = index.rise_status(DOWN, steady)
+    assert status["rise_detected"] is False
+    assert status["eta_hours"] is None
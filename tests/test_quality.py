@@ -0,0 +1,123 @@
+"""Tests for the spike and outlier filter."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.waterlevel_ie.const import (
+    READING_FILTER_FLAG,
+    READING_FILTER_SUPPRESS,
+)
+from custom_components.waterlevel_ie.quality import (
+    QUALITY_OK,
+    QUALITY_OUT_OF_RANGE,
+    QUALITY_RATE,
+    QUALITY_SPIKE,
+    QUALITY_STUCK,
+    REJECT_LIMIT,
+    SENSOR_LIMITS,
+    ReadingFilter,
+)
+
+from . import FANE, async_next_cycle, async_setup_entry, make_feed
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+STATION = "0000006011"
+
+
+def _at(step: int) -> str:
+    """Return the timestamp of a 15-minute sample."""
+    return (START + timedelta(minutes=15 * step)).isoformat()
+
+
+def _run(reading_filter: ReadingFilter, values: list[float], sensor: str = "0001"):
+    """Feed a series of samples; return the (published, quality) of each."""
+    return [
+        reading_filter.check(STATION, sensor, value, _at(step))
+        for step, value in enumerate(values)
+    ]
+
+
+BASELINE = [1.00, 1.01, 1.00, 1.02, 1.01, 1.00]
+
+
+@pytest.mark.parametrize(
+    ("mode", "published"),
+    [(READING_FILTER_FLAG, 1.3), (READING_FILTER_SUPPRESS, 1.00)],
+)
+def test_spike(mode, published):
+    """An isolated jump within the rate limit is a spike."""
+    results = _run(ReadingFilter(mode), [*BASELINE, 1.3, 1.01])
+    assert [quality for _, quality in results] == [QUALITY_OK] * 6 + [
+        QUALITY_SPIKE,
+        QUALITY_OK,
+    ]
+    assert results[6][0] == published
+    assert results[7][0] == 1.01
+
+
+def test_out_of_range_and_rate():
+    """Implausible values and jumps are flagged; suppress keeps the last good one."""
+    reading_filter = ReadingFilter(READING_FILTER_SUPPRESS)
+    results = _run(reading_filter, [1.0, -999.0, 3.0, 1.1])
+    assert results == [
+        (1.0, QUALITY_OK),
+        (1.0, QUALITY_OUT_OF_RANGE),
+        (1.0, QUALITY_RATE),
+        (1.1, QUALITY_OK),
+    ]
+    # Unknown sensor types and missing values pass through.
+    assert reading_filter.check(STATION, "OD", -999.0, _at(9)) == (-999.0, QUALITY_OK)
+    assert reading_filter.check(STATION, "0001", None, _at(9)) == (None, QUALITY_OK)
+
+
+def test_persistent_step_is_accepted():
+    """A level that stays at its new value becomes the new baseline."""
+    results = _run(ReadingFilter(READING_FILTER_SUPPRESS), [*BASELINE, *[1.3] * 4])
+    stepped = results[len(BASELINE) :]
+    assert stepped[: REJECT_LIMIT - 1] == [(1.0, QUALITY_SPIKE)] * (REJECT_LIMIT - 1)
+    assert stepped[REJECT_LIMIT - 1] == (1.3, QUALITY_OK)
+    # The new level is published from then on.
+    assert [published for published, _ in stepped[REJECT_LIMIT - 1 :]] == [1.3] * (
+        5 - REJECT_LIMIT
+    )
+
+
+def test_stuck_and_repeated_timestamp():
+    """Only new samples count towards a stuck sensor."""
+    limit = SENSOR_LIMITS["0001"].stuck_samples
+    reading_filter = ReadingFilter()
+    results = _run(reading_filter, [1.0] * (limit + 1))
+    assert [quality for _, quality in results[-2:]] == [QUALITY_OK, QUALITY_STUCK]
+
+    reading_filter = ReadingFilter()
+    for _poll in range(limit + 1):
+        assert reading_filter.check(STATION, "0001", 1.0, _at(0)) == (1.0, QUALITY_OK)
+
+
+def test_prune():
+    """State is dropped for readings that left the feed."""
+    reading_filter = ReadingFilter()
+    reading_filter.check(STATION, "0001", 1.0, _at(0))
+    reading_filter.check(STATION, "0002", 9.0, _at(0))
+    reading_filter.prune({(STATION, "0001")})
+    assert len(reading_filter) == 1
+
+
+async def test_suppressed_reading_entity(hass, aioclient_mock):
+    """A suppressed spike keeps the sensor state and exposes the raw value."""
+    await async_setup_entry(
+        hass,
+        aioclient_mock,
+        stations=[FANE[0]],
+        reading_filter=READING_FILTER_SUPPRESS,
+    )
+    entity_id = "sensor.station_0_station_0_water_level"
+    # Enough history for the rolling median, then a spike.
+    for cycle in range(1, 6):
+        await async_next_cycle(hass, aioclient_mock, make_feed(cycle))
+    await async_next_cycle(hass, aioclient_mock, make_feed(6, levels={FANE[0]: 1.3}))
+
+    state = hass.states.get(entity_id)
+    assert state.state == "1.0"
+    assert state.attributes["quality"] == QUALITY_SPIKE
+    assert state.attributes["raw_value"] == 1.3
@@ -0,0 +1,84 @@
+"""Tests for applying changed options without reloading the entry."""
+from datetime import timedelta
+
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.waterlevel_ie.const import (
+    API_URL,
+    CONF_READING_FILTER,
+    CONF_RECORDER_FOOTPRINT,
+    CONF_STATIONS,
+    CONF_UPDATE_INTERVAL,
+    DOMAIN,
+    READING_FILTER_FLAG,
+)
+
+from . import FANE, GLYDE, async_setup_entry, make_feed
+
+FANE_LEVEL = "sensor.station_0_station_0_water_level"
+GLYDE_LEVEL = "sensor.station_2_station_2_water_level"
+
+
+async def _async_set_options(hass, aioclient_mock, entry, **changes) -> None:
+    """Change some options of an entry and wait for them to be applied."""
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(API_URL, json=make_feed(1))
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, **changes}
+    )
+    await hass.async_block_till_done()
+
+
+async def test_selection_applied_in_place(hass, aioclient_mock):
+    """Selecting and deselecting stations adds and removes their entities only."""
+    entry = await async_setup_entry(hass, aioclient_mock, stations=[FANE[0]])
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert hass.states.get(GLYDE_LEVEL) is None
+
+    await _async_set_options(
+        hass,
+        aioclient_mock,
+        entry,
+        **{CONF_STATIONS: [FANE[0], GLYDE[0]], CONF_UPDATE_INTERVAL: 30},
+    )
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert aioclient_mock.call_count == 0
+    assert coordinator.update_interval == timedelta(minutes=30)
+    assert hass.states.get(GLYDE_LEVEL).state == "1.2"
+    assert hass.states.get(FANE_LEVEL).state == "1.0"
+
+    await _async_set_options(hass, aioclient_mock, entry, **{CONF_STATIONS: [GLYDE[0]]})
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert aioclient_mock.call_count == 0
+    assert hass.states.get(FANE_LEVEL) is None
+    assert er.async_get(hass).async_get(FANE_LEVEL) is None
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, FANE[0])})
+    assert device is None or entry.entry_id not in device.config_entries
+    assert hass.states.get(GLYDE_LEVEL).state == "1.2"
+
+
+async def test_reading_filter_applied_in_place(hass, aioclient_mock):
+    """Turning on the reading filter re-publishes the held readings with a quality."""
+    entry = await async_setup_entry(hass, aioclient_mock, stations=[FANE[0]])
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert "quality" not in hass.states.get(FANE_LEVEL).attributes
+
+    await _async_set_options(
+        hass, aioclient_mock, entry, **{CONF_READING_FILTER: READING_FILTER_FLAG}
+    )
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert aioclient_mock.call_count == 0
+    assert hass.states.get(FANE_LEVEL).attributes["quality"] == "ok"
+
+
+async def test_other_options_reload(hass, aioclient_mock):
+    """An option the coordinator cannot apply in place reloads the entry."""
+    entry = await async_setup_entry(hass, aioclient_mock, stations=[FANE[0]])
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    await _async_set_options(
+        hass, aioclient_mock, entry, **{CONF_RECORDER_FOOTPRINT: True}
+    )
+    assert hass.data[DOMAIN][entry.entry_id] is not coordinator
+    assert aioclient_mock.call_count == 1
+    assert hass.states.get(FANE_LEVEL).state == "1.0"
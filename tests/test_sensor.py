@@ -0,0 +1,87 @@
+"""Tests for the gauge and river sensors."""
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.waterlevel_ie.const import DOMAIN
+
+from . import FANE, REFS, async_next_cycle, async_setup_entry, make_feed
+
+# A Dee gauge, the only one on its river, appearing in the feed later.
+NEW = "0000006025"
+NEW_LEVEL = "sensor.station_5_station_5_water_level"
+NEW_DATUM = "sensor.station_5_station_5_ordnance_datum"
+DEE_HIGHEST = "sensor.dee_highest_water_level"
+FANE_LEVEL = "sensor.station_0_station_0_water_level"
+# Feed with the new gauge and without the first Fane gauge's level.
+SHUFFLED = {"refs": REFS + (NEW,), "levels": {NEW: 2.5, FANE[0]: None}}
+
+
+def _removed(hass: HomeAssistant, entity_id: str) -> bool:
+    """Return True if an entity was removed, leaving its registry entry."""
+    state = hass.states.get(entity_id)
+    return (
+        state is not None
+        and state.state == STATE_UNAVAILABLE
+        and state.attributes.get("restored") is True
+    )
+
+
+async def test_entities_follow_feed(hass, aioclient_mock):
+    """Readings joining and leaving the feed add and remove their entities."""
+    await async_setup_entry(hass, aioclient_mock)
+    ent_reg = er.async_get(hass)
+    assert hass.states.get(NEW_LEVEL) is None
+    assert hass.states.get(DEE_HIGHEST) is None
+
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(1, refs=REFS + (NEW,), levels={NEW: 2.5})
+    )
+    assert hass.states.get(NEW_LEVEL).state == "2.5"
+    assert hass.states.get(NEW_DATUM) is not None
+    assert hass.states.get(DEE_HIGHEST).state == "2.5"
+
+    # A reading dropping out removes its entity, keeping its registry entry.
+    await async_next_cycle(
+        hass, aioclient_mock, make_feed(2, refs=REFS + (NEW,), levels={FANE[0]: None})
+    )
+    assert _removed(hass, FANE_LEVEL)
+    assert ent_reg.async_get(FANE_LEVEL) is not None
+
+    # The station leaving takes its river's sensors with it.
+    await async_next_cycle(hass, aioclient_mock, make_feed(3))
+    assert _removed(hass, NEW_LEVEL)
+    assert _removed(hass, DEE_HIGHEST)
+    assert hass.states.get(FANE_LEVEL).state == "1.0"
+    assert ent_reg.async_get(FANE_LEVEL) is not None
+
+
+async def test_missed_cycle_compares_whole_data(hass, aioclient_mock):
+    """After a missed delta the entities are synced with the whole data."""
+    await async_setup_entry(hass, aioclient_mock)
+    coordinator = next(iter(hass.data[DOMAIN].values()))
+
+    # Pretend the listener missed a cycle that added the new gauge.
+    coordinator.delta_cycle += 1
+    await async_next_cycle(hass, aioclient_mock, make_feed(1, **SHUFFLED))
+    assert hass.states.get(NEW_LEVEL).state == "2.5"
+    assert _removed(hass, FANE_LEVEL)
+
+    # The next cycle, with the same readings, adds and removes nothing.
+    entity_ids = set(hass.states.async_entity_ids("sensor"))
+    await async_next_cycle(hass, aioclient_mock, make_feed(2, **SHUFFLED))
+    assert set(hass.states.async_entity_ids("sensor")) == entity_ids
+
+
+async def test_footprint_mode_unrecorded_attributes(hass, aioclient_mock):
+    """Footprint mode shows per-cycle attributes but keeps them unrecorded."""
+    await async_setup_entry(hass, aioclient_mock, recorder_footprint=True)
+    assert "last_updated" in hass.states.get(FANE_LEVEL).attributes
+    entity = next(
+        entity
+        for entity in hass.data["entity_components"]["sensor"].entities
+        if entity.entity_id == FANE_LEVEL
+    )
+    assert {"last_updated", "data_age_hours", "region"} <= (
+        entity._unrecorded_attributes  # noqa: SLF001
+    )
@@ -0,0 +1,123 @@
+"""Tests for the WaterLevel.ie services."""
+import csv
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import Context
+from homeassistant.exceptions import (
+    HomeAssistantError,
+    ServiceValidationError,
+    Unauthorized,
+)
+
+from custom_components.waterlevel_ie.const import DOMAIN, SERVICE_EXPORT
+from custom_components.waterlevel_ie.services import EXPORT_DIR
+
+from . import FANE, async_next_cycle, async_setup_entry, cycle_time, make_feed
+
+
+@pytest.fixture
+async def archived(hass, aioclient_mock, tmp_path):
+    """Set up an archiving entry that has seen two cycles."""
+    hass.config.config_dir = str(tmp_path)
+    entry = await async_setup_entry(
+        hass, aioclient_mock, make_feed(0), reading_archive=True
+    )
+    await async_next_cycle(hass, aioclient_mock, make_feed(1))
+    yield tmp_path / EXPORT_DIR
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_export_csv(hass, archived, hass_admin_user):
+    """An admin exports a river's readings, buffered ones included, as CSV."""
+    hass.config.allowlist_external_dirs = {str(archived)}
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT,
+        {"rivers": ["Fane"], "filename": "fane.csv"},
+        blocking=True,
+        return_response=True,
+        context=Context(user_id=hass_admin_user.id),
+    )
+
+    path = archived / "fane.csv"
+    assert response == {"path": str(path), "rows": 8}
+    with path.open(encoding="utf-8", newline="") as file:
+        header, *rows = csv.reader(file)
+    assert header == [
+        "time",
+        "station_ref",
+        "station_name",
+        "river",
+        "region",
+        "sensor_type",
+        "value",
+    ]
+    assert {row[1] for row in rows} == set(FANE)
+    assert {row[3] for row in rows} == {"Fane"}
+    assert rows[0][0] == cycle_time(0).isoformat()
+    assert rows[-1][0] == cycle_time(1).isoformat()
+    assert not list(archived.glob("*.tmp"))
+
+
+async def test_export_refuses_path_outside_allowlist(hass, archived):
+    """Nothing is written unless the exports folder is allowlisted."""
+    with pytest.raises(ServiceValidationError, match="allowlist_external_dirs"):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_EXPORT, {}, blocking=True, return_response=True
+        )
+    assert not archived.exists()
+
+
+async def test_export_refuses_non_admin(hass, archived, hass_read_only_user):
+    """Only administrators may export."""
+    hass.config.allowlist_external_dirs = {str(archived)}
+
+    with pytest.raises(Unauthorized):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT,
+            {},
+            blocking=True,
+            return_response=True,
+            context=Context(user_id=hass_read_only_user.id),
+        )
+    assert not archived.exists()
+
+
+async def test_export_parquet_without_pyarrow(hass, archived):
+    """Parquet without pyarrow fails with an error and leaves no file."""
+    hass.config.allowlist_external_dirs = {str(archived)}
+
+    with patch.dict(sys.modules, {"pyarrow": None}), pytest.raises(
+        HomeAssistantError, match="pyarrow"
+    ):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT,
+            {"format": "parquet", "filename": "all.parquet"},
+            blocking=True,
+            return_response=True,
+        )
+    assert list(archived.iterdir()) == []
+
+
+async def test_export_parquet(hass, archived):
+    """Readings export as Parquet when pyarrow is installed."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    hass.config.allowlist_external_dirs = {str(archived)}
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT,
+        {"station_refs": [FANE[0]], "format": "parquet", "filename": "one.parquet"},
+        blocking=True,
+        return_response=True,
+    )
+
+    table = pq.read_table(response["path"])
+    assert response["rows"] == table.num_rows == 4
+    assert set(table.column("station_ref").to_pylist()) == {FANE[0]}
@@ -0,0 +1,102 @@
+"""Tests for choosing between the full feed and per-station files."""
+import logging
+import time
+
+from custom_components.waterlevel_ie.const import API_URL, DATA_HUB, STATION_API_URL
+from custom_components.waterlevel_ie.sources import (
+    SOURCE_FULL_FEED,
+    SOURCE_PER_STATION,
+    RequestBudget,
+)
+
+from . import FANE, async_setup_entry, cycle_time, make_feed
+
+LEVEL_URL = STATION_API_URL.format(station="06011", sensor="0001")
+
+
+def _csv(cycle: int, value: float, padding: int = 0) -> str:
+    """Return a per-sensor file whose newest row is at a cycle's time."""
+    rows = [f"{cycle_time(cycle - 1).isoformat()},0.5"] * (padding + 1)
+    return "\n".join(
+        ["time,value", *rows, f"{cycle_time(cycle).isoformat()},{value}"]
+    )
+
+
+async def _async_cycle(hass, aioclient_mock, cycle: int, station_file: dict) -> list:
+    """Serve the feed and the station file, run a cycle; return the URLs hit."""
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(API_URL, json=make_feed(cycle))
+    aioclient_mock.get(LEVEL_URL, **station_file)
+    hub = hass.data[DATA_HUB]
+    await hub.async_refresh(force=True)
+    await hass.async_block_till_done()
+    return [str(call[1]) for call in aioclient_mock.mock_calls]
+
+
+async def test_cost_model_switches_source(hass, aioclient_mock):
+    """Few cheap files are fetched per station; large ones go back to the feed."""
+    await async_setup_entry(
+        hass, aioclient_mock, stations=[FANE[0]], per_station_fetch=True
+    )
+    hub = hass.data[DATA_HUB]
+    assert hub.source == SOURCE_FULL_FEED
+
+    # One level file (the datum is carried over) is far cheaper than the feed.
+    urls = await _async_cycle(hass, aioclient_mock, 1, {"text": _csv(1, 1.234)})
+    assert urls == [LEVEL_URL]
+    assert hub.source == SOURCE_PER_STATION
+    assert hub.data[FANE[0]]["sensors"]["0001"]["value"] == 1.234
+    assert hub.data[FANE[0]]["sensors"]["OD"]["value"] == 20.0
+
+    # A file far larger than expected makes the next cycle use the feed.
+    big = _csv(2, 1.5, padding=20_000)
+    assert await _async_cycle(hass, aioclient_mock, 2, {"text": big}) == [LEVEL_URL]
+    assert hub.cost_model.choose(1) == SOURCE_FULL_FEED
+    assert await _async_cycle(hass, aioclient_mock, 3, {"text": big}) == [API_URL]
+    assert hub.source == SOURCE_FULL_FEED
+
+
+async def test_budget_spent_uses_full_feed(hass, aioclient_mock):
+    """A cycle whose requests do not fit the window's budget fetches the feed."""
+    await async_setup_entry(
+        hass, aioclient_mock, stations=[FANE[0]], per_station_fetch=True
+    )
+    hub = hass.data[DATA_HUB]
+    budget = hub.station_budget
+    budget.spend(budget.limit, time.monotonic())
+
+    urls = await _async_cycle(hass, aioclient_mock, 1, {"text": _csv(1, 1.234)})
+    assert urls == [API_URL]
+    assert hub.source == SOURCE_FULL_FEED
+
+
+async def test_missing_station_file_falls_back(hass, aioclient_mock, caplog):
+    """A 404 falls back to the feed in the same cycle and for good."""
+    await async_setup_entry(
+        hass, aioclient_mock, stations=[FANE[0]], per_station_fetch=True
+    )
+    hub = hass.data[DATA_HUB]
+
+    with caplog.at_level(logging.WARNING):
+        urls = await _async_cycle(hass, aioclient_mock, 1, {"status": 404})
+    assert urls == [LEVEL_URL, API_URL]
+    assert hub.source == SOURCE_FULL_FEED
+    assert hub.station_files_missing
+    assert hub.data[FANE[0]]["sensors"]["0001"]["datetime"].startswith(
+        cycle_time(1).strftime("%Y-%m-%dT%H:%M")
+    )
+    assert "Per-station file not found" in caplog.text
+
+    urls = await _async_cycle(hass, aioclient_mock, 2, {"text": _csv(2, 1.234)})
+    assert urls == [API_URL]
+
+
+def test_request_budget_window():
+    """Requests leave the budget once they are a window old."""
+    budget = RequestBudget(limit=8, window=900)
+    assert budget.remaining(0) == 8
+    budget.spend(5, 0)
+    budget.spend(3, 600)
+    assert budget.remaining(899) == 0
+    assert budget.remaining(900) == 5
+    assert budget.remaining(1500) == 8
@@ -0,0 +1,50 @@
+"""Startup tests: on-demand modules and data stay unloaded by a default setup.
+
+A deterministic counterpart of the budgets in scripts/profile_startup.py,
+which measures the same startup in wall-clock time.
+"""
+import sys
+from unittest.mock import patch
+
+from custom_components.waterlevel_ie import rivers as rivers_mod
+from custom_components.waterlevel_ie.hub import FeedHub
+
+from . import async_setup_entry
+
+# Modules imported only when used: the options-flow picker, the metrics
+# exporter, the reading filter, diagnostics and the chart series.
+LAZY_MODULES = (
+    "custom_components.waterlevel_ie.picker",
+    "custom_components.waterlevel_ie.metrics",
+    "custom_components.waterlevel_ie.quality",
+    "custom_components.waterlevel_ie.diagnostics",
+    "custom_components.waterlevel_ie.charts",
+)
+
+
+async def test_setup_defers_on_demand_modules(
+    hass, aioclient_mock, tmp_path, monkeypatch
+):
+    """A default setup imports no lazy module and loads rivers with the feed."""
+    hass.config.config_dir = str(tmp_path)
+    for name in LAZY_MODULES:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    rivers_mod._river_map.cache_clear()
+
+    river_map_loaded: list[bool] = []
+    refresh = FeedHub.async_refresh
+
+    async def _async_refresh(self, *args, **kwargs):
+        river_map_loaded.append(bool(rivers_mod._river_map.cache_info().currsize))
+        return await refresh(self, *args, **kwargs)
+
+    with patch.object(FeedHub, "async_refresh", _async_refresh):
+        entry = await async_setup_entry(hass, aioclient_mock)
+
+    assert hass.states.async_all("sensor")
+    # The river JSON is read alongside the first fetch, not before it.
+    assert river_map_loaded[0] is False
+    assert rivers_mod._river_map.cache_info().currsize
+    assert [name for name in LAZY_MODULES if name in sys.modules] == []
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,101 @@
+"""Tests for the station metadata registry."""
+from unittest.mock import AsyncMock, patch
+
+from custom_components.waterlevel_ie.const import DATA_HUB
+from custom_components.waterlevel_ie.stations import MAPS_URL, StationRegistry
+
+from . import FANE, REFS, async_next_cycle, async_setup_entry, make_feed
+
+REF = "0000006011"
+
+
+def test_registry_versions_only_on_change():
+    """Unchanged metadata leaves the registry and its version alone."""
+    registry = StationRegistry()
+    assert registry.update(REF, "Clarebane", 1, 54.0, -6.5)
+    meta = registry.get(REF)
+    assert meta.location_link == MAPS_URL.format(lat=54.0, lon=-6.5)
+    version = registry.version
+
+    assert not registry.update(REF, "Clarebane", 1, 54.0, -6.5)
+    assert registry.get(REF) is meta
+    assert registry.version == version
+
+    assert registry.update(REF, "Clarebane", 1, 54.1, -6.5)
+    assert registry.get(REF) is not meta
+    assert registry.version == version + 1
+
+    assert registry.update("0000006012", "Moyles Mill", 1, None, None)
+    assert registry.get("0000006012").location_link is None
+    assert registry.retain({REF})
+    assert not registry.retain({REF})
+    assert "0000006012" not in registry
+
+
+def test_registry_persisted_form():
+    """The registry round-trips through its compact form; bad rows are dropped."""
+    registry = StationRegistry()
+    registry.update(REF, "Clarebane", 1, 54.0, -6.5)
+    stored = registry.as_dict()
+    assert stored == {REF: ["Clarebane", 1, 54.0, -6.5]}
+
+    loaded = StationRegistry()
+    loaded.load({**stored, "0000006012": ["truncated"]})
+    assert len(loaded) == 1
+    assert loaded.get(REF).as_list() == stored[REF]
+
+
+def test_seed_from_old_snapshot():
+    """Caches from before the split fill in stations the registry lacks."""
+    registry = StationRegistry()
+    registry.update(REF, "Clarebane", 1, 54.0, -6.5)
+    registry.seed_from_snapshot(
+        {
+            REF: {"name": "Old name", "location": "1.0, 2.0", "sensors": {}},
+            "0000006012": {
+                "name": "Moyles Mill",
+                "region": 2,
+                "location": "54.1, -6.6",
+                "sensors": {},
+            },
+            "0000006014": {"name": "Mansfieldstown", "location": "garbage"},
+            "0000006021": {"last_updated": None, "sensors": {}},
+        }
+    )
+    assert registry.get(REF).name == "Clarebane"
+    assert registry.get("0000006012").as_list() == ["Moyles Mill", 2, 54.1, -6.6]
+    assert registry.get("0000006014").latitude is None
+    assert "0000006021" not in registry
+
+
+async def test_snapshot_holds_readings_only(hass, aioclient_mock):
+    """Metadata lives in the registry and is saved only when it changes."""
+    await async_setup_entry(hass, aioclient_mock)
+    hub = hass.data[DATA_HUB]
+    assert {key for station in hub.data.values() for key in station} == {
+        "last_updated",
+        "sensors",
+    }
+    assert len(hub.stations) == len(REFS)
+    version = hub.stations.version
+
+    with patch.object(
+        hub._stations_cache, "async_save", AsyncMock(return_value=100)
+    ) as save:
+        await async_next_cycle(hass, aioclient_mock, make_feed(1))
+        assert hub.stations.version == version
+        save.assert_not_called()
+
+        # The gauge is renamed and moved to another region.
+        feed = make_feed(2)
+        for feature in feed["features"]:
+            if feature["properties"]["station_ref"] == FANE[0]:
+                feature["properties"]["station_name"] = "Clarebane"
+                feature["properties"]["region_id"] = 7
+        await async_next_cycle(hass, aioclient_mock, feed)
+        assert hub.stations.version > version
+        save.assert_called_once_with(hub.stations.as_dict())
+
+    assert hub.station_name(FANE[0]) == "Clarebane"
+    state = hass.states.get("sensor.station_0_station_0_water_level")
+    assert state.attributes["region"] == 7